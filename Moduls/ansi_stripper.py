@@ -0,0 +1,121 @@
+import codecs
+import re
+from typing import Union
+import logging
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Alle Steuersequenzen in einem einzigen vorkompilierten Ausdruck, damit jeder Text nur
+# einmal durchlaufen wird. ESC-Sequenzen teilen sich das Präfix, sodass an jeder Position
+# höchstens eine Alternative weiterverfolgt wird. Ein einzelnes ESC ohne gültige Fortsetzung
+# wird ebenfalls entfernt.
+_CONTROL_SEQUENCE = re.compile(
+    r"""
+      \x1b(?:
+          \[[0-?]*[ -/]*[@-~]            # CSI, z.B. ESC[2K, ESC[1G, ESC[?25l
+        | \][^\x07\x1b]*(?:\x07|\x1b\\)  # OSC, abgeschlossen durch BEL oder ST
+        | [ -/]*[0-~]                    # übrige ESC-Sequenzen, z.B. ESC 7, ESC ( B
+      )?
+    | \x9b[0-?]*[ -/]*[@-~]              # 8-Bit-CSI
+    | [\x00-\x08\x0b\x0c\x0e-\x1a\x1c-\x1f\x7f\r\u2800-\u28ff]  # Steuerzeichen, CR, Braille-Spinner
+    """,
+    re.VERBOSE,
+)
+
+# Für Text ohne ESC genügt die Zeichenklasse, die deutlich schneller geprüft wird.
+_CONTROL_CHAR = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1a\x1c-\x1f\x7f\r\u2800-\u28ff]")
+
+# Angefangene Sequenz ab dem letzten ESC, die erst mit dem nächsten Stück vollständig wird.
+_PARTIAL_SEQUENCE = re.compile(r"(?:\x1b\[[0-?]*[ -/]*|\x9b[0-?]*[ -/]*|\x1b[ -/]*)\Z")
+_OSC_END = re.compile(r"\x07|\x1b\\")
+
+# Längste Sequenz, die über eine Stückgrenze hinweg aufbewahrt wird. Längere, nie
+# abgeschlossene Sequenzen werden wie normaler Text behandelt.
+MAX_PENDING = 256
+
+def strip_ansi(text: Union[str, bytes]) -> str:
+    """
+    Entfernt Steuersequenzen aus einem vollständigen Text.
+
+    Args:
+        text (Union[str, bytes]): Der Text oder die UTF-8-kodierten Bytes.
+
+    Returns:
+        str: Der bereinigte Text.
+    """
+    stripper = AnsiStripper()
+    return stripper.feed(text) + stripper.flush()
+
+class AnsiStripper:
+    """
+    Klasse zum Entfernen von ANSI- und Steuersequenzen aus gestreamter Terminal-Ausgabe.
+
+    Der Stripper nimmt beliebig zerteilte `bytes`- oder `str`-Stücke an. Angefangene
+    Escape-Sequenzen und unvollständige UTF-8-Zeichen am Ende eines Stücks werden bis zum
+    nächsten Aufruf zurückgehalten, sodass das Ergebnis nicht von den Stückgrenzen abhängt.
+    """
+
+    def __init__(self, encoding: str = "utf-8"):
+        """
+        Initialisiert den AnsiStripper.
+
+        Args:
+            encoding (str): Die Kodierung für `bytes`-Stücke.
+        """
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self._pending = ""
+
+    def feed(self, chunk: Union[str, bytes]) -> str:
+        """
+        Bereinigt ein neues Stück der Ausgabe.
+
+        Args:
+            chunk (Union[str, bytes]): Das neu gelesene Stück.
+
+        Returns:
+            str: Der bereinigte Text, der sicher ausgegeben werden kann.
+        """
+        if isinstance(chunk, bytes):
+            chunk = self._decoder.decode(chunk)
+        text = self._pending + chunk if self._pending else chunk
+        self._pending = ""
+        start = self._find_partial(text)
+        if start >= 0:
+            self._pending = text[start:]
+            text = text[:start]
+        return self._strip(text)
+
+    def flush(self) -> str:
+        """
+        Gibt den zurückgehaltenen Rest am Ende des Streams aus.
+
+        Returns:
+            str: Der bereinigte Rest.
+        """
+        text = self._pending + self._decoder.decode(b"", final=True)
+        self._pending = ""
+        return self._strip(text)
+
+    @staticmethod
+    def _strip(text: str) -> str:
+        if "\x1b" in text or "\x9b" in text:
+            return _CONTROL_SEQUENCE.sub("", text)
+        return _CONTROL_CHAR.sub("", text)
+
+    @staticmethod
+    def _find_partial(text: str) -> int:
+        """
+        Sucht eine angefangene Sequenz am Ende des Textes.
+
+        Returns:
+            int: Die Startposition der Sequenz oder -1.
+        """
+        low = max(len(text) - MAX_PENDING, 0)
+        start = max(text.rfind("\x1b", low), text.rfind("\x9b", low))
+        if start < 0:
+            return -1
+        osc = text.rfind("\x1b]", low)
+        if osc >= 0 and not _OSC_END.search(text, osc + 2):
+            return osc
+        return start if _PARTIAL_SEQUENCE.match(text, start) else -1
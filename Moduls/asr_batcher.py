@@ -0,0 +1,146 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, ContextManager, Dict, List, Tuple
+import numpy as np
+from model_pipeline import model_pipeline
+from config import WHISPER_SAMPLING_RATE, WHISPER_CHUNK_LENGTH_S, ASR_BATCH_MAX_SIZE, ASR_BATCH_MAX_WAIT_MS
+import logging
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+class ASRBatcher:
+    """
+    Klasse, die gleichzeitige Transkriptionsaufträge zu Batches für die Whisper-Pipeline bündelt.
+
+    Ein Hintergrund-Thread nimmt den ersten wartenden Auftrag und sammelt höchstens
+    `max_wait_ms` Millisekunden lang weitere, bis `max_batch` erreicht ist. Die Signale werden
+    in einem Aufruf der Pipeline mit `batch_size=max_batch` verarbeitet, sodass die
+    30-Sekunden-Fenster aller Aufträge gemeinsam durch das Modell laufen. Jeder Aufrufer
+    erhält über ein `Future` sein eigenes Ergebnis; schlägt der Batch fehl, erhalten alle
+    Aufrufer des Batches den Fehler.
+
+    Attributes:
+        pipe_provider (Callable[[], ContextManager[Any]]): Liefert die ASR-Pipeline für die Dauer
+            eines Batches, z.B. `ModelPipeline.use`.
+        max_batch (int): Die größte Anzahl an Aufträgen pro Batch; 1 schaltet das Bündeln ab.
+        max_wait (float): Die längste Sammelzeit in Sekunden.
+    """
+
+    def __init__(self, pipe_provider: Callable[[], ContextManager[Any]], max_batch: int = ASR_BATCH_MAX_SIZE,
+                 max_wait_ms: float = ASR_BATCH_MAX_WAIT_MS):
+        """
+        Initialisiert den ASRBatcher. Der Hintergrund-Thread startet mit dem ersten Auftrag.
+
+        Args:
+            pipe_provider (Callable[[], ContextManager[Any]]): Liefert die ASR-Pipeline.
+            max_batch (int): Die größte Anzahl an Aufträgen pro Batch.
+            max_wait_ms (float): Die längste Sammelzeit in Millisekunden.
+        """
+        self.pipe_provider = pipe_provider
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[Tuple[np.ndarray, Future, float]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._batches = 0
+        self._jobs = 0
+        self._wait_seconds = 0.0
+        self._batch_seconds = 0.0
+
+    def transcribe(self, samples: np.ndarray) -> Dict[str, Any]:
+        """
+        Transkribiert ein 16-kHz-Mono-Signal im nächsten Batch.
+
+        Args:
+            samples (np.ndarray): Die Samples als float32.
+
+        Returns:
+            Dict[str, Any]: Das Ergebnis der Pipeline mit `text` und `chunks` (Zeitstempel).
+
+        Raises:
+            Exception: Der Fehler der Pipeline, wenn der Batch fehlschlägt.
+        """
+        return self.submit(samples).result()
+
+    def submit(self, samples: np.ndarray) -> Future:
+        """
+        Stellt ein Signal in die Warteschlange.
+
+        Args:
+            samples (np.ndarray): Die Samples als float32.
+
+        Returns:
+            Future: Liefert das Ergebnis der Pipeline für dieses Signal.
+        """
+        future: Future = Future()
+        self._ensure_worker()
+        self._queue.put((samples, future, time.perf_counter()))
+        return future
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Gibt die Kennzahlen des Batchers zurück.
+
+        Returns:
+            Dict[str, float]: Anzahl der Batches und Aufträge, mittlere Batchgröße, mittlere
+            Wartezeit bis zum Start des Batches und mittlere Laufzeit eines Batches in Millisekunden.
+        """
+        with self._lock:
+            return {
+                "batches": self._batches,
+                "jobs": self._jobs,
+                "mean_batch_size": self._jobs / self._batches if self._batches else 0.0,
+                "mean_wait_ms": self._wait_seconds / self._jobs * 1000 if self._jobs else 0.0,
+                "mean_batch_ms": self._batch_seconds / self._batches * 1000 if self._batches else 0.0,
+            }
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="asr-batcher", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            batch = [job for job in batch if job[1].set_running_or_notify_cancel()]
+            if batch:
+                self._process(batch)
+
+    def _process(self, batch: List[Tuple[np.ndarray, Future, float]]) -> None:
+        start = time.perf_counter()
+        try:
+            with self.pipe_provider() as pipe:
+                results = pipe(
+                    [{"raw": samples, "sampling_rate": WHISPER_SAMPLING_RATE} for samples, _, _ in batch],
+                    batch_size=self.max_batch,
+                    chunk_length_s=WHISPER_CHUNK_LENGTH_S,
+                    return_timestamps=True,
+                )
+        except Exception as e:
+            logger.error(f"Fehler bei der Spracherkennung eines Batches mit {len(batch)} Aufträgen: {e}")
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        elapsed = time.perf_counter() - start
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+        audio = sum(len(samples) for samples, _, _ in batch) / WHISPER_SAMPLING_RATE
+        with self._lock:
+            self._batches += 1
+            self._jobs += len(batch)
+            self._wait_seconds += sum(start - queued for _, _, queued in batch)
+            self._batch_seconds += elapsed
+        logger.debug(f"Batch mit {len(batch)} Aufträgen ({audio:.1f}s Audio) in {elapsed:.2f}s transkribiert")
+
+asr_batcher = ASRBatcher(model_pipeline.use)
@@ -0,0 +1,109 @@
+import io
+import os
+import time
+import wave
+from typing import Tuple
+import numpy as np
+from pydub import AudioSegment
+from pydub.utils import which
+from config import WHISPER_SAMPLING_RATE, AUDIO_UPLOAD_FORMATS, AUDIO_UPLOAD_MAX_BYTES, AUDIO_UPLOAD_BITRATE
+import logging
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+def load_pcm(audio_file_path: str) -> np.ndarray:
+    """
+    Lädt eine Audiodatei als 16-kHz-Mono-Signal im Arbeitsspeicher.
+
+    WAV-Dateien, die bereits 16 kHz, mono und 16 Bit haben, werden direkt eingelesen; alle
+    anderen Dateien werden mit pydub dekodiert, heruntergemischt und neu abgetastet.
+
+    Args:
+        audio_file_path (str): Der Pfad zur Audiodatei.
+
+    Returns:
+        np.ndarray: Die Samples als float32 im Bereich [-1, 1].
+    """
+    if _is_whisper_wav(audio_file_path):
+        with wave.open(audio_file_path, "rb") as f:
+            frames = f.readframes(f.getnframes())
+        return np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+    audio = _to_whisper_format(AudioSegment.from_file(audio_file_path))
+    samples = np.array(audio.get_array_of_samples(), dtype=np.float32)
+    return samples / float(1 << (8 * audio.sample_width - 1))
+
+def prepare_upload(audio_file_path: str) -> Tuple[str, bytes]:
+    """
+    Bereitet eine Audiodatei für den Upload an eine Transkriptions-API vor.
+
+    Dateien in einem von der API akzeptierten Format (`AUDIO_UPLOAD_FORMATS`) unterhalb von
+    `AUDIO_UPLOAD_MAX_BYTES` werden unverändert übernommen; unkomprimierte WAV-Dateien nur,
+    wenn sie bereits 16 kHz mono sind. Alle anderen Dateien werden auf 16 kHz mono
+    umgerechnet und, sofern ffmpeg verfügbar ist, als MP3 mit `AUDIO_UPLOAD_BITRATE` kodiert,
+    sonst als WAV. Es werden keine temporären Dateien im
+    Arbeitsverzeichnis angelegt, sodass parallele Aufrufe sich nicht gegenseitig stören.
+
+    Args:
+        audio_file_path (str): Der Pfad zur Audiodatei.
+
+    Returns:
+        Tuple[str, bytes]: Dateiname (für die Formaterkennung der API) und Inhalt.
+    """
+    name = os.path.basename(audio_file_path)
+    extension = os.path.splitext(name)[1].lower()
+    size = os.path.getsize(audio_file_path)
+    suitable = extension in AUDIO_UPLOAD_FORMATS and (extension != ".wav" or _is_whisper_wav(audio_file_path))
+    if suitable and size <= AUDIO_UPLOAD_MAX_BYTES:
+        logger.debug(f"Audio {name} wird ohne Umwandlung hochgeladen ({size / 1024:.0f} KB)")
+        with open(audio_file_path, "rb") as f:
+            return name, f.read()
+
+    start = time.perf_counter()
+    container, data = _encode(_to_whisper_format(AudioSegment.from_file(audio_file_path)))
+    logger.debug(f"Audio {name} in {(time.perf_counter() - start) * 1000:.0f} ms nach {container} umgewandelt: "
+                 f"{size / 1024:.0f} KB -> {len(data) / 1024:.0f} KB")
+    return f"{os.path.splitext(name)[0]}.{container}", data
+
+def encode_pcm(samples: np.ndarray, name: str = "audio") -> Tuple[str, bytes]:
+    """
+    Kodiert ein 16-kHz-Mono-Signal für den Upload an eine Transkriptions-API.
+
+    Args:
+        samples (np.ndarray): Die Samples als float32 im Bereich [-1, 1].
+        name (str): Der Dateiname ohne Endung.
+
+    Returns:
+        Tuple[str, bytes]: Dateiname und Inhalt, als MP3 oder ohne ffmpeg als WAV.
+    """
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+    audio = AudioSegment(data=pcm, sample_width=2, frame_rate=WHISPER_SAMPLING_RATE, channels=1)
+    container, data = _encode(audio)
+    return f"{name}.{container}", data
+
+def _encode(audio: AudioSegment) -> Tuple[str, bytes]:
+    container = "mp3" if which("ffmpeg") or which("avconv") else "wav"
+    buffer = io.BytesIO()
+    if container == "mp3":
+        audio.export(buffer, format="mp3", bitrate=AUDIO_UPLOAD_BITRATE)
+    else:
+        audio.export(buffer, format="wav")
+    return container, buffer.getvalue()
+
+def _is_whisper_wav(audio_file_path: str) -> bool:
+    if not audio_file_path.lower().endswith(".wav"):
+        return False
+    try:
+        with wave.open(audio_file_path, "rb") as f:
+            return (f.getframerate(), f.getnchannels(), f.getsampwidth()) == (WHISPER_SAMPLING_RATE, 1, 2)
+    except (wave.Error, EOFError, OSError):
+        return False
+
+def _to_whisper_format(audio: AudioSegment) -> AudioSegment:
+    if audio.channels != 1:
+        audio = audio.set_channels(1)
+    if audio.frame_rate != WHISPER_SAMPLING_RATE:
+        audio = audio.set_frame_rate(WHISPER_SAMPLING_RATE)
+    if audio.sample_width != 2:
+        audio = audio.set_sample_width(2)
+    return audio
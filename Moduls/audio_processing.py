@@ -1,16 +1,16 @@
 import logging
-from pydub import AudioSegment
 import os
-from openai import OpenAI
+from long_transcription import transcribe_file
 
 logger = logging.getLogger(__name__)
 
-# Initialisieren Sie den OpenAI-Client
-client = OpenAI()
-
 def process_audio(audio_file_path: str) -> str:
     """
     Verarbeitet eine Audiodatei und extrahiert den Text.
+
+    Die Spracherkennung übernimmt das in `TRANSCRIPTION_BACKEND` gewählte Backend aus
+    `transcription.py`; lange Aufnahmen werden mit `long_transcription.py` an Sprechpausen
+    geteilt und parallel transkribiert.
     """
     try:
         logger.debug(f"Starte Audioverarbeitung für: {audio_file_path}")
@@ -19,34 +19,11 @@ def process_audio(audio_file_path: str) -> str:
         if not os.path.exists(audio_file_path):
             raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
 
-        # Laden der Audiodatei mit pydub
-        audio = AudioSegment.from_file(audio_file_path)
-        logger.debug(f"Audio geladen: {len(audio)}ms")
-
-        # Konvertieren der Audiodatei in MP3-Format
-        temp_audio_path = "temp_audio.mp3"
-        audio.export(temp_audio_path, format="mp3")
-        logger.debug(f"Audio in temporäre Datei exportiert: {temp_audio_path}")
-
-        # Überprüfen, ob die temporäre Audiodatei erstellt wurde
-        if not os.path.exists(temp_audio_path):
-            raise FileNotFoundError(f"Temporary audio file not created: {temp_audio_path}")
-
-        # Transkription der Audiodatei mit OpenAI
-        with open(temp_audio_path, "rb") as audio_file:
-            transcription = client.audio.transcriptions.create(
-                file=audio_file,
-                model="whisper-1",
-                response_format="verbose_json",
-                timestamp_granularities=["word"]
-            )
-
-        # Entfernen der temporären Audiodatei
-        os.remove(temp_audio_path)
-        logger.debug(f"Temporäre Audio-Datei entfernt: {temp_audio_path}")
+        # Transkription mit dem konfigurierten Backend (TRANSCRIPTION_BACKEND), lange Aufnahmen abschnittsweise
+        text = transcribe_file(audio_file_path)
 
         logger.info(f"Audio processed successfully: {audio_file_path}")
-        return transcription.text if transcription.text else ""  # Stelle sicher, dass nie ein leerer String zurückgegeben wird.
+        return text
     except FileNotFoundError as fnf_error:
         logger.error(f"File not found: {fnf_error}")
         raise ValueError(f"File not found: {fnf_error}")
@@ -0,0 +1,233 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+import logging
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+class GenerationCancelled(Exception):
+    """
+    Wird ausgelöst, wenn eine laufende Generierung abgebrochen wurde.
+    """
+
+class CancellationToken:
+    """
+    Klasse, über die eine laufende Generierung abgebrochen werden kann.
+
+    Wer eine Ressource öffnet (HTTP-Stream, Unterprozess), registriert mit `on_cancel` eine
+    Funktion, die sie wieder freigibt. `cancel` ruft diese Funktionen sofort im aufrufenden
+    Thread auf, sodass ein blockierender Lesevorgang im generierenden Thread umgehend endet.
+
+    Attributes:
+        name (str): Bezeichnung der Generierung, z.B. `ollama` oder `mistral`.
+        started (float): Startzeitpunkt (`time.monotonic`).
+        release_time (Optional[float]): Dauer der Freigabe in Sekunden, sobald abgebrochen wurde.
+    """
+
+    def __init__(self, name: str = ""):
+        """
+        Initialisiert den CancellationToken.
+
+        Args:
+            name (str): Bezeichnung der Generierung.
+        """
+        self.name = name
+        self.started = time.monotonic()
+        self.release_time: Optional[float] = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        """
+        Gibt an, ob abgebrochen wurde.
+        """
+        return self._event.is_set()
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Registriert eine Funktion, die beim Abbruch aufgerufen wird.
+
+        Wurde bereits abgebrochen, wird die Funktion sofort aufgerufen.
+
+        Args:
+            callback (Callable[[], None]): Die Funktion, z.B. `response.close`.
+
+        Returns:
+            Callable[[], None]: Eine Funktion, die die Registrierung wieder aufhebt.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        self._run(callback)
+        return lambda: None
+
+    def cancel(self) -> None:
+        """
+        Bricht die Generierung ab und gibt alle registrierten Ressourcen frei.
+        """
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        start = time.perf_counter()
+        for callback in reversed(callbacks):
+            self._run(callback)
+        self.release_time = time.perf_counter() - start
+
+    def raise_if_cancelled(self) -> None:
+        """
+        Löst `GenerationCancelled` aus, wenn abgebrochen wurde.
+
+        Raises:
+            GenerationCancelled: Wenn abgebrochen wurde.
+        """
+        if self._event.is_set():
+            raise GenerationCancelled(f"{self.name or 'Generierung'} abgebrochen")
+
+    def _remove(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    @staticmethod
+    def _run(callback: Callable[[], None]) -> None:
+        try:
+            callback()
+        except Exception as e:
+            logger.debug(f"Fehler beim Freigeben einer Ressource nach Abbruch: {e}")
+
+class CancellationRegistry:
+    """
+    Klasse zur Verwaltung der laufenden Generierungen pro Browser-Sitzung.
+
+    Die Oberfläche meldet jede Generierung mit `track` unter der Sitzungs-ID an. Der
+    Stopp-Button eines Tabs bricht über `cancel` die Generierungen dieses Anbieters ab, das
+    Schließen des Browser-Tabs alle Generierungen der Sitzung. Für jede Bezeichnung wird die mittlere Dauer vollständiger Generierungen
+    geführt; daraus wird geschätzt, wie viel Rechenzeit ein Abbruch gespart hat.
+    """
+
+    def __init__(self):
+        """
+        Initialisiert die CancellationRegistry.
+        """
+        self._lock = threading.Lock()
+        self._active: Dict[str, List[CancellationToken]] = {}
+        self._durations: Dict[str, float] = {}
+        self._completed: Dict[str, int] = {}
+        self._cancelled = 0
+        self._saved_seconds = 0.0
+        self._max_release = 0.0
+
+    @contextmanager
+    def track(self, session_id: Optional[str], name: str) -> Iterator[CancellationToken]:
+        """
+        Kontextmanager für eine Generierung einer Sitzung.
+
+        Args:
+            session_id (Optional[str]): Die Sitzungs-ID, z.B. `gr.Request.session_hash`.
+            name (str): Bezeichnung der Generierung.
+
+        Yields:
+            CancellationToken: Der Token der Generierung.
+        """
+        token = CancellationToken(name)
+        session_id = session_id or ""
+        with self._lock:
+            self._active.setdefault(session_id, []).append(token)
+        try:
+            yield token
+        except GenerationCancelled:
+            pass
+        finally:
+            with self._lock:
+                tokens = self._active.get(session_id, [])
+                if token in tokens:
+                    tokens.remove(token)
+                if not tokens:
+                    self._active.pop(session_id, None)
+            if not token.cancelled:
+                self._record_completed(token)
+
+    def cancel(self, session_id: Optional[str], name: Optional[str] = None) -> int:
+        """
+        Bricht laufende Generierungen einer Sitzung ab.
+
+        Args:
+            session_id (Optional[str]): Die Sitzungs-ID.
+            name (Optional[str]): Nur Generierungen mit dieser Bezeichnung abbrechen. Ohne Angabe
+                werden alle Generierungen der Sitzung abgebrochen.
+
+        Returns:
+            int: Die Anzahl der abgebrochenen Generierungen.
+        """
+        session_id = session_id or ""
+        with self._lock:
+            active = self._active.get(session_id, [])
+            tokens = [token for token in active if name is None or token.name == name]
+            remaining = [token for token in active if token not in tokens]
+            if remaining:
+                self._active[session_id] = remaining
+            else:
+                self._active.pop(session_id, None)
+        for token in tokens:
+            token.cancel()
+            self._record_cancelled(token)
+        return len(tokens)
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Gibt die Kennzahlen der Abbrüche zurück.
+
+        Returns:
+            Dict[str, float]: Anzahl abgeschlossener und abgebrochener Generierungen, geschätzte
+            eingesparte Generierungszeit in Sekunden und längste Freigabedauer in Millisekunden.
+        """
+        with self._lock:
+            return {
+                "completed": sum(self._completed.values()),
+                "cancelled": self._cancelled,
+                "saved_seconds": self._saved_seconds,
+                "max_release_ms": self._max_release * 1000,
+            }
+
+    def status_markdown(self) -> str:
+        """
+        Formatiert die Kennzahlen der Abbrüche für die Anzeige in der Oberfläche.
+
+        Returns:
+            str: Eine Markdown-Tabelle mit den Werten aus `metrics`.
+        """
+        metrics = self.metrics()
+        return "\n".join([
+            "**Abbrüche**",
+            "",
+            "| Abgeschlossen | Abgebrochen | Gesparte Generierungszeit | Längste Freigabe |",
+            "|---|---|---|---|",
+            f"| {metrics['completed']} | {metrics['cancelled']} | {metrics['saved_seconds']:.1f} s | {metrics['max_release_ms']:.1f} ms |",
+        ])
+
+    def _record_completed(self, token: CancellationToken) -> None:
+        duration = time.monotonic() - token.started
+        with self._lock:
+            count = self._completed.get(token.name, 0) + 1
+            average = self._durations.get(token.name, duration)
+            self._durations[token.name] = average + (duration - average) / count
+            self._completed[token.name] = count
+
+    def _record_cancelled(self, token: CancellationToken) -> None:
+        elapsed = time.monotonic() - token.started
+        with self._lock:
+            saved = max(self._durations.get(token.name, elapsed) - elapsed, 0.0)
+            self._cancelled += 1
+            self._saved_seconds += saved
+            self._max_release = max(self._max_release, token.release_time or 0.0)
+        logger.info(f"{token.name} nach {elapsed:.1f}s abgebrochen, Ressourcen in {(token.release_time or 0) * 1000:.1f} ms freigegeben, "
+                    f"geschätzt {saved:.1f}s Generierung gespart (insgesamt {self._saved_seconds:.1f}s)")
+
+cancellation_registry = CancellationRegistry()
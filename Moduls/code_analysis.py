@@ -0,0 +1,173 @@
+import ast
+import hashlib
+import textwrap
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from response_cache import ResponseCache, normalize_prompt, response_cache
+from config import CODE_ANALYSIS_WORKERS
+import logging
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+class CodeUnit(NamedTuple):
+    """
+    Eine Einheit einer Python-Datei: eine Funktion, eine Klasse oder der übrige Code auf Modulebene.
+
+    Attributes:
+        name (str): Die Bezeichnung, z.B. `def main` oder `class Parser`.
+        start (int): Die erste Zeile (1-basiert, inklusive Dekoratoren).
+        end (int): Die letzte Zeile.
+        source (str): Der Quelltext der Einheit.
+    """
+    name: str
+    start: int
+    end: int
+    source: str
+
+def split_units(code: str) -> List[CodeUnit]:
+    """
+    Teilt Python-Code in Funktionen und Klassen der obersten Ebene.
+
+    Alle übrigen Anweisungen der obersten Ebene (Importe, Konstanten, Aufrufe) bilden zusammen die
+    Einheit "Modulebene". Lässt sich der Code nicht parsen, ist die ganze Datei eine Einheit.
+
+    Args:
+        code (str): Der Quelltext.
+
+    Returns:
+        List[CodeUnit]: Die Einheiten, beginnend mit der Modulebene.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return [CodeUnit("Datei", 1, code.count("\n") + 1, code)] if code.strip() else []
+    lines = code.splitlines(keepends=True)
+    units: List[CodeUnit] = []
+    module: List[Tuple[int, int, str]] = []
+    for node in tree.body:
+        start = min([node.lineno] + [decorator.lineno for decorator in getattr(node, "decorator_list", [])])
+        source = "".join(lines[start - 1:node.end_lineno])
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            kind = "class" if isinstance(node, ast.ClassDef) else "def"
+            units.append(CodeUnit(f"{kind} {node.name}", start, node.end_lineno, source))
+        else:
+            module.append((start, node.end_lineno, source))
+    if module:
+        source = "".join(part if part.endswith("\n") else part + "\n" for _, _, part in module)
+        units.insert(0, CodeUnit("Modulebene", module[0][0], module[-1][1], source))
+    return units
+
+def unit_hash(source: str) -> str:
+    """
+    Bildet den Hash des normalisierten Quelltexts einer Einheit.
+
+    Normalisiert wird über den AST: Kommentare, Leerzeilen, Einrückungstiefe und Formatierung
+    ändern den Hash nicht. Nicht parsbarer Code wird wie ein Prompt normalisiert.
+
+    Args:
+        source (str): Der Quelltext.
+
+    Returns:
+        str: Der SHA-256 des normalisierten Quelltexts.
+    """
+    try:
+        normalized = ast.dump(ast.parse(textwrap.dedent(source)))
+    except SyntaxError:
+        normalized = normalize_prompt(source)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+class IncrementalCodeAnalyzer:
+    """
+    Klasse zur Analyse von Python-Code pro Funktion und Klasse.
+
+    Der Code wird mit `split_units` zerlegt, und jede Einheit wird einzeln an das Modell
+    geschickt. Die Antworten liegen im `ResponseCache` unter der Anweisung und dem Hash des
+    normalisierten Quelltexts (`unit_hash`), auch wenn das Modell sampelt; nach einer Änderung
+    werden daher nur die geänderten Einheiten neu angefragt, und zwar mit höchstens `workers` gleichzeitigen Anfragen. Die
+    Antworten werden in der Reihenfolge der Datei zu einem Bericht zusammengeführt.
+
+    Attributes:
+        generate (Callable[[str], Optional[str]]): Fragt das Modell mit einem Prompt an.
+        model_name (Callable[[], str]): Liefert den Namen des aktuellen Modells für den Cache-Schlüssel.
+        provider (str): Der Anbieter für den Cache-Schlüssel.
+        params (Dict[str, Any]): Die Generierungsparameter, mit denen `generate` anfragt.
+        cache (ResponseCache): Der Cache der Antworten.
+        workers (int): Die Anzahl gleichzeitiger Anfragen.
+    """
+
+    def __init__(self, generate: Callable[[str], Optional[str]], model_name: Callable[[], str], provider: str = "gemini",
+                 params: Optional[Dict[str, Any]] = None, cache: ResponseCache = response_cache, workers: int = CODE_ANALYSIS_WORKERS):
+        """
+        Initialisiert den IncrementalCodeAnalyzer.
+
+        Args:
+            generate (Callable[[str], Optional[str]]): Fragt das Modell mit einem Prompt an.
+            model_name (Callable[[], str]): Liefert den Namen des aktuellen Modells.
+            provider (str): Der Anbieter für den Cache-Schlüssel.
+            params (Optional[Dict[str, Any]]): Die Generierungsparameter, mit denen `generate` anfragt.
+            cache (ResponseCache): Der Cache der Antworten.
+            workers (int): Die Anzahl gleichzeitiger Anfragen.
+        """
+        self.generate = generate
+        self.model_name = model_name
+        self.provider = provider
+        self.params = params or {}
+        self.cache = cache
+        self.workers = workers
+
+    def analyze(self, code: str, instruction: str) -> str:
+        """
+        Analysiert den Code einheitenweise und führt die Antworten zu einem Bericht zusammen.
+
+        Schlägt die Anfrage für eine Einheit fehl, steht der Fehler bei dieser Einheit im Bericht
+        und wird nicht zwischengespeichert; die übrigen Einheiten werden trotzdem analysiert.
+
+        Args:
+            code (str): Der Quelltext.
+            instruction (str): Die Anweisung an das Modell, z.B. "Analysiere diesen Python-Code und gib Feedback:".
+
+        Returns:
+            str: Der Bericht mit einem Abschnitt pro Einheit.
+        """
+        units = split_units(code)
+        if not units:
+            return "Kein Code zum Analysieren."
+        model = self.model_name()
+        start = time.perf_counter()
+        answers: List[str] = [""] * len(units)
+        fresh = 0
+        pool = ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(units))), thread_name_prefix="code-analysis")
+        try:
+            futures = {pool.submit(self._analyze_unit, model, unit, instruction): index for index, unit in enumerate(units)}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    answers[index], computed = future.result()
+                    fresh += computed
+                except Exception as e:
+                    logger.error(f"Fehler bei der Analyse von {units[index].name}: {e}")
+                    answers[index] = f"Fehler während der Analyse: {e}"
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        elapsed = time.perf_counter() - start
+        logger.info(f"Code-Analyse: {fresh} von {len(units)} Einheiten neu angefragt ({elapsed:.1f}s)")
+        sections = [f"### {unit.name} (Zeilen {unit.start}–{unit.end})\n\n{answer.strip()}" for unit, answer in zip(units, answers)]
+        footer = f"*{fresh} von {len(units)} Einheiten neu analysiert, {len(units) - fresh} aus dem Cache ({elapsed:.1f}s).*"
+        return "\n\n".join(sections) + f"\n\n---\n{footer}"
+
+    def _analyze_unit(self, model: str, unit: CodeUnit, instruction: str) -> Tuple[str, bool]:
+        computed = False
+
+        def compute() -> Optional[str]:
+            nonlocal computed
+            computed = True
+            prompt = f"{instruction}\n\nDies ist `{unit.name}` aus einer größeren Datei; beurteile nur diesen Teil.\n\n{unit.source}\n\nAntworte auf Deutsch und mit Zeilenumbrüchen."
+            return self.generate(prompt)
+
+        answer = self.cache.cached(self.provider, model, instruction, compute, params=self.params,
+                                   attachments=[unit_hash(unit.source)], cache_sampled=True)
+        if answer is None:
+            raise ValueError("Keine Antwort vom Modell erhalten.")
+        return answer, computed
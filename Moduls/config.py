@@ -21,6 +21,15 @@ MISTRAL_IMAGE_MODEL = "pixtral-12b-2409"
 
 MISTRAL_API_URL = "https://api.mistral.ai/v1/chat/completions"
 
+GEMINI_UI_UPDATE_INTERVAL = 0.05  # Mindestabstand zwischen zwei Aktualisierungen des Gemini-Chats in Sekunden
+GEMINI_SESSION_IDLE_S = float(os.getenv('GEMINI_SESSION_IDLE_S', '1800'))  # Sekunden ohne Nutzung, bis eine Gemini-Unterhaltung verworfen wird (0 = nie)
+GEMINI_HISTORY_TOKEN_BUDGET = int(os.getenv('GEMINI_HISTORY_TOKEN_BUDGET', '32000'))  # Geschätzte Tokens für Verlauf und neue Nachricht; ältere Runden werden entfernt
+GEMINI_CHARS_PER_TOKEN = 4  # Zeichen pro Token für die Schätzung der Verlaufslänge
+GEMINI_IMAGE_TOKENS = 258  # Tokens, die Gemini für ein Bild berechnet
+GEMINI_FILE_TTL_S = 48 * 3600  # Lebensdauer hochgeladener Dateien in der Gemini File API
+GEMINI_FILE_EXPIRY_MARGIN_S = 600  # So lange vor dem Ablauf wird eine hochgeladene Datei nicht mehr verwendet
+GEMINI_UPLOAD_JPEG_QUALITY = 90  # JPEG-Qualität hochgeladener Bilder
+
 OLLAMA_MODELS = [
     "phi4-model:latest",
     "gemma2:2b",
@@ -34,13 +43,80 @@ OLLAMA_MODELS = [
 ]
 
 DEFAULT_OLLAMA_MODEL = "gemma2:2b"
+
+# --- Ollama-Daemon (HTTP-API) ---
+OLLAMA_HOST = os.getenv('OLLAMA_HOST', 'http://localhost:11434')
+if "://" not in OLLAMA_HOST:
+    OLLAMA_HOST = f"http://{OLLAMA_HOST}"
+OLLAMA_USE_HTTP = os.getenv('OLLAMA_USE_HTTP', '1') != '0'  # '0' erzwingt den CLI-Fallback (`ollama run`)
+OLLAMA_CONNECT_TIMEOUT = 3.0  # Sekunden bis zum Verbindungsaufbau
+OLLAMA_READ_TIMEOUT = 300.0  # Sekunden zwischen zwei Stream-Zeilen
+OLLAMA_POOL_SIZE = 8  # Anzahl der Keep-Alive-Verbindungen im Pool
+OLLAMA_UI_UPDATE_INTERVAL = 0.05  # Mindestabstand zwischen zwei UI-Aktualisierungen in Sekunden
+OLLAMA_KEEP_ALIVE = os.getenv('OLLAMA_KEEP_ALIVE', '30m')  # Wie lange der Daemon ein Modell nach einer Anfrage geladen hält
+OLLAMA_RAM_BUDGET_GB = float(os.getenv('OLLAMA_RAM_BUDGET_GB', '16'))  # Arbeitsspeicher für gleichzeitig geladene Modelle
+OLLAMA_PRELOAD_DEFAULT = os.getenv('OLLAMA_PRELOAD_DEFAULT', '1') != '0'  # Standardmodell beim Start vorladen
+OLLAMA_FANOUT_MAX_MODELS = 4  # Maximale Anzahl von Modellen im Fan-out-Modus
+OLLAMA_FANOUT_PARALLELISM = 2  # Standardanzahl gleichzeitig generierender Modelle im Fan-out-Modus
+OLLAMA_CONTEXT_TOKENS = int(os.getenv('OLLAMA_CONTEXT_TOKENS', '4096'))  # Kontextlänge (num_ctx) der Modelle im Daemon
+OLLAMA_CHUNK_RESERVE_TOKENS = 1024  # Davon für Anweisungen und Antwort freigehaltene Token beim Aufteilen von Dokumenten
+OLLAMA_CHUNK_WORKERS = 2  # Gleichzeitig verarbeitete Dokumentabschnitte
+OLLAMA_CHARS_PER_TOKEN = 4  # Zeichen pro Token für die Schätzung der Prompt-Länge
+
+# --- Dokumentvergleich ---
+DIFF_CONTEXT_LINES = 3  # Kontextzeilen pro Hunk
+DIFF_PAGE_LINES = 400  # Maximale Zeilenanzahl einer Diff-Seite in der Oberfläche
+DIFF_CACHE_SIZE = 16  # Anzahl zwischengespeicherter Vergleiche
+DIFF_MAX_EDIT_COST = 2000  # Ab so vielen Änderungen in einem Bereich ohne eindeutige Zeilen gilt er als ersetzt
+
 STATUS_MESSAGE_GENERATING = "Antwort wird generiert..."
 STATUS_MESSAGE_COMPLETE = "Antwort generiert."
 STATUS_MESSAGE_ERROR = "Fehler: Die Anfrage konnte nicht verarbeitet werden."
+STATUS_MESSAGE_CANCELLED = "Generierung abgebrochen."
 
 SAVE_DIR = ".gradio"
 SAVE_FILE = os.path.join(SAVE_DIR, "save.json")
 CONFIG_FILE = os.path.join(SAVE_DIR, "config.json")
+DOCUMENT_CACHE_DIR = os.path.join(SAVE_DIR, "document_cache")  # Cache für aus Dokumenten extrahierten Text
+DOCUMENT_CACHE_MAX_MB = int(os.getenv('DOCUMENT_CACHE_MAX_MB', '512'))  # Maximale Größe des Dokument-Caches
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', '1') == '1'  # '0' schaltet den Antwort-Cache ab
+RESPONSE_CACHE_DIR = os.path.join(SAVE_DIR, "response_cache")  # Cache für Modellantworten aller Anbieter
+RESPONSE_CACHE_MAX_MB = int(os.getenv('RESPONSE_CACHE_MAX_MB', '64'))  # Maximale Größe des Antwort-Caches
+RESPONSE_CACHE_TTL_S = float(os.getenv('RESPONSE_CACHE_TTL_S', str(7 * 24 * 3600)))  # Lebensdauer einer zwischengespeicherten Antwort in Sekunden
+SEMANTIC_CACHE_ENABLED = os.getenv('SEMANTIC_CACHE_ENABLED', '0') == '1'  # '1' beantwortet einfache Chatfragen (Mistral ohne Bild, Ollama ohne Dateien) aus dem Antwort-Cache, auch wenn sie anders formuliert sind
+SEMANTIC_CACHE_MODEL = os.getenv('SEMANTIC_CACHE_MODEL', 'nomic-embed-text')  # Ollama-Modell für die Embeddings der Prompts
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.95'))  # Mindest-Kosinus-Ähnlichkeit für einen Treffer
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv('SEMANTIC_CACHE_MAX_ENTRIES', '20000'))  # Maximale Anzahl der Einträge pro Anbieter und Modell (768 Dimensionen: ca. 3 KB pro Eintrag)
+CODE_ANALYSIS_INCREMENTAL = os.getenv('CODE_ANALYSIS_INCREMENTAL', '1') == '1'  # Code Editor: standardmäßig pro Funktion und Klasse analysieren
+CODE_ANALYSIS_WORKERS = int(os.getenv('CODE_ANALYSIS_WORKERS', '4'))  # Gleichzeitig analysierte Funktionen und Klassen
+PDF_EXTRACT_WORKERS = min(4, os.cpu_count() or 1)  # Prozesse für die PDF-Textextraktion
+PDF_EXTRACT_BATCH_PAGES = 25  # Seiten pro Auftrag an einen Extraktionsprozess
+PDF_PARALLEL_MIN_PAGES = 50  # Ab so vielen Seiten wird parallel extrahiert
+TRANSCRIPTION_BACKEND = os.getenv('TRANSCRIPTION_BACKEND', 'openai')  # Spracherkennung: openai, local (Whisper über ModelPipeline) oder auto
+OPENAI_TRANSCRIPTION_MODEL = "whisper-1"  # Modell der gehosteten Transkription
+WHISPER_SAMPLING_RATE = 16000  # Abtastrate, die Whisper erwartet
+WHISPER_CHUNK_LENGTH_S = 30  # Abschnittslänge der lokalen Pipeline für lange Aufnahmen
+WHISPER_IDLE_UNLOAD_S = float(os.getenv('WHISPER_IDLE_UNLOAD_S', '600'))  # Sekunden ohne Nutzung, bis das lokale Whisper-Modell entladen wird (0 = nie)
+ASR_BATCH_MAX_SIZE = int(os.getenv('ASR_BATCH_MAX_SIZE', '8'))  # Höchstzahl gebündelter Transkriptionsaufträge (1 = kein Bündeln)
+ASR_BATCH_MAX_WAIT_MS = 20  # Wie lange auf weitere Aufträge für einen Batch gewartet wird
+WHISPER_QUANTIZE = os.getenv('WHISPER_QUANTIZE', '0') == '1'  # Lokales Whisper auf der CPU mit int8-quantisierten Linear-Schichten ausführen
+WHISPER_CPU_THREADS = int(os.getenv('WHISPER_CPU_THREADS', str(max(1, (os.cpu_count() or 2) // 2))))  # Intra-op-Threads für Whisper auf der CPU (Standard: etwa die physischen Kerne)
+WHISPER_QUANTIZED_DIR = os.path.join(SAVE_DIR, "whisper_int8")  # Ablage der quantisierten Gewichte
+AUDIO_UPLOAD_FORMATS = (".flac", ".m4a", ".mp3", ".mp4", ".mpeg", ".mpga", ".oga", ".ogg", ".wav", ".webm")  # Von der OpenAI-Transkription akzeptierte Formate
+AUDIO_UPLOAD_MAX_BYTES = 25 * 1024 * 1024  # Maximale Dateigröße der OpenAI-Transkription
+AUDIO_UPLOAD_BITRATE = "32k"  # MP3-Bitrate für umgewandelte Sprachaufnahmen (16 kHz mono)
+LONG_AUDIO_CHUNK_S = 120  # Angestrebte Länge der Abschnitte langer Aufnahmen in Sekunden
+LONG_AUDIO_SEARCH_S = 15  # Bereich vor jeder Abschnittsgrenze, in dem nach einer Pause gesucht wird
+LONG_AUDIO_WORKERS = int(os.getenv('LONG_AUDIO_WORKERS', '4'))  # Gleichzeitig transkribierte Abschnitte (OpenAI-Backend)
+TRANSCRIPTION_CACHE_DIR = os.path.join(SAVE_DIR, "transcription_cache")  # Cache für Transkripte, Schlüssel ist der Hash des dekodierten Audios
+TRANSCRIPTION_CACHE_MAX_MB = int(os.getenv('TRANSCRIPTION_CACHE_MAX_MB', '64'))  # Maximale Größe des Transkript-Caches
+TTS_LANGUAGE = 'de'  # Sprache der Sprachausgabe
+TTS_ENGINE = os.getenv('TTS_ENGINE', 'gtts')  # Sprachausgabe: gtts (online) oder pyttsx3 (offline)
+TTS_PREFETCH_SENTENCES = 2  # Sätze, die während der Wiedergabe im Voraus synthetisiert werden
+TTS_MIN_SENTENCE_CHARS = 24  # Kürzere Satzteile werden mit dem nächsten verbunden
+TTS_PHRASE_CACHE_MAX_MB = int(os.getenv('TTS_PHRASE_CACHE_MAX_MB', '32'))  # Maximale Größe des Caches für synthetisierte Sätze
+TTS_GTTS_SLOW_WPM = 120  # Unter dieser Geschwindigkeit (Wörter pro Minute) spricht gTTS langsam
+TTS_QUEUE_MAX_PENDING = int(os.getenv('TTS_QUEUE_MAX_PENDING', '3'))  # Höchstzahl wartender Sprachausgaben; bei Überlauf wird die älteste verworfen
 
 # --- Standardkonfigurationen ---
 DEFAULT_CONFIG = {
@@ -0,0 +1,346 @@
+import hashlib
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+from config import DIFF_CACHE_SIZE, DIFF_CONTEXT_LINES, DIFF_PAGE_LINES, DIFF_MAX_EDIT_COST
+import logging
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+Opcode = Tuple[str, int, int, int, int]
+
+def _intern_lines(lines1: Sequence[str], lines2: Sequence[str]) -> Tuple[List[int], List[int]]:
+    """
+    Ersetzt jede Zeile durch eine Ganzzahl, sodass gleiche Zeilen gleiche Zahlen erhalten.
+    """
+    table: Dict[str, int] = {}
+    setdefault = table.setdefault
+    ids1 = [setdefault(line, len(table)) for line in lines1]
+    ids2 = [setdefault(line, len(table)) for line in lines2]
+    return ids1, ids2
+
+def _longest_increasing_subsequence(pairs: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Wählt aus nach der ersten Koordinate sortierten Paaren die längste Folge, die auch in der
+    zweiten Koordinate aufsteigt (Patience-Sorting).
+    """
+    tails: List[int] = []
+    tail_index: List[int] = []
+    previous: List[int] = [-1] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        pos = bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_index.append(index)
+        else:
+            tails[pos] = j
+            tail_index[pos] = index
+        previous[index] = tail_index[pos - 1] if pos else -1
+    result = []
+    index = tail_index[-1] if tail_index else -1
+    while index >= 0:
+        result.append(pairs[index])
+        index = previous[index]
+    result.reverse()
+    return result
+
+def _myers_matches(a: List[int], alo: int, ahi: int, b: List[int], blo: int, bhi: int, max_cost: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Berechnet mit dem Myers-Algorithmus die übereinstimmenden Positionen eines Bereichs.
+
+    Returns:
+        Optional[List[Tuple[int, int]]]: Die übereinstimmenden Positionen oder None, wenn mehr
+        als `max_cost` Änderungen nötig wären.
+    """
+    n, m = ahi - alo, bhi - blo
+    v: Dict[int, int] = {1: 0}
+    trace: List[Dict[int, int]] = []
+    for d in range(min(n + m, max_cost) + 1):
+        trace.append(dict(v))
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v.get(k - 1, -1) < v.get(k + 1, -1)):
+                x = v.get(k + 1, 0)
+            else:
+                x = v.get(k - 1, 0) + 1
+            y = x - k
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            v[k] = x
+            if x >= n and y >= m:
+                return _myers_backtrack(trace, n, m, alo, blo)
+    return None
+
+def _myers_backtrack(trace: List[Dict[int, int]], n: int, m: int, alo: int, blo: int) -> List[Tuple[int, int]]:
+    matches = []
+    x, y = n, m
+    for d in range(len(trace) - 1, -1, -1):
+        v = trace[d]
+        k = x - y
+        if k == -d or (k != d and v.get(k - 1, -1) < v.get(k + 1, -1)):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = v.get(prev_k, 0)
+        prev_y = prev_x - prev_k
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            matches.append((alo + x, blo + y))
+        x, y = prev_x, prev_y
+    return matches
+
+def matching_pairs(a: List[int], b: List[int], max_cost: int = DIFF_MAX_EDIT_COST) -> List[Tuple[int, int]]:
+    """
+    Berechnet die übereinstimmenden Zeilenpaare zweier Folgen mit dem Patience-Verfahren.
+
+    Zeilen, die in beiden Bereichen genau einmal vorkommen, dienen als Anker. Zwischen den
+    Ankern wird rekursiv weitergesucht. Bereiche ohne eindeutige Zeilen werden mit Myers
+    verglichen; übersteigt der Aufwand `max_cost` Änderungen, gilt der Bereich als ersetzt.
+
+    Args:
+        a (List[int]): Die Zeilen-IDs des ersten Dokuments.
+        b (List[int]): Die Zeilen-IDs des zweiten Dokuments.
+        max_cost (int): Maximale Anzahl von Änderungen für Myers in einem Bereich.
+
+    Returns:
+        List[Tuple[int, int]]: Die übereinstimmenden Positionen, aufsteigend sortiert.
+    """
+    pairs: List[Tuple[int, int]] = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            pairs.append((alo, blo))
+            alo += 1
+            blo += 1
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+            pairs.append((ahi, bhi))
+        if alo == ahi or blo == bhi:
+            continue
+
+        first_a: Dict[int, int] = {}
+        for i in range(alo, ahi):
+            first_a[a[i]] = -1 if a[i] in first_a else i
+        first_b: Dict[int, int] = {}
+        for j in range(blo, bhi):
+            first_b[b[j]] = -1 if b[j] in first_b else j
+        candidates = sorted((i, first_b[line]) for line, i in first_a.items()
+                            if i >= 0 and first_b.get(line, -1) >= 0)
+        anchors = _longest_increasing_subsequence(candidates)
+
+        if not anchors:
+            matches = _myers_matches(a, alo, ahi, b, blo, bhi, max_cost)
+            if matches:
+                pairs.extend(matches)
+            continue
+
+        pairs.extend(anchors)
+        prev_a, prev_b = alo, blo
+        for i, j in anchors:
+            stack.append((prev_a, i, prev_b, j))
+            prev_a, prev_b = i + 1, j + 1
+        stack.append((prev_a, ahi, prev_b, bhi))
+    pairs.sort()
+    return pairs
+
+def get_opcodes(a: List[int], b: List[int], max_cost: int = DIFF_MAX_EDIT_COST) -> List[Opcode]:
+    """
+    Berechnet die Opcodes im Format von `difflib.SequenceMatcher.get_opcodes`.
+
+    Args:
+        a (List[int]): Die Zeilen-IDs des ersten Dokuments.
+        b (List[int]): Die Zeilen-IDs des zweiten Dokuments.
+        max_cost (int): Maximale Anzahl von Änderungen für Myers in einem Bereich.
+
+    Returns:
+        List[Opcode]: Tupel aus Tag (`equal`, `replace`, `delete`, `insert`) und Bereichsgrenzen.
+    """
+    opcodes: List[Opcode] = []
+    i = j = 0
+    pairs = matching_pairs(a, b, max_cost)
+    pairs.append((len(a), len(b)))
+    index = 0
+    while index < len(pairs):
+        ai, bj = pairs[index]
+        if i < ai and j < bj:
+            opcodes.append(("replace", i, ai, j, bj))
+        elif i < ai:
+            opcodes.append(("delete", i, ai, j, bj))
+        elif j < bj:
+            opcodes.append(("insert", i, ai, j, bj))
+        run = 0
+        while index + run < len(pairs) - 1 and pairs[index + run] == (ai + run, bj + run):
+            run += 1
+        if run:
+            opcodes.append(("equal", ai, ai + run, bj, bj + run))
+        i, j = ai + run, bj + run
+        index += max(run, 1)
+    return opcodes
+
+def group_opcodes(opcodes: List[Opcode], context: int = DIFF_CONTEXT_LINES) -> List[List[Opcode]]:
+    """
+    Fasst Opcodes zu Hunks mit `context` Zeilen Kontext zusammen, wie
+    `difflib.SequenceMatcher.get_grouped_opcodes`.
+    """
+    codes = list(opcodes) or [("equal", 0, 1, 0, 1)]
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)
+    groups: List[List[Opcode]] = []
+    group: List[Opcode] = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == "equal" and i2 - i1 > context * 2:
+            group.append((tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)))
+            groups.append(group)
+            group = []
+            i1, j1 = max(i1, i2 - context), max(j1, j2 - context)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        groups.append(group)
+    return groups
+
+def _format_range(start: int, stop: int) -> str:
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+class DiffResult:
+    """
+    Ergebnis eines Dokumentvergleichs als Liste von Unified-Diff-Hunks.
+
+    Attributes:
+        header (List[str]): Die Kopfzeilen (`---`/`+++`).
+        hunks (List[List[str]]): Die Zeilen jedes Hunks inklusive `@@`-Zeile.
+        added (int): Anzahl hinzugefügter Zeilen.
+        removed (int): Anzahl entfernter Zeilen.
+    """
+
+    def __init__(self, header: List[str], hunks: List[List[str]], added: int, removed: int):
+        self.header = header
+        self.hunks = hunks
+        self.added = added
+        self.removed = removed
+
+    def pages(self, page_lines: int = DIFF_PAGE_LINES) -> List[List[str]]:
+        """
+        Teilt die Hunks in Seiten mit höchstens `page_lines` Zeilen auf.
+
+        Hunks werden nur dann zerteilt, wenn ein einzelner Hunk länger als eine Seite ist.
+
+        Args:
+            page_lines (int): Maximale Zeilenanzahl pro Seite.
+
+        Returns:
+            List[List[str]]: Die Zeilen jeder Seite.
+        """
+        pages: List[List[str]] = []
+        page: List[str] = []
+        for hunk in self.hunks:
+            if page and len(page) + len(hunk) > page_lines:
+                pages.append(page)
+                page = []
+            for start in range(0, len(hunk), page_lines):
+                part = hunk[start:start + page_lines]
+                if page and len(page) + len(part) > page_lines:
+                    pages.append(page)
+                    page = []
+                page.extend(part)
+        if page:
+            pages.append(page)
+        return pages
+
+    def text(self) -> str:
+        """
+        Gibt den vollständigen Unified Diff zurück.
+        """
+        if not self.hunks:
+            return ""
+        return "\n".join(self.header + [line for hunk in self.hunks for line in hunk])
+
+class DiffEngine:
+    """
+    Klasse für schnelle, zwischengespeicherte Dokumentvergleiche.
+
+    Zeilen werden vor dem Vergleich auf Ganzzahlen abgebildet und mit dem Patience-Verfahren
+    (Myers für Bereiche ohne eindeutige Zeilen) verglichen. Ergebnisse werden nach den
+    SHA-256-Hashes beider Inhalte in einem LRU-Cache gehalten, sodass ein erneuter Vergleich
+    oder das Blättern durch die Seiten keinen neuen Diff berechnet.
+    """
+
+    def __init__(self, cache_size: int = DIFF_CACHE_SIZE, context: int = DIFF_CONTEXT_LINES):
+        """
+        Initialisiert die DiffEngine.
+
+        Args:
+            cache_size (int): Anzahl der zwischengespeicherten Vergleiche.
+            context (int): Anzahl der Kontextzeilen pro Hunk.
+        """
+        self.cache_size = cache_size
+        self.context = context
+        self._cache: "OrderedDict[Tuple[str, str, str, str], DiffResult]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def diff(self, content1: str, content2: str, fromfile: str = "File1", tofile: str = "File2") -> DiffResult:
+        """
+        Vergleicht zwei Texte zeilenweise.
+
+        Args:
+            content1 (str): Der erste Text.
+            content2 (str): Der zweite Text.
+            fromfile (str): Der Name des ersten Dokuments in der Kopfzeile.
+            tofile (str): Der Name des zweiten Dokuments in der Kopfzeile.
+
+        Returns:
+            DiffResult: Das (ggf. zwischengespeicherte) Ergebnis.
+        """
+        key = (
+            hashlib.sha256(content1.encode("utf-8")).hexdigest(),
+            hashlib.sha256(content2.encode("utf-8")).hexdigest(),
+            fromfile,
+            tofile,
+        )
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        result = self._compute(content1.splitlines(), content2.splitlines(), fromfile, tofile)
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def _compute(self, lines1: List[str], lines2: List[str], fromfile: str, tofile: str) -> DiffResult:
+        ids1, ids2 = _intern_lines(lines1, lines2)
+        hunks: List[List[str]] = []
+        added = removed = 0
+        for group in group_opcodes(get_opcodes(ids1, ids2), self.context):
+            first, last = group[0], group[-1]
+            hunk = [f"@@ -{_format_range(first[1], last[2])} +{_format_range(first[3], last[4])} @@"]
+            for tag, i1, i2, j1, j2 in group:
+                if tag == "equal":
+                    hunk.extend(" " + line for line in lines1[i1:i2])
+                    continue
+                if tag in ("replace", "delete"):
+                    hunk.extend("-" + line for line in lines1[i1:i2])
+                    removed += i2 - i1
+                if tag in ("replace", "insert"):
+                    hunk.extend("+" + line for line in lines2[j1:j2])
+                    added += j2 - j1
+            hunks.append(hunk)
+        return DiffResult([f"--- {fromfile}", f"+++ {tofile}"], hunks, added, removed)
+
+diff_engine = DiffEngine()
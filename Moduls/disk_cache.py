@@ -0,0 +1,157 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+import logging
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+class DiskCache:
+    """
+    Klasse für einen größenbegrenzten Schlüssel-Wert-Speicher auf der Festplatte.
+
+    Jeder Eintrag liegt in einer eigenen Datei, deren Name aus dem SHA-256 des Schlüssels
+    gebildet wird. Die Änderungszeit einer Datei dient als Zeitpunkt der letzten Nutzung:
+    Lesezugriffe aktualisieren sie, und überschreitet der Cache `max_bytes`, werden die am
+    längsten nicht benutzten Einträge gelöscht. Geschrieben wird über eine temporäre Datei
+    und `os.replace`, sodass parallele Leser nie einen halben Eintrag sehen.
+
+    Attributes:
+        directory (str): Das Verzeichnis des Caches.
+        max_bytes (int): Die maximale Gesamtgröße aller Einträge in Bytes.
+        hits (int): Anzahl der Treffer seit dem Start.
+        misses (int): Anzahl der Fehlversuche seit dem Start.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Initialisiert den DiskCache und liest die vorhandenen Einträge ein.
+
+        Args:
+            directory (str): Das Verzeichnis des Caches.
+            max_bytes (int): Die maximale Gesamtgröße aller Einträge in Bytes.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._sizes: Dict[str, int] = {}
+        self._total = 0
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.endswith(".tmp"):
+                self._remove_file(path)
+            elif os.path.isfile(path):
+                self._sizes[name] = os.path.getsize(path)
+                self._total += self._sizes[name]
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Liest einen Eintrag und markiert ihn als zuletzt benutzt.
+
+        Args:
+            key (str): Der Schlüssel.
+
+        Returns:
+            Optional[bytes]: Der gespeicherte Wert oder None.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """
+        Speichert einen Eintrag und entfernt bei Bedarf die ältesten Einträge.
+
+        Einträge, die allein größer als `max_bytes` sind, werden nicht gespeichert.
+
+        Args:
+            key (str): Der Schlüssel.
+            data (bytes): Der Wert.
+        """
+        if len(data) > self.max_bytes:
+            logger.info(f"Cache-Eintrag mit {len(data)} Bytes übersteigt das Limit von {self.max_bytes} Bytes und wird nicht gespeichert")
+            return
+        name = self._name(key)
+        path = os.path.join(self.directory, name)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Fehler beim Schreiben in den Cache {self.directory}: {e}")
+            return
+        with self._lock:
+            self._total += len(data) - self._sizes.get(name, 0)
+            self._sizes[name] = len(data)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def delete(self, key: str) -> None:
+        """
+        Entfernt einen Eintrag.
+
+        Args:
+            key (str): Der Schlüssel.
+        """
+        name = self._name(key)
+        with self._lock:
+            self._total -= self._sizes.pop(name, 0)
+        self._remove_file(os.path.join(self.directory, name))
+
+    def size(self) -> int:
+        """
+        Gibt die Gesamtgröße aller Einträge zurück.
+
+        Returns:
+            int: Die Größe in Bytes.
+        """
+        with self._lock:
+            return self._total
+
+    def _evict(self) -> None:
+        entries = []
+        for name in self._sizes:
+            try:
+                entries.append((os.path.getmtime(os.path.join(self.directory, name)), name))
+            except OSError:
+                entries.append((0.0, name))
+        entries.sort()
+        start = time.perf_counter()
+        removed = 0
+        for _, name in entries:
+            if self._total <= self.max_bytes:
+                break
+            self._total -= self._sizes.pop(name)
+            self._remove_file(os.path.join(self.directory, name))
+            removed += 1
+        logger.debug(f"{removed} Einträge aus dem Cache {self.directory} entfernt ({(time.perf_counter() - start) * 1000:.1f} ms)")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, self._name(key))
+
+    @staticmethod
+    def _name(key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
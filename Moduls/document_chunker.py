@@ -0,0 +1,123 @@
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Generator, List, Sequence, Tuple
+from config import OLLAMA_CHARS_PER_TOKEN
+import logging
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Trennstellen in absteigender Priorität: Absätze, Zeilen, Sätze, Wörter.
+_SEPARATORS = [re.compile(r"\n\s*\n"), re.compile(r"\n"), re.compile(r"(?<=[.!?])\s+"), re.compile(r"\s+")]
+
+def estimate_tokens(text: str) -> int:
+    """
+    Schätzt die Anzahl der Token eines Textes.
+
+    Ollama bietet keinen Tokenizer-Endpunkt; die Schätzung über die Zeichenanzahl liegt für
+    deutsche und englische Texte nahe genug an den tatsächlichen Werten, um Kontextgrenzen
+    einzuhalten.
+
+    Args:
+        text (str): Der Text.
+
+    Returns:
+        int: Die geschätzte Tokenanzahl.
+    """
+    return -(-len(text) // OLLAMA_CHARS_PER_TOKEN)
+
+def split_into_chunks(text: str, max_tokens: int) -> List[str]:
+    """
+    Teilt einen Text in Abschnitte mit höchstens `max_tokens` geschätzten Token.
+
+    Es wird bevorzugt an Absätzen getrennt, dann an Zeilen, Sätzen und Wörtern. Nur ein
+    einzelnes Wort, das allein das Budget übersteigt, wird hart zerteilt.
+
+    Args:
+        text (str): Der Text.
+        max_tokens (int): Das Tokenbudget pro Abschnitt.
+
+    Returns:
+        List[str]: Die Abschnitte in Dokumentreihenfolge.
+    """
+    max_chars = max(1, max_tokens * OLLAMA_CHARS_PER_TOKEN)
+    return [chunk for chunk in _split(text.strip(), max_chars, 0) if chunk.strip()]
+
+def _split(text: str, max_chars: int, level: int) -> List[str]:
+    if len(text) <= max_chars:
+        return [text]
+    if level == len(_SEPARATORS):
+        return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+    separator = _SEPARATORS[level]
+    chunks: List[str] = []
+    current: List[str] = []
+    current_len = 0
+    joiner = "\n\n" if level == 0 else "\n" if level == 1 else " "
+    for piece in separator.split(text):
+        if not piece:
+            continue
+        if len(piece) > max_chars:
+            if current:
+                chunks.append(joiner.join(current))
+                current, current_len = [], 0
+            chunks.extend(_split(piece, max_chars, level + 1))
+            continue
+        added = len(piece) + (len(joiner) if current else 0)
+        if current and current_len + added > max_chars:
+            chunks.append(joiner.join(current))
+            current, current_len = [], 0
+            added = len(piece)
+        current.append(piece)
+        current_len += added
+    if current:
+        chunks.append(joiner.join(current))
+    return chunks
+
+def group_by_budget(texts: Sequence[str], max_tokens: int, separator: str = "\n\n") -> List[List[str]]:
+    """
+    Fasst aufeinanderfolgende Texte zu Gruppen zusammen, die das Tokenbudget nicht überschreiten.
+
+    Ein einzelner Text, der allein das Budget übersteigt, bildet eine eigene Gruppe.
+
+    Args:
+        texts (Sequence[str]): Die Texte, z.B. Teilantworten.
+        max_tokens (int): Das Tokenbudget pro Gruppe.
+        separator (str): Das Trennzeichen, mit dem die Texte später verbunden werden.
+
+    Returns:
+        List[List[str]]: Die Gruppen in der ursprünglichen Reihenfolge.
+    """
+    groups: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+    for text in texts:
+        tokens = estimate_tokens(text + separator)
+        if current and current_tokens + tokens > max_tokens:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+def map_concurrently(func: Callable[[str], str], prompts: Sequence[str], workers: int) -> Generator[Tuple[int, str], None, None]:
+    """
+    Wendet `func` mit einem begrenzten Thread-Pool auf alle Prompts an.
+
+    Args:
+        func (Callable[[str], str]): Die Funktion, z.B. eine Modellanfrage.
+        prompts (Sequence[str]): Die Prompts.
+        workers (int): Die Anzahl gleichzeitiger Anfragen.
+
+    Yields:
+        Tuple[int, str]: Index des Prompts und Ergebnis, in der Reihenfolge der Fertigstellung.
+        Schlägt eine Anfrage fehl, wird die Ausnahme beim Abholen dieses Ergebnisses ausgelöst.
+    """
+    pool = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="ollama-chunk")
+    try:
+        futures = {pool.submit(func, prompt): index for index, prompt in enumerate(prompts)}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
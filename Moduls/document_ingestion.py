@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import time
+from typing import Any, Generator, List, Union
+from disk_cache import DiskCache
+from pdf_extraction import iter_pdf_pages
+from config import DOCUMENT_CACHE_DIR, DOCUMENT_CACHE_MAX_MB
+import logging
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+TEXT_EXTENSIONS = (".txt", ".py", ".cpp", ".h", ".c", ".java", ".js", ".cs", ".go", ".html", ".css", ".md", ".json", ".xml", ".yaml", ".sh")
+PDF_EXTENSIONS = (".pdf",)
+
+# Wird erhöht, wenn sich die Extraktion ändert, damit alte Cache-Einträge nicht mehr passen.
+EXTRACTOR_VERSION = "pdf-2"
+
+class DocumentIngestion:
+    """
+    Klasse zum Einlesen hochgeladener Dokumente.
+
+    Textdateien werden direkt gelesen. Der aus PDF-Dateien extrahierte Text wird seitenweise
+    unter dem SHA-256 der Dateibytes im `DiskCache` abgelegt, sodass dieselbe Datei bei
+    erneutem Hochladen, unabhängig von Dateiname und Upload-Pfad, nicht noch einmal extrahiert
+    wird.
+
+    Attributes:
+        cache (DiskCache): Der Cache für extrahierte Texte.
+    """
+
+    def __init__(self, cache: DiskCache):
+        """
+        Initialisiert die DocumentIngestion.
+
+        Args:
+            cache (DiskCache): Der Cache für extrahierte Texte.
+        """
+        self.cache = cache
+
+    def extract_text(self, file: Union[str, Any]) -> str:
+        """
+        Gibt den Textinhalt einer hochgeladenen Datei zurück.
+
+        Args:
+            file (Union[str, Any]): Der Dateipfad oder ein Objekt mit dem Pfad in `name`
+                (z.B. eine Gradio-Datei).
+
+        Returns:
+            str: Der Inhalt der Datei.
+
+        Raises:
+            ValueError: Wenn der Dateityp nicht unterstützt wird oder das Lesen fehlschlägt.
+        """
+        path = file if isinstance(file, str) else file.name
+        name = path.lower()
+        if name.endswith(TEXT_EXTENSIONS):
+            return self._read_text_file(path)
+        if name.endswith(PDF_EXTENSIONS):
+            return "".join(self.iter_pdf_pages(path))
+        raise ValueError("Nur TXT-, PDF- und andere textbasierte Dateien werden unterstützt.")
+
+    def iter_pdf_pages(self, file: Union[str, Any]) -> Generator[str, None, None]:
+        """
+        Liefert den Text einer PDF-Datei Seite für Seite.
+
+        Liegt die Datei noch nicht im Cache, werden die Seiten ausgegeben, sobald sie extrahiert
+        sind, und nach der letzten Seite gemeinsam gespeichert.
+
+        Args:
+            file (Union[str, Any]): Der Dateipfad oder ein Objekt mit dem Pfad in `name`.
+
+        Yields:
+            str: Der Text einer Seite.
+
+        Raises:
+            ValueError: Wenn das Lesen der PDF-Datei fehlschlägt.
+        """
+        path = file if isinstance(file, str) else file.name
+        start = time.perf_counter()
+        try:
+            key = f"{EXTRACTOR_VERSION}:{file_sha256(path)}"
+        except OSError as e:
+            logger.error(f"Fehler beim Lesen der PDF-Datei: {e}")
+            raise ValueError(f"Fehler beim Lesen der PDF-Datei: {e}")
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.info(f"Text von {os.path.basename(path)} aus dem Cache geladen ({(time.perf_counter() - start) * 1000:.1f} ms)")
+            yield from json.loads(cached)
+            return
+
+        pages: List[str] = []
+        try:
+            for page in iter_pdf_pages(path):
+                pages.append(page)
+                yield page
+        except Exception as e:
+            logger.error(f"Fehler beim Lesen der PDF-Datei: {e}")
+            raise ValueError(f"Fehler beim Lesen der PDF-Datei: {e}")
+        self.cache.put(key, json.dumps(pages).encode("utf-8"))
+        logger.info(f"Text von {os.path.basename(path)} extrahiert ({len(pages)} Seiten, {time.perf_counter() - start:.2f}s)")
+
+    def _read_text_file(self, path: str) -> str:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except Exception as e:
+            logger.error(f"Fehler beim Lesen der Datei: {e}")
+            raise ValueError(f"Fehler beim Lesen der Datei: {e}")
+
+def file_sha256(path: str, block_size: int = 1024 * 1024) -> str:
+    """
+    Berechnet den SHA-256 einer Datei blockweise.
+
+    Args:
+        path (str): Der Dateipfad.
+        block_size (int): Die Größe der gelesenen Blöcke in Bytes.
+
+    Returns:
+        str: Der Hash als Hexadezimalzeichenkette.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+document_ingestion = DocumentIngestion(DiskCache(DOCUMENT_CACHE_DIR, DOCUMENT_CACHE_MAX_MB * 1024 * 1024))
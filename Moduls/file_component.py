@@ -1,5 +1,5 @@
 import gradio as gr
-from PyPDF2 import PdfReader
+from document_ingestion import document_ingestion
 import logging
 
 # Logger einrichten
@@ -29,37 +29,8 @@ class FComponent:
         return all(file_type in self.get_config()["file_types"] for file_type in file_types)
 
     def preprocess(self, file):
-        """Verarbeitung der hochgeladenen Datei."""
-        if file.name.endswith(".txt"):
-            return self._read_text_file(file.name)
-        elif file.name.endswith(".pdf"):
-            return self._read_pdf_file(file.name)
-        elif file.name.endswith((".py", ".cpp", ".h", ".c", ".java", ".js", ".cs", ".go",
-                                ".html", ".css", ".md", ".json", ".xml", ".yaml", ".sh")):
-            return self._read_text_file(file.name)
-        else:
-            raise ValueError("Nur TXT-, PDF- und andere textbasierte Dateien werden unterstützt.")
-
-    def _read_text_file(self, filename):
-        """Liest eine Textdatei und gibt den Inhalt zurück."""
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                return f.read()
-        except Exception as e:
-            logger.error(f"Fehler beim Lesen der Datei: {e}")
-            raise ValueError(f"Fehler beim Lesen der Datei: {e}")
-
-    def _read_pdf_file(self, filename):
-        """Liest eine PDF-Datei und extrahiert Text."""
-        try:
-            reader = PdfReader(filename)
-            content = ""
-            for page in reader.pages:
-                content += page.extract_text() or ""
-            return content
-        except Exception as e:
-            logger.error(f"Fehler beim Lesen der PDF-Datei: {e}")
-            raise ValueError(f"Fehler beim Lesen der PDF-Datei: {e}")
+        """Verarbeitung der hochgeladenen Datei über die gemeinsame `document_ingestion`."""
+        return document_ingestion.extract_text(file)
 
     def postprocess(self, file):
         """Hier könnten zusätzliche Verarbeitungsschritte hinzugefügt werden."""
@@ -4,9 +4,12 @@ from fpdf import FPDF
 from pptx import Presentation
 import csv
 from api_client import api_client
-from config import MISTRAL_CHAT_MODEL, DEFAULT_OLLAMA_MODEL
+from config import MISTRAL_CHAT_MODEL, DEFAULT_OLLAMA_MODEL, OLLAMA_USE_HTTP
+from ollama_client import ollama_client
+from response_cache import response_cache
+from ansi_stripper import strip_ansi
+import requests
 import subprocess
-import re
 import os
 import logging
 
@@ -31,6 +34,10 @@ class FileCreator:
         """
         Generiert den Inhalt basierend auf dem ausgewählten Modell.
 
+        Die Antwort wird im `response_cache` gespeichert, sodass derselbe Prompt an dasselbe Modell
+        nicht erneut generiert wird. Das Modell sampelt mit seiner voreingestellten Temperatur; für
+        eine Datei genügt aber eine frühere Antwort auf denselben Inhalt.
+
         Args:
             model_name (str): Der Name des ausgewählten Modells.
             user_prompt (str): Der Benutzerprompt zur Generierung des Inhalts.
@@ -43,32 +50,55 @@ class FileCreator:
         """
         try:
             if model_name == "Mistral":
-                response = api_client.mistral_client.chat.complete(
-                    model=MISTRAL_CHAT_MODEL,
-                    messages=[{"role": "user", "content": user_prompt}]
-                )
-                return response.choices[0].message.content.strip()
+                def generate() -> str:
+                    response = api_client.mistral_client.chat.complete(
+                        model=MISTRAL_CHAT_MODEL,
+                        messages=[{"role": "user", "content": user_prompt}]
+                    )
+                    return response.choices[0].message.content.strip()
+                return response_cache.cached("mistral", MISTRAL_CHAT_MODEL, user_prompt, generate, cache_sampled=True)
             elif model_name == "Gemini":
-                response = api_client.gemini_model.generate_content([user_prompt])
-                return response.text.strip()
+                model = api_client.gemini_model
+                return response_cache.cached("gemini", model.model_name, user_prompt,
+                                             lambda: model.generate_content([user_prompt]).text.strip(), cache_sampled=True)
             elif model_name == "Ollama":
-                process = subprocess.Popen(
-                    ["ollama", "run", DEFAULT_OLLAMA_MODEL],
-                    stdin=subprocess.PIPE,
-                    stdout=subprocess.PIPE,
-                    text=True
-                )
-                process.stdin.write(user_prompt + "\n")
-                process.stdin.close()
-                output = process.stdout.read()
-                process.stdout.close()
-                return self.clean_output(output).strip()
+                return response_cache.cached("ollama", DEFAULT_OLLAMA_MODEL, user_prompt,
+                                             lambda: self._generate_with_ollama(user_prompt).strip(), cache_sampled=True)
             else:
                 return "Modell nicht verfügbar oder unbekannt."
         except Exception as e:
             logger.error(f"Fehler beim Generieren des Inhalts: {e}")
             raise
 
+    def _generate_with_ollama(self, user_prompt: str) -> str:
+        """
+        Generiert den Inhalt mit dem Standard-Ollama-Modell.
+
+        Bevorzugt wird die HTTP-API des Daemons, `ollama run` dient als Fallback.
+
+        Args:
+            user_prompt (str): Der Benutzerprompt zur Generierung des Inhalts.
+
+        Returns:
+            str: Der generierte Inhalt.
+        """
+        if OLLAMA_USE_HTTP:
+            try:
+                return ollama_client.generate(DEFAULT_OLLAMA_MODEL, user_prompt)
+            except requests.exceptions.ConnectionError as e:
+                logger.warning(f"Ollama-Daemon nicht erreichbar, verwende `ollama run`: {e}")
+        process = subprocess.Popen(
+            ["ollama", "run", DEFAULT_OLLAMA_MODEL],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True
+        )
+        process.stdin.write(user_prompt + "\n")
+        process.stdin.close()
+        output = process.stdout.read()
+        process.stdout.close()
+        return self.clean_output(output)
+
     def clean_output(self, output: str) -> str:
         """
         Entfernt Steuerzeichen aus der Ollama-Ausgabe.
@@ -79,12 +109,7 @@ class FileCreator:
         Returns:
             str: Die bereinigte Ausgabe.
         """
-        cleaned_output = re.sub(r'(?:\x1B[@-_]|[\x1B\x9B][0-?]*[ -/]*[@-~])', '', output)
-        cleaned_output = re.sub(r'\?\d+[lh]', '', cleaned_output)
-        cleaned_output = re.sub(r'[\u2800-\u28FF]', '', cleaned_output)
-        cleaned_output = re.sub(r'\r', '', cleaned_output)
-        cleaned_output = re.sub(r'2K1G ?(?:2K1G)*!?', '', cleaned_output)
-        return cleaned_output
+        return strip_ansi(output)
 
     def create_excel_with_ai(self, user_prompt: str, sheets: int = 1) -> str:
         """
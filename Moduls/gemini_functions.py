@@ -1,9 +1,6 @@
-import asyncio
 import logging
-import os
-from functools import lru_cache
-from typing import List, Tuple, Optional, Generator
-import google.generativeai as genai
+import time
+from typing import Any, Iterable, List, Tuple, Optional, Generator
 from PIL import Image
 from pygments import highlight
 from pygments.formatters import HtmlFormatter
@@ -11,9 +8,13 @@ from pygments.lexers import PythonLexer
 from black import format_str, FileMode
 from helpers import format_chat_message  # Import der format_chat_message-Funktion
 from api_client import api_client
-from config import config
-from gtts import gTTS
-from playsound import playsound
+from cancellation import CancellationToken
+from gemini_sessions import gemini_sessions
+from gemini_uploads import gemini_uploads
+from response_cache import response_cache
+from code_analysis import IncrementalCodeAnalyzer
+from config import config, GEMINI_UI_UPDATE_INTERVAL
+from tts_queue import tts_queue
 from audio_processing import process_audio  # Import der process_audio-Funktion
 
 logging.basicConfig(level=logging.DEBUG)
@@ -21,41 +22,11 @@ logger = logging.getLogger(__name__)
 
 class GeminiFunctions:
     def __init__(self):
-        pass
-
-    def _speak_text(self, text: str, config: dict) -> None:
-        """
-        Konvertiert Text in Sprache und spielt diese ab.
-
-        Args:
-            text (str): Der zu sprechende Text.
-            config (dict): Die Konfiguration für TTS (Geschwindigkeit, Lautstärke, Stimme).
-        """
-        try:
-            tts = gTTS(text, lang='de')
-            temp_file = "temp_tts.mp3"
-            temp_file_path = os.path.join(os.path.dirname(__file__), temp_file)
-            tts.save(temp_file_path)
-            logger.debug(f"TTS Datei gespeichert: {temp_file_path}")
-
-            # Verwenden Sie playsound zum Abspielen der MP3-Datei
-            playsound(temp_file_path)
-
-            os.remove(temp_file_path)
-            logger.debug(f"Temporäre Datei gelöscht: {temp_file_path}")
-        except Exception as e:
-            logger.error(f"Error during TTS conversion: {e}")
-
-    async def _async_speak_text(self, text: str, config: dict):
-        """
-        Asynchrone Funktion zum Sprechen von Text.
-        """
-        loop = asyncio.get_running_loop()
-        await loop.run_in_executor(None, self._speak_text, text, config)
+        self.code_analyzer = IncrementalCodeAnalyzer(self._generate, lambda: api_client.gemini_model.model_name)
 
     def upload_to_gemini(self, image: Image.Image):
         """
-        Lädt ein Bild zur Gemini API hoch.
+        Lädt ein Bild zur Gemini API hoch oder verwendet die bereits hochgeladene Datei.
 
         Args:
             image (Image.Image): Das hochzuladende Bild.
@@ -67,12 +38,7 @@ class GeminiFunctions:
             Exception: Wenn das Hochladen des Bildes fehlschlägt.
         """
         try:
-            image_path = "temp_image.jpg"
-            image.save(image_path)
-            sample_file = genai.upload_file(path=image_path, display_name="Hochgeladenes Bild")
-            logger.info(f"Hochgeladene Datei '{sample_file.display_name}' as: {sample_file.uri}")
-            os.remove(image_path)
-            return sample_file
+            return gemini_uploads.upload(image)
         except Exception as e:
             logger.error(f"Fehler beim Hochladen des Bildes: {e}")
             raise
@@ -83,83 +49,161 @@ class GeminiFunctions:
         chat_history: List[Tuple[str, str]],
         image: Optional[Image.Image] = None,
         audio_file: Optional[str] = None,
-        enable_tts: bool = False  # Neues Argument hinzugefügt
-    ) -> Tuple[List[Tuple[str, str]], str]:
+        enable_tts: bool = False,  # Neues Argument hinzugefügt
+        cancel_token: Optional[CancellationToken] = None,
+        session_id: Optional[str] = None
+    ) -> Generator[Tuple[List[Tuple[str, str]], str], None, None]:
         """
-        Chattet mit dem Gemini-Modell.
+        Chattet mit dem Gemini-Modell und streamt die Antwort in den Chatverlauf.
+
+        Die Unterhaltung der Sitzung wird über `gemini_sessions` fortgesetzt, sodass das Modell
+        die vorherigen Runden kennt. Eine abgebrochene Runde wird nicht in den Verlauf übernommen.
 
         Args:
             user_input (str): Die Benutzereingabe.
             chat_history (List[Tuple[str, str]]): Der Chatverlauf.
             image (Optional[Image.Image]): Das hochzuladende Bild.
             audio_file (Optional[str]): Der Pfad zur Audiodatei.
-            enable_tts (bool): Aktiviert oder deaktiviert TTS.
-
-        Returns:
-            Tuple[List[Tuple[str, str]], str]: Der aktualisierte Chatverlauf und die Antwort.
+            enable_tts (bool): Aktiviert oder deaktiviert TTS. Die Antwort wird in die
+                `tts_queue` gestellt und im Hintergrund vorgelesen, ohne die Rückgabe zu verzögern.
+            cancel_token (Optional[CancellationToken]): Token, über den die Generierung abgebrochen
+                wird. Die Antwort wird gestreamt und zwischen zwei Teilen auf einen Abbruch geprüft.
+            session_id (Optional[str]): Die Sitzungs-ID der Unterhaltung, über die auch das Vorlesen
+                abgebrochen wird.
+
+        Yields:
+            Tuple[List[Tuple[str, str]], str]: Der fortlaufend aktualisierte Chatverlauf und der
+            neue Inhalt des Eingabefelds.
         """
         if not user_input.strip() and not audio_file:
-            return chat_history, "Bitte geben Sie eine Nachricht ein oder laden Sie eine Audiodatei hoch."
+            yield chat_history, "Bitte geben Sie eine Nachricht ein oder laden Sie eine Audiodatei hoch."
+            return
 
         if audio_file:
             try:
                 user_input = process_audio(audio_file)
             except Exception as e:
                 chat_history.append((None, f"Fehler bei der Verarbeitung der Audiodatei: {e}"))
-                return chat_history, ""
+                yield chat_history, ""
+                return
 
         chat_history.append((user_input, None))
+        yield chat_history, ""
 
-        history = [{"role": "user", "parts": [user_input]}]
+        parts = [user_input]
 
         if image:
             try:
-                sample_file = self.upload_to_gemini(image)
-                history[0]["parts"].append(sample_file)
+                parts.append(self.upload_to_gemini(image))
             except Exception as e:
                 chat_history.append((None, f"Fehler beim Hochladen des Bildes: {e}"))
-                return chat_history, ""
+                yield chat_history, ""
+                return
 
         try:
-            chat_session = api_client.gemini_model.start_chat(history=history)
-            response_text = chat_session.send_message(user_input).text
-            chat_history.append((None, format_chat_message(response_text)))
-
-            if enable_tts:
-                asyncio.run(self._async_speak_text(response_text, config))
+            with gemini_sessions.use(session_id, parts) as session:
+                start = time.perf_counter()
+                stream = session.chat.send_message(parts, stream=True)
+                response_text = ""
+                for response_text in self._stream_reply(stream, chat_history, start, cancel_token):
+                    yield chat_history, ""
+                if cancel_token is not None and cancel_token.cancelled:
+                    session.discard_turn()
+
+            if enable_tts and not (cancel_token is not None and cancel_token.cancelled):
+                tts_queue.submit(response_text, config, session_id)
 
         except Exception as e:
             chat_history.append((None, f"Fehler bei der Verarbeitung der Anfrage: {e}"))
-
-        return chat_history, ""
+            yield chat_history, ""
 
 
-    def analyze_image_gemini(self, image: Optional[Image.Image], chat_history: List[Tuple[str, str]], user_input: str, tts_enabled: bool) -> List[Tuple[str, str]]:
+    def analyze_image_gemini(
+        self,
+        image: Optional[Image.Image],
+        chat_history: List[Tuple[str, str]],
+        user_input: str,
+        tts_enabled: bool = False,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Generator[List[Tuple[str, str]], None, None]:
         """
-        Analysiert ein Bild mit Gemini.
+        Analysiert ein Bild mit Gemini und streamt die Beschreibung in den Chatverlauf.
 
         Args:
             image (Optional[Image.Image]): Das zu analysierende Bild.
             chat_history (List[Tuple[str, str]]): Der Chatverlauf.
             user_input (str): Die Benutzereingabe.
             tts_enabled (bool): Aktiviert oder deaktiviert TTS.
+            cancel_token (Optional[CancellationToken]): Token, über den die Generierung abgebrochen wird.
 
-        Returns:
-            List[Tuple[str, str]]: Der aktualisierte Chatverlauf.
+        Yields:
+            List[Tuple[str, str]]: Der fortlaufend aktualisierte Chatverlauf.
         """
         if image is None:
             chat_history.append((None, "Bitte laden Sie ein Bild hoch."))
-            return chat_history
+            yield chat_history
+            return
         try:
             sample_file = self.upload_to_gemini(image)
-            response = api_client.gemini_model.generate_content([f"{user_input} Beschreiben Sie das Bild mit einer kreativen Beschreibung. Bitte in Deutsch antworten.", sample_file])
-            response_text = response.text
-            chat_history.append((None, format_chat_message(response_text)))  # Entfernt `speak=config.get("enable_tts", False)`
+            start = time.perf_counter()
+            stream = api_client.gemini_model.generate_content(
+                [f"{user_input} Beschreiben Sie das Bild mit einer kreativen Beschreibung. Bitte in Deutsch antworten.", sample_file],
+                stream=True,
+            )
+            for _ in self._stream_reply(stream, chat_history, start, cancel_token):
+                yield chat_history
         except Exception as e:
             chat_history.append((None, f"Fehler bei der Bildanalyse: {e}"))
+            yield chat_history
+
+    def _stream_reply(
+        self,
+        stream: Iterable[Any],
+        chat_history: List[Tuple[str, str]],
+        start: float,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Generator[str, None, None]:
+        """
+        Schreibt eine gestreamte Antwort fortlaufend in den letzten Eintrag des Chatverlaufs.
+
+        Der Eintrag wird mit dem ersten Textstück angelegt und danach höchstens alle
+        `GEMINI_UI_UPDATE_INTERVAL` Sekunden aktualisiert; nach dem letzten Stück folgt immer eine
+        Aktualisierung. Die Zeit bis zum ersten Textstück wird protokolliert.
 
-        return chat_history
+        Args:
+            stream (Iterable[Any]): Die Teilantworten von `send_message` bzw. `generate_content`
+                mit `stream=True`.
+            chat_history (List[Tuple[str, str]]): Der Chatverlauf.
+            start (float): Zeitpunkt der Anfrage (`time.perf_counter`).
+            cancel_token (Optional[CancellationToken]): Token, über den die Generierung abgebrochen wird.
 
+        Yields:
+            str: Die bisherige Antwort, jeweils nachdem der Chatverlauf aktualisiert wurde.
+        """
+        response_text = ""
+        index = None
+        last_update = 0.0
+        for chunk in stream:
+            if cancel_token is not None and cancel_token.cancelled:
+                response_text += "\n\n*(abgebrochen)*"
+                break
+            response_text += chunk.text
+            now = time.perf_counter()
+            if index is None:
+                logger.info(f"Gemini: erstes Token nach {(now - start) * 1000:.0f} ms")
+                chat_history.append((None, format_chat_message(response_text)))
+                index = len(chat_history) - 1
+            elif now - last_update < GEMINI_UI_UPDATE_INTERVAL:
+                continue
+            last_update = now
+            chat_history[index] = (None, format_chat_message(response_text))
+            yield response_text
+        if index is None:
+            chat_history.append((None, format_chat_message(response_text)))
+        else:
+            chat_history[index] = (None, format_chat_message(response_text))
+        logger.debug(f"Gemini-Antwort mit {len(response_text)} Zeichen in {time.perf_counter() - start:.2f}s gestreamt")
+        yield response_text
 
     def format_code(self, code_input: str) -> str:
         """
@@ -220,44 +264,86 @@ class GeminiFunctions:
             logger.error(f"Fehler beim Formatieren des Codes mit black: {e}")
             return code_input
 
-    @lru_cache(maxsize=100)
-    def analyze_code(self, code_input: str) -> str:
+    def analyze_code(self, code_input: str, incremental: bool = False) -> str:
         """
         Analysiert den gegebenen Python-Code und gibt Feedback.
 
+        Die Antwort wird im `response_cache` gespeichert, sodass derselbe Code mit demselben Modell
+        nicht erneut analysiert wird.
+
         Args:
             code_input (str): Der Eingabe-Code.
+            incremental (bool): Pro Funktion und Klasse analysieren, sodass nach einer Änderung nur
+                die geänderten Teile angefragt werden (siehe `IncrementalCodeAnalyzer`).
 
         Returns:
             str: Das Feedback zum Code.
         """
         try:
-            prompt = f"Analysiere diesen Python-Code und gib Feedback:\n\n{code_input}\n\nAntworte auf Deutsch und mit Zeilenumbrüchen."
-            response = api_client.gemini_model.generate_content(prompt)
-            return response.text if response is not None else "Fehler während der Analyse."
+            instruction = "Analysiere diesen Python-Code und gib Feedback:"
+            if incremental:
+                return self.code_analyzer.analyze(code_input, instruction)
+            prompt = f"{instruction}\n\n{code_input}\n\nAntworte auf Deutsch und mit Zeilenumbrüchen."
+            response = self._generate_cached(prompt)
+            return response if response is not None else "Fehler während der Analyse."
         except Exception as e:
             logger.error(f"Fehler während der Analyse: {e}")
             return str(e)
 
-    @lru_cache(maxsize=100)
-    def suggest_code_improvements(self, code_input: str) -> str:
+    def suggest_code_improvements(self, code_input: str, incremental: bool = False) -> str:
         """
         Schlägt Verbesserungen für den gegebenen Python-Code vor.
 
+        Die Antwort wird wie bei `analyze_code` zwischengespeichert.
+
         Args:
             code_input (str): Der Eingabe-Code.
+            incremental (bool): Pro Funktion und Klasse vorschlagen, wie bei `analyze_code`.
 
         Returns:
             str: Die vorgeschlagenen Verbesserungen.
         """
         try:
-            prompt = f"Schlage Verbesserungen für diesen Python-Code vor:\n\n{code_input}\n\nAntworte auf Deutsch und mit Zeilenumbrüchen."
-            response = api_client.gemini_model.generate_content(prompt)
-            return response.text if response is not None else "Fehler während der Generierung von Vorschlägen."
+            instruction = "Schlage Verbesserungen für diesen Python-Code vor:"
+            if incremental:
+                return self.code_analyzer.analyze(code_input, instruction)
+            prompt = f"{instruction}\n\n{code_input}\n\nAntworte auf Deutsch und mit Zeilenumbrüchen."
+            response = self._generate_cached(prompt)
+            return response if response is not None else "Fehler während der Generierung von Vorschlägen."
         except Exception as e:
             logger.error(f"Fehler während der Generierung von Vorschlägen: {e}")
             return str(e)
 
+    def _generate_cached(self, prompt: str) -> Optional[str]:
+        """
+        Erzeugt eine Antwort mit dem aktuellen Gemini-Modell über den `response_cache`.
+
+        Das Modell sampelt mit seiner eingestellten Temperatur; die Antwort wird trotzdem
+        wiederverwendet, da eine frühere Analyse desselben Codes genügt.
+
+        Args:
+            prompt (str): Der Prompt.
+
+        Returns:
+            Optional[str]: Die Antwort oder None, wenn das Modell keine geliefert hat.
+        """
+        model = api_client.gemini_model
+        return response_cache.cached("gemini", model.model_name, prompt, lambda: self._generate(prompt, model), cache_sampled=True)
+
+    def _generate(self, prompt: str, model: Any = None) -> Optional[str]:
+        """
+        Erzeugt eine Antwort ohne Cache.
+
+        Args:
+            prompt (str): Der Prompt.
+            model (Any): Das Modell; ohne Angabe das aktuelle Gemini-Modell.
+
+        Returns:
+            Optional[str]: Die Antwort oder None, wenn das Modell keine geliefert hat.
+        """
+        response = (model or api_client.gemini_model).generate_content(prompt)
+        return response.text if response is not None else None
+
     def update_model(self, model_name: str) -> None:
         """
         Aktualisiert das Gemini-Modell basierend auf der Auswahl.
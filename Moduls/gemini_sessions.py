@@ -0,0 +1,222 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from api_client import api_client
+from config import GEMINI_SESSION_IDLE_S, GEMINI_HISTORY_TOKEN_BUDGET, GEMINI_CHARS_PER_TOKEN, GEMINI_IMAGE_TOKENS
+import logging
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+def estimate_tokens(content: Any) -> int:
+    """
+    Schätzt die Tokenanzahl einer Nachricht.
+
+    Text wird mit `GEMINI_CHARS_PER_TOKEN` Zeichen pro Token gerechnet, jedes Bild bzw. jede
+    hochgeladene Datei mit `GEMINI_IMAGE_TOKENS`. Eine Anfrage an `count_tokens` würde pro
+    Nachricht einen zusätzlichen Netzwerkaufruf kosten.
+
+    Args:
+        content (Any): Ein `protos.Content`, ein Dict mit `parts` oder ein Text.
+
+    Returns:
+        int: Die geschätzte Tokenanzahl.
+    """
+    if isinstance(content, str):
+        return len(content) // GEMINI_CHARS_PER_TOKEN + 1
+    parts = content["parts"] if isinstance(content, dict) else content.parts
+    tokens = 0
+    for part in parts:
+        text = part if isinstance(part, str) else getattr(part, "text", "")
+        tokens += len(text) // GEMINI_CHARS_PER_TOKEN + 1 if text else GEMINI_IMAGE_TOKENS
+    return tokens
+
+def trim_history(history: List[Any], budget: int) -> Tuple[List[Any], int]:
+    """
+    Kürzt einen Chatverlauf von vorne auf ein Tokenbudget.
+
+    Es werden immer ganze Runden (Benutzer- und Modellnachricht) entfernt, damit der Verlauf
+    weiterhin mit einer Benutzernachricht beginnt.
+
+    Args:
+        history (List[Any]): Der Verlauf, abwechselnd Benutzer- und Modellnachrichten.
+        budget (int): Die größte geschätzte Tokenanzahl.
+
+    Returns:
+        Tuple[List[Any], int]: Der gekürzte Verlauf und die Anzahl der entfernten Nachrichten.
+    """
+    tokens = [estimate_tokens(content) for content in history]
+    total = sum(tokens)
+    start = 0
+    while total > budget and start < len(history):
+        step = min(2, len(history) - start)
+        total -= sum(tokens[start:start + step])
+        start += step
+    return history[start:], start
+
+class GeminiSession:
+    """
+    Eine Gemini-Unterhaltung mit dem Zeitpunkt ihrer letzten Nutzung.
+
+    Attributes:
+        chat (Any): Die `ChatSession` des Modells.
+        last_used (float): Zeitpunkt der letzten Nutzung (`time.monotonic`).
+        lock (threading.Lock): Verhindert, dass zwei Anfragen derselben Unterhaltung gleichzeitig
+            laufen und den Verlauf durcheinanderbringen.
+    """
+
+    def __init__(self, chat: Any):
+        """
+        Initialisiert die GeminiSession.
+
+        Args:
+            chat (Any): Die `ChatSession` des Modells.
+        """
+        self.chat = chat
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+        self._checkpoint: List[Any] = []
+
+    def discard_turn(self) -> None:
+        """
+        Setzt den Verlauf auf den Stand vor der laufenden Runde zurück, z.B. nach einem Abbruch.
+        """
+        self.chat.history = list(self._checkpoint)
+
+class GeminiSessionRegistry:
+    """
+    Klasse zur Verwaltung der Gemini-Unterhaltungen pro Browser-Sitzung.
+
+    Jede Gradio-Sitzung behält ihre `ChatSession` über alle Runden, sodass das Modell die
+    vorherigen Runden kennt und pro Runde nur die neue Nachricht übergeben wird. Die Gemini-API
+    ist zustandslos: Die `ChatSession` schickt bei jeder Anfrage den Verlauf mit. Damit die
+    Anfragen nicht unbegrenzt wachsen, wird der Verlauf vor jeder Runde auf
+    `max_history_tokens` gekürzt. Unterhaltungen, die `idle_timeout` Sekunden nicht genutzt
+    wurden, werden beim nächsten Zugriff entfernt.
+
+    Attributes:
+        model_provider (Callable[[], Any]): Liefert das aktuelle `GenerativeModel`.
+        idle_timeout (float): Sekunden ohne Nutzung bis zum Entfernen einer Unterhaltung.
+        max_history_tokens (int): Das Tokenbudget für Verlauf und neue Nachricht.
+    """
+
+    def __init__(self, model_provider: Callable[[], Any] = lambda: api_client.gemini_model,
+                 idle_timeout: float = GEMINI_SESSION_IDLE_S, max_history_tokens: int = GEMINI_HISTORY_TOKEN_BUDGET):
+        """
+        Initialisiert die GeminiSessionRegistry.
+
+        Args:
+            model_provider (Callable[[], Any]): Liefert das aktuelle `GenerativeModel`.
+            idle_timeout (float): Sekunden ohne Nutzung bis zum Entfernen einer Unterhaltung.
+            max_history_tokens (int): Das Tokenbudget für Verlauf und neue Nachricht.
+        """
+        self.model_provider = model_provider
+        self.idle_timeout = idle_timeout
+        self.max_history_tokens = max_history_tokens
+        self._sessions: Dict[str, GeminiSession] = {}
+        self._lock = threading.Lock()
+        self._created = 0
+        self._evicted = 0
+        self._trimmed = 0
+
+    @contextmanager
+    def use(self, session_id: Optional[str], message: Any = "") -> Iterator[GeminiSession]:
+        """
+        Kontextmanager für eine Runde in der Unterhaltung einer Sitzung.
+
+        Die Unterhaltung wird bei Bedarf angelegt und ihr Verlauf so gekürzt, dass er zusammen mit
+        `message` in das Tokenbudget passt. Wurde das Modell inzwischen gewechselt, wird sie mit
+        dem bisherigen Verlauf auf dem neuen Modell fortgesetzt. Endet die Runde mit einer
+        Ausnahme, wird der Verlauf auf den Stand davor zurückgesetzt. Ist der Verlauf nicht lesbar,
+        weil die vorige Antwort ohne STOP endete (z.B. SAFETY), wird die Unterhaltung mit dem
+        letzten gültigen Verlauf neu begonnen.
+
+        Args:
+            session_id (Optional[str]): Die Sitzungs-ID, z.B. `gr.Request.session_hash`.
+            message (Any): Die neue Nachricht, ein Text oder eine Liste von Teilen.
+
+        Yields:
+            GeminiSession: Die Unterhaltung; `session.chat.send_message` sendet die neue Nachricht.
+        """
+        session_id = session_id or ""
+        model = self.model_provider()
+        with self._lock:
+            self._evict_idle()
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = GeminiSession(model.start_chat(history=[]))
+                self._created += 1
+            session.last_used = time.monotonic()
+        with session.lock:
+            try:
+                if session.chat.model is not model:
+                    session.chat = model.start_chat(history=list(session.chat.history))
+                self._trim(session, message)
+                session._checkpoint = list(session.chat.history)
+            except Exception as e:
+                logger.warning(f"Gemini-Verlauf nicht lesbar, setze mit dem letzten gültigen Stand fort: {e}")
+                session.chat = model.start_chat(history=list(session._checkpoint))
+                self._trim(session, message)
+                session._checkpoint = list(session.chat.history)
+            try:
+                yield session
+            except BaseException:
+                session.discard_turn()
+                raise
+            else:
+                try:
+                    session._checkpoint = list(session.chat.history)
+                except Exception as e:
+                    logger.debug(f"Gemini-Verlauf nach der Runde nicht lesbar, behalte den vorigen Stand: {e}")
+            finally:
+                session.last_used = time.monotonic()
+
+    def reset(self, session_id: Optional[str]) -> None:
+        """
+        Verwirft die Unterhaltung einer Sitzung, z.B. beim Leeren des Chats.
+
+        Args:
+            session_id (Optional[str]): Die Sitzungs-ID.
+        """
+        with self._lock:
+            self._sessions.pop(session_id or "", None)
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Gibt die Kennzahlen der Registry zurück.
+
+        Returns:
+            Dict[str, float]: Offene, erstellte und wegen Inaktivität entfernte Unterhaltungen
+            sowie die Anzahl der aus Verläufen entfernten Nachrichten.
+        """
+        with self._lock:
+            self._evict_idle()
+            return {
+                "sessions": len(self._sessions),
+                "created": self._created,
+                "evicted": self._evicted,
+                "trimmed_messages": self._trimmed,
+            }
+
+    def _trim(self, session: GeminiSession, message: Any) -> None:
+        budget = self.max_history_tokens - estimate_tokens({"parts": message if isinstance(message, list) else [message]})
+        history, dropped = trim_history(list(session.chat.history), max(budget, 0))
+        if dropped:
+            session.chat.history = history
+            with self._lock:
+                self._trimmed += dropped
+            logger.info(f"Gemini-Verlauf gekürzt: {dropped} ältere Nachrichten entfernt, {len(history)} verbleiben")
+
+    def _evict_idle(self) -> None:
+        if self.idle_timeout <= 0:
+            return
+        now = time.monotonic()
+        idle = [key for key, session in self._sessions.items() if now - session.last_used > self.idle_timeout and not session.lock.locked()]
+        for key in idle:
+            del self._sessions[key]
+        if idle:
+            self._evicted += len(idle)
+            logger.debug(f"{len(idle)} inaktive Gemini-Unterhaltungen entfernt")
+
+gemini_sessions = GeminiSessionRegistry()
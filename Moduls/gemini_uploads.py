@@ -0,0 +1,150 @@
+import datetime
+import io
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Tuple
+from PIL import Image
+from helpers import image_hash
+from config import GEMINI_FILE_TTL_S, GEMINI_FILE_EXPIRY_MARGIN_S, GEMINI_UPLOAD_JPEG_QUALITY
+import logging
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+def _upload_file(data: io.BytesIO, mime_type: str, display_name: str) -> Any:
+    import google.generativeai as genai
+
+    return genai.upload_file(path=data, mime_type=mime_type, display_name=display_name)
+
+class GeminiUploadManager:
+    """
+    Klasse, die Bilder einmal zur Gemini File API hochlädt und die Dateien wiederverwendet.
+
+    Der Schlüssel ist der `image_hash` der Pixel (mit Modus und Größe), sodass eine Rückfrage zum
+    selben Bild die bereits hochgeladene Datei verwendet, auch wenn Gradio das Bild neu
+    übergibt. Hochgeladene Dateien werden vom Dienst nach `GEMINI_FILE_TTL_S` gelöscht; eine
+    Datei wird daher nur bis `GEMINI_FILE_EXPIRY_MARGIN_S` Sekunden vor ihrem Ablauf
+    wiederverwendet. Das Bild wird im Arbeitsspeicher kodiert und ohne temporäre Datei
+    gesendet. Laden mehrere Anfragen gleichzeitig dasselbe Bild hoch, wird es nur einmal
+    übertragen und alle warten auf dieses Ergebnis.
+
+    Attributes:
+        uploader (Callable[[io.BytesIO, str, str], Any]): Lädt Daten mit MIME-Typ und Anzeigenamen hoch.
+        ttl (float): Die Lebensdauer einer hochgeladenen Datei in Sekunden, falls der Dienst
+            keinen Ablaufzeitpunkt meldet.
+        margin (float): Wie viele Sekunden vor dem Ablauf eine Datei nicht mehr verwendet wird.
+    """
+
+    def __init__(self, uploader: Callable[[io.BytesIO, str, str], Any] = _upload_file, ttl: float = GEMINI_FILE_TTL_S,
+                 margin: float = GEMINI_FILE_EXPIRY_MARGIN_S):
+        """
+        Initialisiert den GeminiUploadManager.
+
+        Args:
+            uploader (Callable[[io.BytesIO, str, str], Any]): Lädt Daten mit MIME-Typ und Anzeigenamen hoch.
+            ttl (float): Die Lebensdauer einer hochgeladenen Datei in Sekunden.
+            margin (float): Wie viele Sekunden vor dem Ablauf eine Datei nicht mehr verwendet wird.
+        """
+        self.uploader = uploader
+        self.ttl = ttl
+        self.margin = margin
+        self._files: Dict[str, Tuple[Any, float]] = {}
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._uploads = 0
+        self._reused = 0
+        self._coalesced = 0
+        self._bytes = 0
+
+    def upload(self, image: Image.Image, display_name: str = "Hochgeladenes Bild") -> Any:
+        """
+        Gibt die hochgeladene Datei eines Bildes zurück und lädt es nur hoch, wenn nötig.
+
+        Args:
+            image (Image.Image): Das Bild.
+            display_name (str): Der Anzeigename der Datei.
+
+        Returns:
+            Any: Die Datei der File API, verwendbar als Teil einer Nachricht.
+
+        Raises:
+            Exception: Wenn das Hochladen fehlschlägt; alle gleichzeitig wartenden Aufrufer erhalten den Fehler.
+        """
+        key = image_hash(image)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            cached = self._files.get(key)
+            if cached is not None:
+                self._reused += 1
+                return cached[0]
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                future = self._pending[key] = Future()
+            else:
+                self._coalesced += 1
+        if not owner:
+            return future.result()
+        try:
+            data = self._encode(image)
+            size = len(data.getbuffer())
+            start = time.perf_counter()
+            file = self.uploader(data, "image/jpeg", display_name)
+            logger.info(f"Bild hochgeladen ({size / 1024:.0f} KB in {time.perf_counter() - start:.2f}s): {getattr(file, 'uri', file)}")
+        except BaseException as e:
+            with self._lock:
+                del self._pending[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._files[key] = (file, self._valid_until(file))
+            del self._pending[key]
+            self._uploads += 1
+            self._bytes += size
+        future.set_result(file)
+        return file
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Gibt die Kennzahlen der Uploads zurück.
+
+        Returns:
+            Dict[str, float]: Anzahl der Uploads, der wiederverwendeten und der zusammengelegten
+            Anfragen, übertragene Bytes und die Anzahl gültiger Dateien.
+        """
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            return {
+                "uploads": self._uploads,
+                "reused": self._reused,
+                "coalesced": self._coalesced,
+                "bytes_uploaded": self._bytes,
+                "files": len(self._files),
+            }
+
+    def _valid_until(self, file: Any) -> float:
+        remaining = self.ttl
+        expiration = getattr(file, "expiration_time", None)
+        if isinstance(expiration, datetime.datetime):
+            if expiration.tzinfo is None:
+                expiration = expiration.replace(tzinfo=datetime.timezone.utc)
+            remaining = (expiration - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+        return time.monotonic() + remaining - self.margin
+
+    def _evict_expired(self, now: float) -> None:
+        expired = [key for key, (_, valid_until) in self._files.items() if valid_until <= now]
+        for key in expired:
+            del self._files[key]
+        if expired:
+            logger.debug(f"{len(expired)} abgelaufene Gemini-Dateien verworfen")
+
+    @staticmethod
+    def _encode(image: Image.Image) -> io.BytesIO:
+        data = io.BytesIO()
+        image.convert("RGB").save(data, format="JPEG", quality=GEMINI_UPLOAD_JPEG_QUALITY)
+        data.seek(0)
+        return data
+
+gemini_uploads = GeminiUploadManager()
@@ -1,17 +1,87 @@
+from typing import Optional
 import gradio as gr
 from file_component import FComponent
 from mistral_functions import mistral_functions
 from gemini_functions import gemini_functions
 from chat_manager import chat_manager
 from ollama_functions import ollama_functions
+from ollama_model_manager import ollama_model_manager
 from file_creator import file_creator
 from api_client import api_client
-from config import OLLAMA_MODELS, DEFAULT_OLLAMA_MODEL, STATUS_MESSAGE_GENERATING, STATUS_MESSAGE_COMPLETE, STATUS_MESSAGE_ERROR, config
+from cancellation import GenerationCancelled, cancellation_registry
+from tts_queue import tts_queue
+from gemini_sessions import gemini_sessions
+from response_cache import response_cache
+from long_transcription import iter_transcription, format_transcript
+from config import OLLAMA_MODELS, DEFAULT_OLLAMA_MODEL, OLLAMA_USE_HTTP, OLLAMA_PRELOAD_DEFAULT, OLLAMA_FANOUT_MAX_MODELS, OLLAMA_FANOUT_PARALLELISM, STATUS_MESSAGE_GENERATING, STATUS_MESSAGE_COMPLETE, STATUS_MESSAGE_ERROR, STATUS_MESSAGE_CANCELLED, CODE_ANALYSIS_INCREMENTAL, config
 import logging
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+def stop_generation(name: Optional[str] = None):
+    """
+    Erstellt einen Event-Handler, der die laufenden Generierungen eines Anbieters in der
+    Sitzung des Aufrufers abbricht.
+
+    Args:
+        name (Optional[str]): Die Bezeichnung, unter der die Generierungen angemeldet wurden.
+            Ohne Angabe werden alle Generierungen der Sitzung abgebrochen.
+
+    Returns:
+        Callable: Der Event-Handler.
+    """
+    def stop(request: gr.Request):
+        cancellation_registry.cancel(request.session_hash, name)
+    return stop
+
+def stop_speech(request: gr.Request):
+    """
+    Bricht das Vorlesen in der Sitzung des Aufrufers ab, laufend und wartend.
+    """
+    tts_queue.cancel(request.session_hash)
+
+def reset_gemini_session(request: gr.Request):
+    """
+    Verwirft die Gemini-Unterhaltung der Sitzung des Aufrufers, damit der nächste Chat ohne
+    den bisherigen Verlauf beginnt.
+    """
+    gemini_sessions.reset(request.session_hash)
+
+def transcribe_audio(name: str):
+    """
+    Erstellt einen Event-Handler, der eine Audiodatei abschnittsweise transkribiert und das
+    Transkript fortlaufend in das Eingabefeld schreibt.
+
+    Die Transkription wird unter `name` angemeldet, sodass der Stopp-Button des Tabs sie
+    abbricht. Ist sie vollständig, wird die Audiodatei aus dem Upload-Feld entfernt, damit sie
+    beim Senden nicht erneut transkribiert wird.
+
+    Args:
+        name (str): Die Bezeichnung der Generierungen des Tabs, z.B. `mistral`.
+
+    Returns:
+        Callable: Der Event-Handler mit den Ausgaben Eingabefeld und Audio-Upload.
+    """
+    def transcribe(audio_file, request: gr.Request):
+        if not audio_file:
+            yield gr.update(), gr.update()
+            return
+        text = ""
+        with cancellation_registry.track(request.session_hash, name) as token:
+            try:
+                for segments in iter_transcription(audio_file, cancel_token=token):
+                    text = format_transcript(segments)
+                    yield text, gr.update()
+            except GenerationCancelled:
+                raise
+            except Exception as e:
+                logger.error(f"Fehler bei der Transkription: {e}")
+                gr.Warning(f"Fehler bei der Transkription: {e}")
+                return
+            yield text, None
+    return transcribe
+
 def create_gradio_interface():
     """
     Erstellt die Gradio-Benutzeroberfläche.
@@ -34,11 +104,13 @@ def create_gradio_interface():
                         mistral_user_input = gr.Textbox(label="Nachricht", placeholder="Geben Sie hier Ihre Nachricht ein...")
                     with gr.Column(scale=1, min_width=100):
                         mistral_submit_btn = gr.Button("Senden")
+                        mistral_stop_btn = gr.Button("Stopp", variant="stop")
                 with gr.Row():
                     with gr.Column(scale=1):
                         mistral_image_upload = gr.Image(type="pil", label="Bild hochladen", height=200)
                     with gr.Column(scale=1):
                         mistral_audio_upload = gr.Audio(type="filepath", label="Audio hochladen")
+                        mistral_transcribe_btn = gr.Button("Audio transkribieren")
                     with gr.Column(scale=1):
                         mistral_analyze_btn = gr.Button("Bild mit Nachricht senden")
 
@@ -82,16 +154,23 @@ def create_gradio_interface():
                         with gr.Row():
                             mistral_compare_btn = gr.Button("Bilder vergleichen")
 
-                mistral_submit_btn.click(
-                    lambda user_input, chat_history, image, audio_upload: mistral_functions.chat_with_mistral(
-                        user_input=user_input,
-                        chat_history=chat_history,
-                        image=image,
-                        audio_file=audio_upload if audio_upload else None,
-                    ),
+                def mistral_chat(user_input, chat_history, image, audio_upload, request: gr.Request):
+                    with cancellation_registry.track(request.session_hash, "mistral") as token:
+                        return mistral_functions.chat_with_mistral(
+                            user_input=user_input,
+                            chat_history=chat_history,
+                            image=image,
+                            audio_file=audio_upload if audio_upload else None,
+                            cancel_token=token,
+                        )
+
+                mistral_submit_event = mistral_submit_btn.click(
+                    mistral_chat,
                     inputs=[mistral_user_input, mistral_state, mistral_image_upload, mistral_audio_upload],
                     outputs=[mistral_chatbot, mistral_user_input]
                 )
+                mistral_transcribe_event = mistral_transcribe_btn.click(transcribe_audio("mistral"), inputs=[mistral_audio_upload], outputs=[mistral_user_input, mistral_audio_upload])
+                mistral_stop_btn.click(stop_generation("mistral"), cancels=[mistral_submit_event, mistral_transcribe_event])
 
                 mistral_analyze_btn.click(
                     lambda image, chat_history, user_input: mistral_functions.analyze_image_mistral(image, chat_history, user_input, "Beschreiben Sie das Bild mit einer kreativen Beschreibung. Bitte in Deutsch antworten."),
@@ -158,11 +237,13 @@ def create_gradio_interface():
                         gemini_user_input = gr.Textbox(label="Nachricht", placeholder="Geben Sie hier Ihre Nachricht ein...")
                     with gr.Column(scale=1, min_width=100):
                         gemini_submit_btn = gr.Button("Senden")
+                        gemini_stop_btn = gr.Button("Stopp", variant="stop")
                 with gr.Row():
                     with gr.Column(scale=1):
                         gemini_image_upload = gr.Image(type="pil", label="Bild hochladen", height=200)
                     with gr.Column(scale=1):
                         gemini_audio_upload = gr.Audio(type="filepath", label="Audio hochladen")
+                        gemini_transcribe_btn = gr.Button("Audio transkribieren")
                     with gr.Column(scale=1):
                         gemini_analyze_btn = gr.Button("Bild mit Nachricht senden")
 
@@ -177,30 +258,47 @@ def create_gradio_interface():
                         gemini_delete_chat_button = gr.Button("Ausgewählten Chat löschen")
                         gemini_delete_all_chats_button = gr.Button("Alle Chats löschen")
 
-                gemini_enable_tts = gr.Checkbox(label="TTS aktivieren", value=config.get("enable_tts", False))
-
-                gemini_submit_btn.click(
-                    lambda user_input, chat_history, image, audio_upload, enable_tts: gemini_functions.chat_with_gemini(
-                        user_input=user_input,
-                        chat_history=chat_history,
-                        image=image,
-                        audio_file=audio_upload if audio_upload else None,
-                        enable_tts=enable_tts
-                    ),
+                with gr.Row():
+                    gemini_enable_tts = gr.Checkbox(label="TTS aktivieren", value=config.get("enable_tts", False))
+                    gemini_stop_tts_btn = gr.Button("Vorlesen stoppen")
+
+                def gemini_chat(user_input, chat_history, image, audio_upload, enable_tts, request: gr.Request):
+                    with cancellation_registry.track(request.session_hash, "gemini") as token:
+                        yield from gemini_functions.chat_with_gemini(
+                            user_input=user_input,
+                            chat_history=chat_history,
+                            image=image,
+                            audio_file=audio_upload if audio_upload else None,
+                            enable_tts=enable_tts,
+                            cancel_token=token,
+                            session_id=request.session_hash
+                        )
+
+                gemini_submit_event = gemini_submit_btn.click(
+                    gemini_chat,
                     inputs=[gemini_user_input, gemini_state, gemini_image_upload, gemini_audio_upload, gemini_enable_tts],
                     outputs=[gemini_chatbot, gemini_user_input]
                 )
+                gemini_transcribe_event = gemini_transcribe_btn.click(transcribe_audio("gemini"), inputs=[gemini_audio_upload], outputs=[gemini_user_input, gemini_audio_upload])
+
+                def gemini_analyze(image, chat_history, user_input, tts_enabled, request: gr.Request):
+                    with cancellation_registry.track(request.session_hash, "gemini") as token:
+                        yield from gemini_functions.analyze_image_gemini(image, chat_history, user_input, tts_enabled, cancel_token=token)
 
-                gemini_analyze_btn.click(
-                    lambda image, chat_history, user_input, tts_enabled: gemini_functions.analyze_image_gemini(image, chat_history, user_input, tts_enabled),
+                gemini_analyze_event = gemini_analyze_btn.click(
+                    gemini_analyze,
                     inputs=[gemini_image_upload, gemini_state, gemini_user_input, gemini_enable_tts],
                     outputs=[gemini_chatbot]
                 )
+                gemini_stop_btn.click(stop_generation("gemini"), cancels=[gemini_submit_event, gemini_transcribe_event, gemini_analyze_event])
+                gemini_stop_tts_btn.click(stop_speech)
 
 
                 gemini_clear_chat_button.click(chat_manager.clear_chat, inputs=[gemini_state], outputs=[gemini_chatbot])
+                gemini_clear_chat_button.click(reset_gemini_session)
                 gemini_save_chat_button.click(chat_manager.save_chat, inputs=[gemini_state, gemini_saved_chats], outputs=[gemini_saved_chats])
                 gemini_new_chat_button.click(chat_manager.new_chat, inputs=[gemini_saved_chats], outputs=[gemini_chatbot, gemini_saved_chats])
+                gemini_new_chat_button.click(reset_gemini_session)
 
                 def update_gemini_radio(chats):
                     formatted_chats = [chat_manager.format_saved_chat(chat) for chat in chats]
@@ -208,6 +306,7 @@ def create_gradio_interface():
 
                 gemini_saved_chats.change(update_gemini_radio, inputs=[gemini_saved_chats], outputs=[gemini_saved_chat_display])
                 gemini_saved_chat_display.change(chat_manager.load_chat, inputs=[gemini_saved_chat_display, gemini_saved_chats, gemini_state], outputs=[gemini_chatbot, gemini_state, gemini_saved_chat_display])
+                gemini_saved_chat_display.change(reset_gemini_session)
 
                 gemini_delete_chat_button.click(chat_manager.delete_chat, inputs=[gemini_saved_chat_display, gemini_saved_chats], outputs=[gemini_saved_chats])
                 gemini_delete_all_chats_button.click(chat_manager.delete_all_chats, outputs=[gemini_saved_chats])
@@ -217,14 +316,78 @@ def create_gradio_interface():
             with gr.TabItem("Ollama Chatbot"):
                 ollama_input_text = gr.Textbox(lines=2, placeholder="Geben Sie Ihre Frage an Ollama ein", label="Eingabe (oder Datei hochladen)")
                 ollama_model_selector = gr.Dropdown(choices=OLLAMA_MODELS, value=DEFAULT_OLLAMA_MODEL, label="Modell auswählen")
+                with gr.Accordion("Geladene Modelle", open=False):
+                    ollama_model_status = gr.Markdown(ollama_model_manager.status_markdown())
+                    ollama_refresh_status_btn = gr.Button("Status aktualisieren")
                 ollama_file_upload1 = FComponent().component  # Verwenden Sie die FComponent-Komponente
                 ollama_file_upload2 = FComponent().component  # Verwenden Sie die FComponent-Komponente
                 ollama_audio_upload = gr.Audio(type="filepath", label="Audio hochladen")
+                ollama_transcribe_btn = gr.Button("Audio transkribieren")
                 ollama_output = gr.Markdown(label="Antwort")
                 ollama_status = gr.Label(label="Status")
 
-                ollama_submit_btn = gr.Button("Senden")
-                ollama_submit_btn.click(ollama_functions.chatbot_interface, inputs=[ollama_input_text, ollama_model_selector, ollama_file_upload1, ollama_file_upload2, ollama_audio_upload], outputs=[ollama_output, ollama_status])
+                with gr.Row():
+                    ollama_submit_btn = gr.Button("Senden")
+                    ollama_stop_btn = gr.Button("Stopp", variant="stop")
+
+                def ollama_chat(input_text, model, file1, file2, audio_file, request: gr.Request):
+                    with cancellation_registry.track(request.session_hash, "ollama") as token:
+                        yield from ollama_functions.chatbot_interface(input_text, model, file1, file2, audio_file, cancel_token=token)
+
+                ollama_submit_event = ollama_submit_btn.click(ollama_chat, inputs=[ollama_input_text, ollama_model_selector, ollama_file_upload1, ollama_file_upload2, ollama_audio_upload], outputs=[ollama_output, ollama_status])
+                ollama_submit_event.then(ollama_model_manager.status_markdown, outputs=[ollama_model_status])
+
+                with gr.Accordion("Mehrere Modelle vergleichen", open=False):
+                    with gr.Row():
+                        ollama_fanout_models = gr.CheckboxGroup(choices=OLLAMA_MODELS, value=[DEFAULT_OLLAMA_MODEL], label=f"Modelle (höchstens {OLLAMA_FANOUT_MAX_MODELS})")
+                        ollama_fanout_parallelism = gr.Slider(minimum=1, maximum=OLLAMA_FANOUT_MAX_MODELS, step=1, value=OLLAMA_FANOUT_PARALLELISM, label="Gleichzeitig generierende Modelle")
+                    ollama_fanout_btn = gr.Button("An alle ausgewählten Modelle senden")
+                    with gr.Row():
+                        ollama_fanout_outputs = [gr.Markdown() for _ in range(OLLAMA_FANOUT_MAX_MODELS)]
+                    ollama_fanout_stats = gr.Markdown()
+
+                def ollama_fan_out(prompt, models, parallelism, request: gr.Request):
+                    with cancellation_registry.track(request.session_hash, "ollama") as token:
+                        yield from ollama_functions.fan_out(prompt, models, parallelism, cancel_token=token)
+
+                ollama_fanout_event = ollama_fanout_btn.click(ollama_fan_out, inputs=[ollama_input_text, ollama_fanout_models, ollama_fanout_parallelism], outputs=ollama_fanout_outputs + [ollama_fanout_stats])
+                ollama_fanout_event.then(ollama_model_manager.status_markdown, outputs=[ollama_model_status])
+
+                ollama_transcribe_event = ollama_transcribe_btn.click(transcribe_audio("ollama"), inputs=[ollama_audio_upload], outputs=[ollama_input_text, ollama_audio_upload])
+
+                def stop_ollama(request: gr.Request):
+                    cancellation_registry.cancel(request.session_hash, "ollama")
+                    return STATUS_MESSAGE_CANCELLED
+
+                ollama_stop_btn.click(stop_ollama, outputs=[ollama_status], cancels=[ollama_submit_event, ollama_fanout_event, ollama_transcribe_event]).then(
+                    ollama_model_manager.status_markdown, outputs=[ollama_model_status]
+                )
+
+                with gr.Accordion("Dokumente vergleichen", open=False):
+                    with gr.Row():
+                        ollama_diff_page = gr.Number(value=1, precision=0, minimum=1, label="Seite")
+                        ollama_diff_btn = gr.Button("Hochgeladene Dokumente vergleichen")
+                    ollama_diff_output = gr.Markdown()
+
+                ollama_diff_btn.click(ollama_functions.compare_documents, inputs=[ollama_file_upload1, ollama_file_upload2, ollama_diff_page], outputs=[ollama_diff_output])
+                ollama_diff_page.submit(ollama_functions.compare_documents, inputs=[ollama_file_upload1, ollama_file_upload2, ollama_diff_page], outputs=[ollama_diff_output])
+
+                def select_ollama_model(model):
+                    if not OLLAMA_USE_HTTP:
+                        yield ollama_model_manager.status_markdown()
+                        return
+                    loaded = ollama_model_manager.preload_async(model)
+                    yield ollama_model_manager.status_markdown()
+                    loaded.wait()
+                    yield ollama_model_manager.status_markdown()
+
+                def refresh_ollama_status():
+                    ollama_model_manager.refresh()
+                    return ollama_model_manager.status_markdown()
+
+                ollama_model_selector.change(select_ollama_model, inputs=[ollama_model_selector], outputs=[ollama_model_status])
+                ollama_refresh_status_btn.click(refresh_ollama_status, outputs=[ollama_model_status])
+                demo.load(refresh_ollama_status, outputs=[ollama_model_status])
 
             # --- Dateierstellung ---
             with gr.TabItem("Dateierstellung"):
@@ -265,14 +428,15 @@ def create_gradio_interface():
                 with gr.Row():
                     analyze_button = gr.Button("Code analysieren", variant="primary", elem_classes="button-font")
                     suggest_button = gr.Button("Vorschläge generieren", variant="secondary", elem_classes="button-font")
+                    incremental_checkbox = gr.Checkbox(label="Pro Funktion analysieren (nur geänderte Teile neu)", value=CODE_ANALYSIS_INCREMENTAL)
 
                 # Outputs
                 analysis_output = gr.Code(label="Analyse", language="python", lines=10, elem_classes="code-output")
                 suggestions_output = gr.Code(label="Vorschläge", language="python", lines=10, elem_classes="code-output")
 
                 # Button Click Events
-                analyze_button.click(fn=gemini_functions.analyze_code, inputs=code_input, outputs=analysis_output)
-                suggest_button.click(fn=gemini_functions.suggest_code_improvements, inputs=code_input, outputs=suggestions_output)
+                analyze_button.click(fn=gemini_functions.analyze_code, inputs=[code_input, incremental_checkbox], outputs=analysis_output)
+                suggest_button.click(fn=gemini_functions.suggest_code_improvements, inputs=[code_input, incremental_checkbox], outputs=suggestions_output)
 
                 # Save and Load Code
                 save_button = gr.Button("Code speichern", variant="primary", elem_classes="button-font")
@@ -290,8 +454,27 @@ def create_gradio_interface():
                 format_button = gr.Button("Code mit black formatieren", variant="secondary", elem_classes="button-font")
                 format_button.click(fn=gemini_functions.format_code_with_black, inputs=code_input, outputs=code_input)
 
+            # --- Kennzahlen ---
+            with gr.TabItem("Kennzahlen"):
+                metrics_output = gr.Markdown()
+                metrics_refresh_btn = gr.Button("Aktualisieren")
+
+                def show_metrics():
+                    return f"{response_cache.status_markdown()}\n\n{cancellation_registry.status_markdown()}"
+
+                metrics_refresh_btn.click(show_metrics, outputs=[metrics_output])
+                demo.load(show_metrics, outputs=[metrics_output])
+
+        # Schließt der Benutzer den Browser-Tab, werden alle Generierungen und Sprachausgaben seiner Sitzung abgebrochen
+        # und seine Gemini-Unterhaltung verworfen.
+        demo.unload(stop_generation())
+        demo.unload(stop_speech)
+        demo.unload(reset_gemini_session)
+
     return demo
 
 if __name__ == '__main__':
+    if OLLAMA_USE_HTTP and OLLAMA_PRELOAD_DEFAULT:
+        ollama_model_manager.preload_async(DEFAULT_OLLAMA_MODEL)
     demo = create_gradio_interface()
     demo.launch(share=True, server_name="localhost", server_port=2379)
@@ -1,5 +1,6 @@
 from PIL import Image
 import base64
+import hashlib
 from io import BytesIO
 import logging
 
@@ -27,6 +28,22 @@ def encode_image(image: Image.Image) -> str:
         logger.error(f"Fehler beim Kodieren des Bildes: {e}")
         raise
 
+def image_hash(image: Image.Image) -> str:
+    """
+    Bildet den SHA-256 eines Bildes aus seinen Pixeln, seinem Modus und seiner Größe.
+
+    Dasselbe Bild ergibt denselben Hash, auch wenn es neu geladen oder anders kodiert wurde.
+
+    Args:
+        image (Image.Image): Das Bild.
+
+    Returns:
+        str: Der Hash als Hexadezimalzeichenkette.
+    """
+    digest = hashlib.sha256(f"{image.mode}:{image.size[0]}x{image.size[1]}:".encode("ascii"))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
 def format_chat_message(text: str) -> str:
     """
     Formatiert eine Chatnachricht mit benutzerdefiniertem Stil.
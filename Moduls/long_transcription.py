@@ -0,0 +1,198 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Generator, List, Optional, Tuple
+import numpy as np
+from audio_preprocessing import load_pcm
+from cancellation import CancellationToken
+from transcription import TranscriptionBackend, TranscriptSegment, get_backend
+from transcription_cache import TranscriptionCache, transcription_cache
+from config import WHISPER_SAMPLING_RATE, LONG_AUDIO_CHUNK_S, LONG_AUDIO_SEARCH_S
+import logging
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+FRAME_MS = 30  # Länge der Analyseblöcke für die Pausensuche
+SMOOTH_FRAMES = 10  # Glättung der Energie, damit Pausen statt einzelner leiser Blöcke gefunden werden
+
+def find_split_points(samples: np.ndarray, rate: int = WHISPER_SAMPLING_RATE, chunk_s: float = LONG_AUDIO_CHUNK_S,
+                      search_s: float = LONG_AUDIO_SEARCH_S) -> List[Tuple[int, int]]:
+    """
+    Teilt ein Signal in Abschnitte von höchstens `chunk_s` Sekunden an möglichst leisen Stellen.
+
+    Für jede Grenze wird in den letzten `search_s` Sekunden vor der Höchstlänge der Block mit
+    der geringsten geglätteten Energie gesucht, sodass Schnitte in Sprechpausen statt mitten
+    in Wörtern liegen.
+
+    Args:
+        samples (np.ndarray): Das Mono-Signal.
+        rate (int): Die Abtastrate.
+        chunk_s (float): Die Höchstlänge eines Abschnitts in Sekunden.
+        search_s (float): Die Länge des Suchbereichs vor jeder Grenze in Sekunden.
+
+    Returns:
+        List[Tuple[int, int]]: Start- und End-Sample (exklusiv) jedes Abschnitts.
+    """
+    total = len(samples)
+    chunk = int(chunk_s * rate)
+    if total <= chunk:
+        return [(0, total)] if total else []
+
+    frame = max(1, rate * FRAME_MS // 1000)
+    frames = samples[: total // frame * frame].reshape(-1, frame)
+    energy = np.einsum("ij,ij->i", frames, frames, dtype=np.float64)
+    search = max(1, int(search_s * rate) // frame)
+    kernel = np.ones(SMOOTH_FRAMES) / SMOOTH_FRAMES
+
+    ranges = []
+    start = 0
+    while total - start > chunk:
+        window_end = (start + chunk) // frame
+        # Mindestens die halbe Abschnittslänge, damit eine gerade angeschnittene Pause nicht
+        # zu winzigen Abschnitten führt.
+        window_start = max((start + chunk // 2) // frame, window_end - search)
+        window = energy[window_start:window_end]
+        if len(window) >= SMOOTH_FRAMES:
+            window = np.convolve(window, kernel, mode="same")
+        split = (window_start + int(np.argmin(window))) * frame + frame // 2
+        ranges.append((start, split))
+        start = split
+    ranges.append((start, total))
+    return ranges
+
+def iter_transcription(audio_file_path: str, backend: Optional[TranscriptionBackend] = None, workers: Optional[int] = None,
+                       cancel_token: Optional[CancellationToken] = None, chunk_s: float = LONG_AUDIO_CHUNK_S,
+                       cache: Optional[TranscriptionCache] = transcription_cache) -> Generator[List[TranscriptSegment], None, None]:
+    """
+    Transkribiert eine (lange) Aufnahme abschnittsweise und parallel.
+
+    Die Aufnahme wird mit `find_split_points` an Sprechpausen geteilt und die Abschnitte
+    werden mit bis zu `workers` Threads transkribiert. Die Zeitstempel jedes Abschnitts werden
+    um seinen Beginn verschoben. Sobald der nächste Abschnitt in Aufnahmereihenfolge fertig
+    ist, wird das bisherige Transkript ausgegeben. Liegt die Aufnahme bereits im Cache, wird
+    nur das gespeicherte Transkript ausgegeben.
+
+    Args:
+        audio_file_path (str): Der Pfad zur Audiodatei.
+        backend (Optional[TranscriptionBackend]): Das Backend; ohne Angabe `TRANSCRIPTION_BACKEND`.
+        workers (Optional[int]): Gleichzeitig transkribierte Abschnitte; ohne Angabe
+            `backend.max_workers`.
+        cancel_token (Optional[CancellationToken]): Token, über den die Transkription abgebrochen
+            werden kann. Noch nicht begonnene Abschnitte werden dann verworfen.
+        chunk_s (float): Die Höchstlänge eines Abschnitts in Sekunden.
+        cache (Optional[TranscriptionCache]): Der Transkript-Cache; None schaltet ihn ab.
+
+    Yields:
+        List[TranscriptSegment]: Alle bisher zusammenhängend vorliegenden Segmente mit
+        Zeitstempeln relativ zum Beginn der Aufnahme.
+
+    Raises:
+        GenerationCancelled: Wenn über `cancel_token` abgebrochen wurde.
+    """
+    backend = backend or get_backend()
+    samples = load_pcm(audio_file_path)
+    key = cache.key(samples, backend) if cache else None
+    cached = cache.get(key, len(samples) / WHISPER_SAMPLING_RATE) if cache else None
+    if cached is not None:
+        yield cached
+        return
+    segments: List[TranscriptSegment] = []
+    for segments in _iter_segments(samples, backend, workers, cancel_token, chunk_s):
+        yield segments
+    if cache:
+        cache.put(key, segments)
+
+def _iter_segments(samples: np.ndarray, backend: TranscriptionBackend, workers: Optional[int],
+                   cancel_token: Optional[CancellationToken], chunk_s: float = LONG_AUDIO_CHUNK_S) -> Generator[List[TranscriptSegment], None, None]:
+    ranges = find_split_points(samples, chunk_s=chunk_s)
+    workers = max(1, min(workers or backend.max_workers, len(ranges) or 1))
+    duration = len(samples) / WHISPER_SAMPLING_RATE
+    logger.info(f"Transkribiere {duration:.0f}s Audio in {len(ranges)} Abschnitten mit {workers} Workern")
+
+    def transcribe(index: int) -> List[TranscriptSegment]:
+        begin, end = ranges[index]
+        offset = begin / WHISPER_SAMPLING_RATE
+        return [TranscriptSegment(offset + segment.start, offset + segment.end, segment.text)
+                for segment in backend.transcribe_segments(samples[begin:end])]
+
+    start = time.perf_counter()
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="transcription")
+    unregister = cancel_token.on_cancel(lambda: pool.shutdown(wait=False, cancel_futures=True)) if cancel_token else None
+    try:
+        futures = {pool.submit(transcribe, index): index for index in range(len(ranges))}
+        done: Dict[int, List[TranscriptSegment]] = {}
+        stitched: List[TranscriptSegment] = []
+        next_index = 0
+        for future in as_completed(futures):
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
+            done[futures[future]] = future.result()
+            if next_index not in done:
+                continue
+            while next_index in done:
+                stitched.extend(done.pop(next_index))
+                next_index += 1
+            yield list(stitched)
+    finally:
+        if unregister:
+            unregister()
+        pool.shutdown(wait=False, cancel_futures=True)
+    elapsed = time.perf_counter() - start
+    logger.info(f"{duration:.0f}s Audio in {elapsed:.1f}s transkribiert (RTF {elapsed / max(duration, 1e-9):.3f})")
+
+def transcribe_file(audio_file_path: str, backend: Optional[TranscriptionBackend] = None,
+                    cancel_token: Optional[CancellationToken] = None,
+                    cache: Optional[TranscriptionCache] = transcription_cache) -> str:
+    """
+    Transkribiert eine Aufnahme beliebiger Länge und gibt den vollständigen Text zurück.
+
+    Aufnahmen bis `LONG_AUDIO_CHUNK_S` Sekunden werden in einem Stück an das Backend gegeben,
+    längere über `iter_transcription`. Transkripte werden unter dem Hash des dekodierten
+    Signals im Cache abgelegt.
+
+    Args:
+        audio_file_path (str): Der Pfad zur Audiodatei.
+        backend (Optional[TranscriptionBackend]): Das Backend; ohne Angabe `TRANSCRIPTION_BACKEND`.
+        cancel_token (Optional[CancellationToken]): Token, über den abgebrochen werden kann.
+        cache (Optional[TranscriptionCache]): Der Transkript-Cache; None schaltet ihn ab.
+
+    Returns:
+        str: Der erkannte Text.
+    """
+    backend = backend or get_backend()
+    samples = load_pcm(audio_file_path)
+    duration = len(samples) / WHISPER_SAMPLING_RATE
+    key = cache.key(samples, backend) if cache else None
+    segments = cache.get(key, duration) if cache else None
+    if segments is not None:
+        return format_transcript(segments)
+
+    if duration <= LONG_AUDIO_CHUNK_S:
+        # Kurze Aufnahmen gehen unverändert an das Backend, z.B. ohne Umkodierung an die API.
+        text = backend.transcribe(audio_file_path)
+        segments = [TranscriptSegment(0.0, duration, text)] if text else []
+    else:
+        for segments in _iter_segments(samples, backend, None, cancel_token):
+            pass
+    if cache:
+        cache.put(key, segments or [])
+    return format_transcript(segments or [])
+
+def format_transcript(segments: List[TranscriptSegment], timestamps: bool = False) -> str:
+    """
+    Setzt Segmente zu einem Text zusammen.
+
+    Args:
+        segments (List[TranscriptSegment]): Die Segmente.
+        timestamps (bool): Jedes Segment in einer eigenen Zeile mit `[hh:mm:ss]` beginnen.
+
+    Returns:
+        str: Der Text.
+    """
+    if timestamps:
+        return "\n".join(f"[{_format_time(segment.start)}] {segment.text}" for segment in segments if segment.text)
+    return " ".join(segment.text for segment in segments if segment.text)
+
+def _format_time(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
@@ -4,7 +4,9 @@ from typing import List, Tuple, Generator, Optional
 from PIL import Image
 from helpers import encode_image, format_chat_message
 from api_client import api_client
-from config import MISTRAL_CHAT_MODEL, MISTRAL_IMAGE_MODEL, MISTRAL_API_URL, mistral_api_key
+from cancellation import CancellationToken
+from response_cache import response_cache
+from config import MISTRAL_CHAT_MODEL, MISTRAL_IMAGE_MODEL, MISTRAL_API_URL, SEMANTIC_CACHE_ENABLED, mistral_api_key
 from audio_processing import process_audio
 import logging
 
@@ -24,7 +26,7 @@ class MistralFunctions:
         """
         pass
 
-    def chat_with_mistral(self, user_input: str, chat_history: List[Tuple[str, str]], image: Optional[Image.Image] = None, audio_file: Optional[str] = None) -> Tuple[List[Tuple[str, str]], str]:
+    def chat_with_mistral(self, user_input: str, chat_history: List[Tuple[str, str]], image: Optional[Image.Image] = None, audio_file: Optional[str] = None, cancel_token: Optional[CancellationToken] = None) -> Tuple[List[Tuple[str, str]], str]:
         """
         Chattet mit dem Mistral-Modell.
 
@@ -33,6 +35,8 @@ class MistralFunctions:
             chat_history (List[Tuple[str, str]]): Der Chatverlauf.
             image (Optional[Image.Image]): Das hochzuladende Bild.
             audio_file (Optional[str]): Der Pfad zur Audiodatei.
+            cancel_token (Optional[CancellationToken]): Token, über den der Stream geschlossen wird.
+                Die bis dahin empfangene Antwort bleibt im Chatverlauf erhalten.
 
         Returns:
             Tuple[List[Tuple[str, str]], str]: Der aktualisierte Chatverlauf und die Antwort.
@@ -63,12 +67,6 @@ class MistralFunctions:
                 return chat_history, ""
 
         try:
-            headers = {
-                "Content-Type": "application/json",
-                "Accept": "application/json",
-                "Authorization": f"Bearer {mistral_api_key}",
-            }
-
             payload = {
                 "model": MISTRAL_CHAT_MODEL,
                 "messages": messages,
@@ -78,11 +76,56 @@ class MistralFunctions:
                 "stream": True
             }
 
-            response = requests.post(MISTRAL_API_URL, headers=headers, json=payload, stream=True)
-            response.raise_for_status()
+            if image is None and SEMANTIC_CACHE_ENABLED:
+                # Mistral erhält nur die aktuelle Nachricht; ohne Bild ist jede Runde eine einfache Frage.
+                params = {key: value for key, value in payload.items() if key not in ("model", "messages", "stream")}
+                chunks = response_cache.cached_stream("mistral", MISTRAL_CHAT_MODEL, user_input, lambda: self._stream_chat(payload, cancel_token),
+                                                      params=params, cache_sampled=True, semantic=True, cancel_token=cancel_token)
+            else:
+                chunks = self._stream_chat(payload, cancel_token)
             full_response = ""
+            for delta_content in chunks:
+                full_response += delta_content
+                chat_history[-1] = (user_input, format_chat_message(full_response))
+
+            if cancel_token is not None and cancel_token.cancelled:
+                chat_history[-1] = (user_input, format_chat_message(full_response + "\n\n*(abgebrochen)*"))
+            elif full_response:
+                chat_history[-1] = (user_input, format_chat_message(full_response))
+            else:
+                chat_history.append((None, "Keine Antwort vom Modell erhalten."))
+
+        except requests.exceptions.RequestException as e:
+            chat_history.append((None, f"Fehler bei der Verarbeitung der Anfrage: {e}"))
+        except Exception as e:
+            chat_history.append((None, f"Unbekannter Fehler: {e}. Bitte versuchen Sie es nochmal."))
+
+        return chat_history, ""
+
+    def _stream_chat(self, payload: dict, cancel_token: Optional[CancellationToken]) -> Generator[str, None, None]:
+        """
+        Sendet eine Chat-Anfrage an die Mistral-API und streamt die Textstücke der Antwort.
+
+        Der Stream wird beim Abbruch über `cancel_token` geschlossen; Antwort und Registrierung
+        werden auch bei einem Fehler oder vorzeitigem Schließen des Generators freigegeben.
 
-            for chunk in response.iter_lines():
+        Args:
+            payload (dict): Die Anfrage mit Modell, Nachrichten und Parametern.
+            cancel_token (Optional[CancellationToken]): Token, über den der Stream geschlossen wird.
+
+        Yields:
+            str: Die Textstücke der Antwort.
+        """
+        headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "Authorization": f"Bearer {mistral_api_key}",
+        }
+        response = requests.post(MISTRAL_API_URL, headers=headers, json=payload, stream=True)
+        unregister = cancel_token.on_cancel(response.close) if cancel_token is not None else None
+        try:
+            response.raise_for_status()
+            for chunk in self._iter_lines(response, cancel_token):
                 if chunk:
                     try:
                         if chunk == b"data: [DONE]":
@@ -93,24 +136,35 @@ class MistralFunctions:
                             if 'choices' in chunk_data and chunk_data['choices']:
                                 delta_content = chunk_data['choices'][0]['delta'].get('content', '')
                                 if delta_content:
-                                    full_response += delta_content
-                                    formatted_response = format_chat_message(full_response)
-                                    chat_history[-1] = (user_input, formatted_response)
+                                    yield delta_content
                     except json.JSONDecodeError as e:
                         logger.error(f"JSON Decode Fehler: {e} - Ungültiger Chunk: {chunk}")
                         continue
+        finally:
+            if unregister is not None:
+                unregister()
+            response.close()
 
-            if full_response:
-                chat_history[-1] = (user_input, format_chat_message(full_response))
-            else:
-                chat_history.append((None, "Keine Antwort vom Modell erhalten."))
+    def _iter_lines(self, response: requests.Response, cancel_token: Optional[CancellationToken]) -> Generator[bytes, None, None]:
+        """
+        Liest die Zeilen eines Server-Sent-Events-Streams, bis er endet oder abgebrochen wird.
 
-        except requests.exceptions.RequestException as e:
-            chat_history.append((None, f"Fehler bei der Verarbeitung der Anfrage: {e}"))
-        except Exception as e:
-            chat_history.append((None, f"Unbekannter Fehler: {e}. Bitte versuchen Sie es nochmal."))
+        Args:
+            response (requests.Response): Die streamende Antwort.
+            cancel_token (Optional[CancellationToken]): Token, über den der Stream geschlossen wird.
 
-        return chat_history, ""
+        Yields:
+            bytes: Die Zeilen des Streams.
+        """
+        try:
+            for line in response.iter_lines():
+                if cancel_token is not None and cancel_token.cancelled:
+                    return
+                yield line
+        except (requests.exceptions.RequestException, AttributeError, OSError, ValueError):
+            # Das Schließen der Antwort aus einem anderen Thread bricht den Lesevorgang ab.
+            if cancel_token is None or not cancel_token.cancelled:
+                raise
 
     def analyze_image_mistral(self, image: Optional[Image.Image], chat_history: List[Tuple[str, str]], user_input: str, prompt: str) -> List[Tuple[str, str]]:
         """
@@ -141,12 +195,7 @@ class MistralFunctions:
                 }
             ]
 
-            chat_response = api_client.mistral_client.chat.complete(
-                model=MISTRAL_IMAGE_MODEL,
-                messages=messages
-            )
-
-            response_text = chat_response.choices[0].message.content
+            response_text = self._complete_image_cached(messages, [image_base64])
             chat_history.append((None, format_chat_message(response_text)))
         except Exception as e:
             chat_history.append((None, f"Unbekannter Fehler bei der Bildanalyse: {e}. Bitte versuchen Sie es nochmal."))
@@ -183,16 +232,37 @@ class MistralFunctions:
                 }
             ]
 
-            chat_response = api_client.mistral_client.chat.complete(
-                model=MISTRAL_IMAGE_MODEL,
-                messages=messages
-            )
-
-            response_text = chat_response.choices[0].message.content
+            response_text = self._complete_image_cached(messages, [image1_base64, image2_base64])
             chat_history.append((None, format_chat_message(response_text)))
         except Exception as e:
             chat_history.append((None, f"Unbekannter Fehler beim Vergleich der Bilder: {e}. Bitte versuchen Sie es nochmal."))
 
         return chat_history
 
+    def _complete_image_cached(self, messages: List[dict], images: List[str]) -> str:
+        """
+        Fragt das Bildmodell über den `response_cache` an.
+
+        Schlüssel sind der Text der Nachricht und die Hashes der Bilder. Das Modell sampelt mit
+        seiner voreingestellten Temperatur; eine frühere Beschreibung desselben Bildes wird
+        trotzdem wiederverwendet.
+
+        Args:
+            messages (List[dict]): Die Nachrichten mit Text und Bildern.
+            images (List[str]): Die Base64-kodierten Bilder.
+
+        Returns:
+            str: Die Antwort des Modells.
+        """
+        prompt = "".join(part["text"] for part in messages[0]["content"] if part["type"] == "text")
+
+        def complete() -> str:
+            chat_response = api_client.mistral_client.chat.complete(
+                model=MISTRAL_IMAGE_MODEL,
+                messages=messages
+            )
+            return chat_response.choices[0].message.content
+
+        return response_cache.cached("mistral", MISTRAL_IMAGE_MODEL, prompt, complete, attachments=images, cache_sampled=True)
+
 mistral_functions = MistralFunctions()
\ No newline at end of file
@@ -1,5 +1,11 @@
-from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor, pipeline
-from config import device, torch_dtype, model_id
+import gc
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+from config import device, torch_dtype, model_id, WHISPER_IDLE_UNLOAD_S, WHISPER_QUANTIZE, WHISPER_CPU_THREADS, WHISPER_QUANTIZED_DIR
 import torch
 import logging
 
@@ -10,42 +16,319 @@ class ModelPipeline:
     """
     Klasse zur Verwaltung der Modell-Pipeline.
 
-    Diese Klasse initialisiert die Modell-Pipeline für die Spracherkennung.
+    Diese Klasse verwaltet die Modell-Pipeline für die Spracherkennung. Das Modell wird erst
+    bei der ersten Nutzung geladen; gleichzeitige erste Anfragen warten auf denselben
+    Ladevorgang. Nach `idle_timeout` Sekunden ohne Nutzung wird das Modell wieder entladen,
+    damit der Arbeitsspeicher den Ollama-Modellen zur Verfügung steht.
+
+    Mit `quantize` werden auf der CPU die Linear-Schichten dynamisch auf int8 quantisiert und
+    die Anzahl der Threads auf `cpu_threads` gesetzt. Die quantisierten Gewichte werden
+    in `WHISPER_QUANTIZED_DIR` gespeichert, sodass die Umwandlung nur beim ersten Laden anfällt.
 
     Attributes:
-        model (AutoModelForSpeechSeq2Seq): Das Modell für die Spracherkennung.
-        processor (AutoProcessor): Der Prozessor für die Spracherkennung.
-        pipe (pipeline): Die Pipeline für die Spracherkennung.
+        model_id (str): Die ID des Modells.
+        device (str): Das Gerät (CPU oder GPU).
+        torch_dtype (torch.dtype): Der Datentyp für die Berechnungen.
+        idle_timeout (float): Sekunden ohne Nutzung bis zum Entladen; 0 entlädt nie.
+        quantize (bool): int8-Quantisierung auf der CPU verwenden.
+        cpu_threads (int): Die Anzahl der Intra-op-Threads im quantisierten Modus.
+        model (Optional[AutoModelForSpeechSeq2Seq]): Das Modell für die Spracherkennung, solange es geladen ist.
+        processor (Optional[AutoProcessor]): Der Prozessor für die Spracherkennung, solange er geladen ist.
     """
 
-    def __init__(self, model_id: str, device: str, torch_dtype: torch.dtype):
+    def __init__(self, model_id: str, device: str, torch_dtype: torch.dtype, idle_timeout: float = WHISPER_IDLE_UNLOAD_S,
+                 quantize: bool = WHISPER_QUANTIZE, cpu_threads: int = WHISPER_CPU_THREADS):
         """
-        Initialisiert die Modell-Pipeline.
+        Initialisiert die Modell-Pipeline, ohne das Modell zu laden.
 
         Args:
             model_id (str): Die ID des Modells.
             device (str): Das Gerät (CPU oder GPU).
             torch_dtype (torch.dtype): Der Datentyp für die Berechnungen.
+            idle_timeout (float): Sekunden ohne Nutzung bis zum Entladen; 0 entlädt nie.
+            quantize (bool): int8-Quantisierung verwenden; wird auf der GPU ignoriert.
+            cpu_threads (int): Die Anzahl der Intra-op-Threads im quantisierten Modus.
+        """
+        self.model_id = model_id
+        self.device = device
+        self.torch_dtype = torch_dtype
+        self.idle_timeout = idle_timeout
+        self.quantize = quantize and device == "cpu"
+        self.cpu_threads = cpu_threads
+        if quantize and not self.quantize:
+            logger.info(f"int8-Quantisierung wird nur auf der CPU verwendet, nicht auf {device}")
+        self.model = None
+        self.processor = None
+        self._pipe = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._in_use = 0
+        self._last_used = 0.0
+        self._timer: Optional[threading.Timer] = None
+        self._loads = 0
+        self._unloads = 0
+        self._load_seconds = 0.0
+        self._model_bytes = 0
+
+    @property
+    def loaded(self) -> bool:
+        """
+        Gibt an, ob das Modell geladen ist.
+        """
+        return self._pipe is not None
+
+    @property
+    def pipe(self) -> Any:
+        """
+        Gibt die Pipeline für die Spracherkennung zurück und lädt das Modell bei Bedarf.
+
+        Während einer längeren Nutzung sollte `use` verwendet werden, damit das Modell nicht
+        währenddessen entladen wird.
+        """
+        with self.use() as pipe:
+            return pipe
+
+    @contextmanager
+    def use(self) -> Iterator[Any]:
+        """
+        Kontextmanager für eine Transkription.
+
+        Das Modell wird bei Bedarf geladen und während der Nutzung nicht entladen. Danach
+        beginnt die Leerlaufzeit von vorn.
+
+        Yields:
+            pipeline: Die Pipeline für die Spracherkennung.
 
         Raises:
-            Exception: Wenn die Initialisierung der Modell-Pipeline fehlschlägt.
+            Exception: Wenn das Laden des Modells fehlschlägt.
         """
+        with self._lock:
+            self._in_use += 1
         try:
-            self.model = AutoModelForSpeechSeq2Seq.from_pretrained(
-                model_id, torch_dtype=torch_dtype, low_cpu_mem_usage=True, use_safetensors=True
-            )
-            self.model.to(device)
-            self.processor = AutoProcessor.from_pretrained(model_id)
-            self.pipe = pipeline(
+            yield self._ensure_loaded()
+        finally:
+            with self._lock:
+                self._in_use -= 1
+                self._last_used = time.monotonic()
+                self._schedule_unload(self.idle_timeout)
+
+    def unload(self) -> bool:
+        """
+        Entlädt das Modell, sofern es gerade nicht benutzt wird.
+
+        Returns:
+            bool: True, wenn das Modell entladen wurde.
+        """
+        with self._load_lock:
+            with self._lock:
+                if self._pipe is None or self._in_use:
+                    return False
+                self._pipe = self.model = self.processor = None
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                self._unloads += 1
+            gc.collect()
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        logger.info(f"Whisper-Modell {self.model_id} entladen ({self._model_bytes / 1024 ** 2:.0f} MB freigegeben), {_format_rss()}")
+        return True
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Gibt die Kennzahlen der Pipeline zurück.
+
+        Returns:
+            Dict[str, Any]: Ladezustand, Anzahl der Lade- und Entladevorgänge, gesamte Ladezeit
+            in Sekunden, ob int8 quantisiert wird, Größe des Modells und Arbeitsspeicher des
+            Prozesses in MB (None, wenn er nicht ermittelt werden kann).
+        """
+        with self._lock:
+            return {
+                "loaded": self._pipe is not None,
+                "loads": self._loads,
+                "unloads": self._unloads,
+                "load_seconds": self._load_seconds,
+                "quantized": self.quantize,
+                "model_mb": self._model_bytes / 1024 ** 2 if self._pipe is not None else 0.0,
+                "rss_mb": _resident_memory_mb(),
+            }
+
+    def _ensure_loaded(self) -> Any:
+        pipe = self._pipe
+        if pipe is not None:
+            return pipe
+        # Nur ein Thread lädt; alle anderen warten am Lock und finden danach die fertige Pipeline vor.
+        with self._load_lock:
+            if self._pipe is None:
+                self._load()
+            return self._pipe
+
+    def _load(self) -> None:
+        from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor, pipeline
+
+        rss_before = _resident_memory_mb()
+        start = time.perf_counter()
+        try:
+            if self.quantize:
+                configure_cpu_threads(self.cpu_threads)
+                model, model_bytes = self._load_quantized()
+                dtype = torch.float32
+            else:
+                model = AutoModelForSpeechSeq2Seq.from_pretrained(
+                    self.model_id, torch_dtype=self.torch_dtype, low_cpu_mem_usage=True, use_safetensors=True
+                )
+                model.to(self.device)
+                model_bytes = sum(p.numel() * p.element_size() for p in model.parameters())
+                dtype = self.torch_dtype
+            processor = AutoProcessor.from_pretrained(self.model_id)
+            pipe = pipeline(
                 "automatic-speech-recognition",
-                model=self.model,
-                tokenizer=self.processor.tokenizer,
-                feature_extractor=self.processor.feature_extractor,
-                torch_dtype=torch_dtype,
-                device=device,
+                model=model,
+                tokenizer=processor.tokenizer,
+                feature_extractor=processor.feature_extractor,
+                torch_dtype=dtype,
+                device=self.device,
             )
         except Exception as e:
             logger.error(f"Fehler beim Initialisieren der Modell-Pipeline: {e}")
             raise
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.model, self.processor, self._pipe = model, processor, pipe
+            self._loads += 1
+            self._load_seconds += elapsed
+            self._model_bytes = model_bytes
+        rss_after = _resident_memory_mb()
+        growth = f", +{rss_after - rss_before:.0f} MB" if rss_before is not None and rss_after is not None else ""
+        logger.info(f"Whisper-Modell {self.model_id} in {elapsed:.1f}s geladen ({model_bytes / 1024 ** 2:.0f} MB Gewichte{growth}), {_format_rss()}")
+
+    def _load_quantized(self) -> Tuple[Any, int]:
+        from transformers import AutoConfig, AutoModelForSpeechSeq2Seq, GenerationConfig
+
+        path = quantized_weights_path(self.model_id)
+        if os.path.exists(path):
+            # Nur die Struktur aufbauen und die gespeicherten int8-Gewichte einsetzen.
+            config = AutoConfig.from_pretrained(self.model_id)
+            model = quantize_linear_layers(AutoModelForSpeechSeq2Seq.from_config(config, torch_dtype=torch.float32))
+            model.load_state_dict(torch.load(path, map_location="cpu", weights_only=True))
+            model.generation_config = GenerationConfig.from_pretrained(self.model_id)
+            logger.info(f"Quantisierte Gewichte aus {path} geladen")
+        else:
+            model = AutoModelForSpeechSeq2Seq.from_pretrained(
+                self.model_id, torch_dtype=torch.float32, low_cpu_mem_usage=True, use_safetensors=True
+            )
+            convert_start = time.perf_counter()
+            model = quantize_linear_layers(model)
+            save_quantized_weights(model, path)
+            logger.info(f"Whisper-Modell in {time.perf_counter() - convert_start:.1f}s auf int8 quantisiert und unter {path} gespeichert")
+        model.eval()
+        return model, os.path.getsize(path)
+
+    def _schedule_unload(self, delay: float) -> None:
+        # Aufruf unter self._lock.
+        if not self.idle_timeout or self._pipe is None or self._timer is not None:
+            return
+        self._timer = threading.Timer(delay, self._unload_if_idle)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _unload_if_idle(self) -> None:
+        with self._lock:
+            self._timer = None
+            idle = time.monotonic() - self._last_used
+            if self._in_use or idle < self.idle_timeout:
+                # Seit dem Start des Timers wurde das Modell benutzt: Restzeit erneut abwarten.
+                self._schedule_unload(self.idle_timeout - idle if not self._in_use else self.idle_timeout)
+                return
+        logger.debug(f"Whisper-Modell seit {idle:.0f}s nicht benutzt")
+        self.unload()
+
+def quantize_linear_layers(model: torch.nn.Module) -> torch.nn.Module:
+    """
+    Quantisiert alle Linear-Schichten eines Modells dynamisch auf int8.
+
+    Gewichte werden einmalig quantisiert, Aktivierungen bei jedem Aufruf. Auf der CPU sind die
+    int8-Matrixmultiplikationen deutlich schneller als float32 und der Speicherbedarf der
+    Linear-Schichten sinkt auf etwa ein Viertel.
+
+    Args:
+        model (torch.nn.Module): Das Modell in float32.
+
+    Returns:
+        torch.nn.Module: Das quantisierte Modell.
+    """
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def quantized_weights_path(model_id: str) -> str:
+    """
+    Gibt den Speicherort der quantisierten Gewichte eines Modells zurück.
+
+    Die torch-Version ist Teil des Namens, weil sich das Format der gepackten Gewichte zwischen
+    Versionen ändern kann.
+
+    Args:
+        model_id (str): Die ID des Modells.
+
+    Returns:
+        str: Der Dateipfad.
+    """
+    return os.path.join(WHISPER_QUANTIZED_DIR, f"{model_id.replace('/', '--')}-int8-torch{torch.__version__}.pt")
+
+def save_quantized_weights(model: torch.nn.Module, path: str) -> None:
+    """
+    Speichert die Gewichte eines quantisierten Modells atomar.
+
+    Args:
+        model (torch.nn.Module): Das quantisierte Modell.
+        path (str): Der Dateipfad.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            torch.save(model.state_dict(), f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def configure_cpu_threads(threads: int) -> None:
+    """
+    Setzt die Anzahl der Threads für Berechnungen auf der CPU.
+
+    Innerhalb einer Operation wird mit `threads` Threads gerechnet; zwischen Operationen nur
+    mit einem, weil der `ASRBatcher` bereits bündelt. Die Inter-op-Anzahl lässt sich nur vor
+    der ersten parallelen Berechnung ändern und bleibt sonst unverändert.
+
+    Args:
+        threads (int): Die Anzahl der Intra-op-Threads.
+    """
+    torch.set_num_threads(max(1, threads))
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+    logger.debug(f"CPU-Threads für Whisper: {torch.get_num_threads()} intra-op, {torch.get_num_interop_threads()} inter-op")
+
+def _resident_memory_mb() -> Optional[float]:
+    """
+    Gibt den Arbeitsspeicher des Prozesses in MB zurück, sofern er ermittelt werden kann.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024 ** 2
+    except ImportError:
+        return None
+
+def _format_rss() -> str:
+    rss = _resident_memory_mb()
+    return f"Prozess-RSS {rss:.0f} MB" if rss is not None else "Prozess-RSS unbekannt"
 
-model_pipeline = ModelPipeline(model_id, device, torch_dtype)
\ No newline at end of file
+model_pipeline = ModelPipeline(model_id, device, torch_dtype)
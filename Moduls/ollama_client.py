@@ -0,0 +1,270 @@
+import json
+from typing import Any, Dict, Generator, Iterator, List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from cancellation import CancellationToken, GenerationCancelled
+from config import OLLAMA_HOST, OLLAMA_CONNECT_TIMEOUT, OLLAMA_READ_TIMEOUT, OLLAMA_POOL_SIZE, OLLAMA_KEEP_ALIVE
+import logging
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+class OllamaError(Exception):
+    """
+    Fehler, den der Ollama-Daemon im Stream oder als HTTP-Status meldet.
+    """
+
+class OllamaClient:
+    """
+    Klasse zur Kommunikation mit dem lokalen Ollama-Daemon über dessen HTTP-API.
+
+    Alle Anfragen laufen über eine gemeinsame `requests.Session` mit einem Pool aus
+    Keep-Alive-Verbindungen. Die Antworten von `/api/chat` und `/api/generate` werden als
+    NDJSON-Stream gelesen, sodass jedes Token weitergegeben wird, sobald es eintrifft.
+
+    Attributes:
+        host (str): Die Basis-URL des Daemons, z.B. `http://localhost:11434`.
+        session (requests.Session): Die Session mit dem Verbindungspool.
+    """
+
+    def __init__(self, host: str = OLLAMA_HOST, connect_timeout: float = OLLAMA_CONNECT_TIMEOUT,
+                 read_timeout: float = OLLAMA_READ_TIMEOUT, pool_size: int = OLLAMA_POOL_SIZE,
+                 keep_alive: Optional[str] = OLLAMA_KEEP_ALIVE):
+        """
+        Initialisiert den OllamaClient.
+
+        Args:
+            host (str): Die Basis-URL des Daemons.
+            connect_timeout (float): Timeout für den Verbindungsaufbau in Sekunden.
+            read_timeout (float): Maximale Wartezeit zwischen zwei Stream-Zeilen in Sekunden.
+            pool_size (int): Anzahl der Verbindungen, die im Pool offen gehalten werden.
+            keep_alive (Optional[str]): Standardwert für `keep_alive` bei Chat- und Generate-Anfragen.
+        """
+        self.host = host.rstrip("/")
+        self.keep_alive = keep_alive
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _url(self, path: str) -> str:
+        return f"{self.host}{path}"
+
+    def is_available(self) -> bool:
+        """
+        Prüft, ob der Daemon erreichbar ist.
+
+        Returns:
+            bool: True, wenn `/api/version` erfolgreich beantwortet wurde.
+        """
+        try:
+            response = self.session.get(self._url("/api/version"), timeout=self.timeout[0])
+            return response.ok
+        except requests.exceptions.RequestException:
+            return False
+
+    def get_json(self, path: str) -> Dict[str, Any]:
+        """
+        Führt eine GET-Anfrage aus und gibt die JSON-Antwort zurück.
+
+        Args:
+            path (str): Der API-Pfad, z.B. `/api/tags`.
+
+        Returns:
+            Dict[str, Any]: Die dekodierte Antwort.
+        """
+        response = self.session.get(self._url(path), timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def post_json(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Führt eine nicht-streamende POST-Anfrage aus und gibt die JSON-Antwort zurück.
+
+        Args:
+            path (str): Der API-Pfad.
+            payload (Dict[str, Any]): Der Anfrage-Body.
+
+        Returns:
+            Dict[str, Any]: Die dekodierte Antwort.
+        """
+        payload = dict(payload, stream=False)
+        response = self.session.post(self._url(path), json=payload, timeout=self.timeout)
+        if not response.ok:
+            raise OllamaError(f"Ollama antwortete mit HTTP {response.status_code}: {response.text}")
+        return response.json()
+
+    def stream(self, path: str, payload: Dict[str, Any], cancel_token: Optional[CancellationToken] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Sendet eine streamende POST-Anfrage und liefert jedes NDJSON-Ereignis einzeln.
+
+        Wird der Stream vollständig gelesen, geht die Verbindung zurück in den Pool. Bei einem Fehler,
+        beim vorzeitigen Schließen des Generators oder bei einem Abbruch über `cancel_token` wird sie
+        geschlossen; der Daemon beendet die Generierung dann ebenfalls.
+
+        Args:
+            path (str): Der API-Pfad, z.B. `/api/chat`.
+            payload (Dict[str, Any]): Der Anfrage-Body.
+            cancel_token (Optional[CancellationToken]): Token, über den der Stream abgebrochen wird.
+
+        Yields:
+            Dict[str, Any]: Ein dekodiertes Stream-Ereignis.
+
+        Raises:
+            OllamaError: Wenn der Daemon einen Fehler meldet.
+            GenerationCancelled: Wenn über `cancel_token` abgebrochen wurde.
+            requests.exceptions.ConnectionError: Wenn der Daemon nicht erreichbar ist.
+        """
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        payload = dict(payload, stream=True)
+        response = self.session.post(self._url(path), json=payload, stream=True, timeout=self.timeout)
+        unregister = cancel_token.on_cancel(response.close) if cancel_token is not None else None
+        try:
+            if not response.ok:
+                raise OllamaError(f"Ollama antwortete mit HTTP {response.status_code}: {response.text}")
+            try:
+                for line in response.iter_lines(chunk_size=None):
+                    if not line:
+                        continue
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        logger.error(f"JSON Decode Fehler: {e} - Ungültige Zeile: {line!r}")
+                        continue
+                    if "error" in event:
+                        raise OllamaError(event["error"])
+                    yield event
+            except (requests.exceptions.RequestException, AttributeError, OSError, ValueError):
+                # Das Schließen der Antwort aus einem anderen Thread bricht den Lesevorgang ab.
+                if cancel_token is None or not cancel_token.cancelled:
+                    raise
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+        finally:
+            if unregister is not None:
+                unregister()
+            response.close()
+
+    def iter_chat(self, model: str, messages: List[Dict[str, Any]], options: Optional[Dict[str, Any]] = None,
+                  keep_alive: Optional[str] = None, cancel_token: Optional[CancellationToken] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Streamt die Ereignisse einer Chat-Anfrage an `/api/chat`.
+
+        Args:
+            model (str): Das Modell.
+            messages (List[Dict[str, Any]]): Der Nachrichtenverlauf im Ollama-Format.
+            options (Optional[Dict[str, Any]]): Generierungsoptionen (z.B. `temperature`, `num_ctx`).
+            keep_alive (Optional[str]): Wie lange das Modell nach der Anfrage geladen bleibt.
+                Ohne Angabe gilt `self.keep_alive`.
+            cancel_token (Optional[CancellationToken]): Token, über den der Stream abgebrochen wird.
+
+        Yields:
+            Dict[str, Any]: Die Stream-Ereignisse inklusive des abschließenden `done`-Ereignisses.
+        """
+        payload: Dict[str, Any] = {"model": model, "messages": messages}
+        if options:
+            payload["options"] = options
+        if keep_alive is None:
+            keep_alive = self.keep_alive
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        return self.stream("/api/chat", payload, cancel_token)
+
+    def iter_generate(self, model: str, prompt: str, options: Optional[Dict[str, Any]] = None,
+                      keep_alive: Optional[str] = None, cancel_token: Optional[CancellationToken] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Streamt die Ereignisse einer Anfrage an `/api/generate`.
+
+        Args:
+            model (str): Das Modell.
+            prompt (str): Der Prompt.
+            options (Optional[Dict[str, Any]]): Generierungsoptionen.
+            keep_alive (Optional[str]): Wie lange das Modell nach der Anfrage geladen bleibt.
+                Ohne Angabe gilt `self.keep_alive`.
+            cancel_token (Optional[CancellationToken]): Token, über den der Stream abgebrochen wird.
+
+        Yields:
+            Dict[str, Any]: Die Stream-Ereignisse inklusive des abschließenden `done`-Ereignisses.
+        """
+        payload: Dict[str, Any] = {"model": model, "prompt": prompt}
+        if options:
+            payload["options"] = options
+        if keep_alive is None:
+            keep_alive = self.keep_alive
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        return self.stream("/api/generate", payload, cancel_token)
+
+    def chat_stream(self, model: str, messages: List[Dict[str, Any]], options: Optional[Dict[str, Any]] = None) -> Generator[str, None, None]:
+        """
+        Streamt nur die Textinhalte einer Chat-Antwort.
+
+        Args:
+            model (str): Das Modell.
+            messages (List[Dict[str, Any]]): Der Nachrichtenverlauf.
+            options (Optional[Dict[str, Any]]): Generierungsoptionen.
+
+        Yields:
+            str: Die Token in der Reihenfolge ihres Eintreffens.
+        """
+        for event in self.iter_chat(model, messages, options):
+            content = event.get("message", {}).get("content", "")
+            if content:
+                yield content
+
+    def generate_stream(self, model: str, prompt: str, options: Optional[Dict[str, Any]] = None) -> Generator[str, None, None]:
+        """
+        Streamt nur die Textinhalte einer Generate-Antwort.
+
+        Args:
+            model (str): Das Modell.
+            prompt (str): Der Prompt.
+            options (Optional[Dict[str, Any]]): Generierungsoptionen.
+
+        Yields:
+            str: Die Token in der Reihenfolge ihres Eintreffens.
+        """
+        for event in self.iter_generate(model, prompt, options):
+            content = event.get("response", "")
+            if content:
+                yield content
+
+    def generate(self, model: str, prompt: str, options: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Generiert eine vollständige Antwort.
+
+        Args:
+            model (str): Das Modell.
+            prompt (str): Der Prompt.
+            options (Optional[Dict[str, Any]]): Generierungsoptionen.
+
+        Returns:
+            str: Die zusammengesetzte Antwort.
+        """
+        return "".join(self.generate_stream(model, prompt, options))
+
+    def embed(self, model: str, texts: List[str]) -> List[List[float]]:
+        """
+        Berechnet die Embeddings von Texten über `/api/embed`.
+
+        Args:
+            model (str): Das Embedding-Modell, z.B. `nomic-embed-text`.
+            texts (List[str]): Die Texte.
+
+        Returns:
+            List[List[float]]: Ein Vektor pro Text.
+        """
+        payload: Dict[str, Any] = {"model": model, "input": texts}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return self.post_json("/api/embed", payload)["embeddings"]
+
+    def close(self) -> None:
+        """
+        Schließt alle Verbindungen im Pool.
+        """
+        self.session.close()
+
+ollama_client = OllamaClient()
@@ -1,12 +1,23 @@
+import queue
 import subprocess
-import re
-from typing import Generator, Optional, Tuple
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Generator, List, Optional, Tuple
 import gradio as gr
-from PyPDF2 import PdfReader
+import requests
 from helpers import format_chat_message
-from config import OLLAMA_MODELS, DEFAULT_OLLAMA_MODEL, STATUS_MESSAGE_GENERATING, STATUS_MESSAGE_COMPLETE, STATUS_MESSAGE_ERROR
+from config import OLLAMA_MODELS, DEFAULT_OLLAMA_MODEL, OLLAMA_USE_HTTP, OLLAMA_UI_UPDATE_INTERVAL, OLLAMA_FANOUT_MAX_MODELS, OLLAMA_FANOUT_PARALLELISM, OLLAMA_CONTEXT_TOKENS, OLLAMA_CHUNK_RESERVE_TOKENS, OLLAMA_CHUNK_WORKERS, STATUS_MESSAGE_GENERATING, STATUS_MESSAGE_COMPLETE, STATUS_MESSAGE_ERROR, STATUS_MESSAGE_CANCELLED, SEMANTIC_CACHE_ENABLED
+from cancellation import CancellationToken, GenerationCancelled
+from ollama_client import ollama_client
+from ollama_model_manager import ollama_model_manager
+from stream_formatter import StreamingFormatter
+from ansi_stripper import AnsiStripper, strip_ansi
+from diff_engine import diff_engine
+from response_cache import response_cache
+from document_ingestion import document_ingestion
+from document_chunker import estimate_tokens, split_into_chunks, group_by_budget, map_concurrently
 from audio_processing import process_audio
-import difflib
 import logging
 
 logging.basicConfig(level=logging.DEBUG)
@@ -35,12 +46,7 @@ class OllamaFunctions:
         Returns:
             str: Die bereinigte Ausgabe.
         """
-        cleaned_output = re.sub(r'(?:\x1B[@-_]|[\x1B\x9B][0-?]*[ -/]*[@-~])', '', output)
-        cleaned_output = re.sub(r'\?\d+[lh]', '', cleaned_output)
-        cleaned_output = re.sub(r'[\u2800-\u28FF]', '', cleaned_output)
-        cleaned_output = re.sub(r'\r', '', cleaned_output)
-        cleaned_output = re.sub(r'2K1G ?(?:2K1G)*!?', '', cleaned_output)
-        return cleaned_output
+        return strip_ansi(output)
 
     def format_as_codeblock(self, output: str) -> str:
         """
@@ -64,100 +70,276 @@ class OllamaFunctions:
         Returns:
             str: Die formatierte Ausgabe.
         """
-        output = re.sub(r'\s+', ' ', output)
-        output = re.sub(r'(.{80,}?)(\s+|$)', r'\1\n', output)
-        code_blocks = re.findall(r'```(.*?)```', output, re.DOTALL)
-        for block in code_blocks:
-            formatted_block = self.format_as_codeblock(block.strip())
-            output = output.replace(f'```{block}```', formatted_block)
-        return output
+        formatter = StreamingFormatter()
+        return formatter.feed(output) + formatter.finish()
 
-    def run_ollama_live(self, prompt: str, model: str) -> Generator[str, None, None]:
+    def run_ollama_live(self, prompt: str, model: str, cancel_token: Optional[CancellationToken] = None, options: Optional[Dict[str, Any]] = None,
+                        cache: bool = False) -> Generator[str, None, None]:
         """
         Führt Ollama aus und gibt die Ausgabe live zurück.
 
+        Jedes Textstück wird nur einmal vom `StreamingFormatter` verarbeitet. Die gesamte Ausgabe
+        wird höchstens alle `OLLAMA_UI_UPDATE_INTERVAL` Sekunden an die Oberfläche gegeben.
+
         Args:
             prompt (str): Der Prompt für die Ausführung.
             model (str): Das ausgewählte Modell.
+            cancel_token (Optional[CancellationToken]): Token, über den die Generierung abgebrochen wird.
+            options (Optional[Dict[str, Any]]): Generierungsoptionen, siehe `stream_ollama`.
+            cache (bool): Die Antwort über den `response_cache` wiederverwenden, auch für inhaltlich
+                gleiche Prompts; nur für einfache Fragen ohne Dokumente.
 
         Yields:
             str: Die Ausgabe von Ollama.
+
+        Raises:
+            GenerationCancelled: Wenn über `cancel_token` abgebrochen wurde.
         """
         try:
-            process = subprocess.Popen(
-                ["ollama", "run", model],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                encoding='utf-8',
-            )
-            process.stdin.write(prompt + "\n")
-            process.stdin.close()
-
-            buffer = ""
-            for line in iter(process.stdout.readline, ''):
-                clean_line = self.clean_output(line)
-                if clean_line:
-                    buffer += clean_line + "\n"
-                    yield self.format_output(buffer)
-
-            process.stdout.close()
-            process.wait()
-
+            formatter = StreamingFormatter()
+            last_update = 0.0
+            if cache:
+                chunks = response_cache.cached_stream("ollama", model, prompt, lambda: self.stream_ollama(prompt, model, cancel_token=cancel_token, options=options),
+                                                      params=options, cache_sampled=True, semantic=True, cancel_token=cancel_token)
+            else:
+                chunks = self.stream_ollama(prompt, model, cancel_token=cancel_token, options=options)
+            for chunk in chunks:
+                formatter.feed(chunk)
+                now = time.monotonic()
+                if now - last_update >= OLLAMA_UI_UPDATE_INTERVAL:
+                    last_update = now
+                    yield formatter.getvalue()
+            formatter.finish()
+            yield formatter.getvalue()
+
+        except GenerationCancelled:
+            raise
         except Exception as e:
             logger.error(f"Fehler beim Ausführen von Ollama: {e}")
             yield f"**Fehler:** {str(e)}"
 
-    def process_uploaded_file(self, file: gr.File) -> str:
+    def stream_ollama(self, prompt: str, model: str, stats: Optional[Dict[str, Any]] = None, cancel_token: Optional[CancellationToken] = None,
+                      options: Optional[Dict[str, Any]] = None) -> Generator[str, None, None]:
         """
-        Verarbeitet hochgeladene TXT-, PDF-, und andere textbasierte Dateien.
+        Streamt die Antwort von Ollama als unformatierte Textstücke.
+
+        Bevorzugt wird die HTTP-API des Daemons. Der `OllamaModelManager` lädt das Modell bei
+        Bedarf und verdrängt es während der Anfrage nicht. Ist der Daemon nicht erreichbar, bevor das erste
+        Token eingetroffen ist, wird auf `ollama run` zurückgefallen.
 
         Args:
-            file (gr.File): Die hochgeladene Datei.
+            prompt (str): Der Prompt für die Ausführung.
+            model (str): Das ausgewählte Modell.
+            stats (Optional[Dict[str, Any]]): Wird mit den Kennzahlen des abschließenden
+                Stream-Ereignisses gefüllt (z.B. `eval_count`, `eval_duration`), sofern die HTTP-API
+                verwendet wurde.
+            cancel_token (Optional[CancellationToken]): Token, über den die Generierung abgebrochen
+                wird. Ein Abbruch schließt den HTTP-Stream bzw. beendet den `ollama run`-Prozess.
+            options (Optional[Dict[str, Any]]): Generierungsoptionen der HTTP-API (z.B. `num_ctx`);
+                `ollama run` verwendet die Voreinstellungen des Modells.
 
-        Returns:
-            str: Der Inhalt der Datei.
+        Yields:
+            str: Die Textstücke der Antwort.
 
         Raises:
-            ValueError: Wenn das Lesen der Datei fehlschlägt.
+            GenerationCancelled: Wenn über `cancel_token` abgebrochen wurde.
         """
-        if file.name.endswith(".txt"):
-            with open(file.name, 'r', encoding='utf-8') as f:
-                return f.read()
-        elif file.name.endswith(".pdf"):
+        if OLLAMA_USE_HTTP:
+            started = False
             try:
-                reader = PdfReader(file.name)
-                content = ""
-                for page in reader.pages:
-                    content += page.extract_text()
-                return content
-            except Exception as e:
-                logger.error(f"Fehler beim Lesen der PDF-Datei: {e}")
-                raise ValueError(f"Fehler beim Lesen der PDF-Datei: {e}")
-        elif file.name.endswith((".py", ".cpp", ".h", ".c", ".java", ".js", ".cs", ".go", ".html", ".css", ".md", ".json", ".xml", ".yaml", ".sh")):
+                with ollama_model_manager.use(model):
+                    for event in ollama_client.iter_chat(model, [{"role": "user", "content": prompt}], options=options, cancel_token=cancel_token):
+                        content = event.get("message", {}).get("content", "")
+                        if content:
+                            started = True
+                            yield content
+                        if event.get("done") and stats is not None:
+                            stats.update({key: value for key, value in event.items() if key.endswith(("_count", "_duration"))})
+                return
+            except requests.exceptions.ConnectionError as e:
+                if started:
+                    raise
+                logger.warning(f"Ollama-Daemon nicht erreichbar, verwende `ollama run`: {e}")
+        yield from self._run_ollama_cli(prompt, model, cancel_token)
+
+    def fan_out(self, prompt: str, models: List[str], parallelism: int = OLLAMA_FANOUT_PARALLELISM, cancel_token: Optional[CancellationToken] = None) -> Generator[Tuple[str, ...], None, None]:
+        """
+        Sendet denselben Prompt gleichzeitig an mehrere Modelle.
+
+        Höchstens `parallelism` Modelle generieren gleichzeitig. Die Token jedes Modells werden
+        in einen eigenen Ausgabebereich gestreamt. Nach Abschluss werden pro Modell die Zeit bis
+        zum ersten Token und die Token pro Sekunde ausgegeben.
+
+        Args:
+            prompt (str): Der Prompt.
+            models (List[str]): Die Modelle, höchstens `OLLAMA_FANOUT_MAX_MODELS`.
+            parallelism (int): Wie viele Modelle gleichzeitig generieren dürfen.
+            cancel_token (Optional[CancellationToken]): Token, über den alle Modelle abgebrochen werden.
+
+        Yields:
+            Tuple[str, ...]: Je ein Text pro Ausgabebereich (`OLLAMA_FANOUT_MAX_MODELS` Stück),
+            gefolgt von der Kennzahlen-Tabelle.
+        """
+        models = list(models or [])[:OLLAMA_FANOUT_MAX_MODELS]
+        if not prompt.strip() or not models:
+            yield ("",) * OLLAMA_FANOUT_MAX_MODELS + ("Bitte einen Prompt eingeben und mindestens ein Modell auswählen.",)
+            return
+
+        updates: queue.Queue = queue.Queue()
+        stop = threading.Event()
+        unregister = cancel_token.on_cancel(stop.set) if cancel_token is not None else None
+        formatters = [StreamingFormatter() for _ in models]
+        results: List[Dict[str, Any]] = [{"model": model, "status": "wartet"} for model in models]
+
+        def worker(index: int, model: str) -> None:
+            result = results[index]
+            result["status"] = "läuft"
+            stats: Dict[str, Any] = {}
+            chunks = 0
+            start = time.perf_counter()
             try:
-                with open(file.name, 'r', encoding='utf-8') as f:
-                    return f.read()
+                for chunk in self.stream_ollama(prompt, model, stats, cancel_token):
+                    if stop.is_set():
+                        result["status"] = "abgebrochen"
+                        break
+                    if not chunks:
+                        result["ttft"] = time.perf_counter() - start
+                    chunks += 1
+                    updates.put((index, chunk))
+                else:
+                    result["status"] = "fertig"
+            except GenerationCancelled:
+                result["status"] = "abgebrochen"
             except Exception as e:
-                logger.error(f"Fehler beim Lesen der Datei: {e}")
-                raise ValueError(f"Fehler beim Lesen der Datei: {e}")
-        else:
-            raise ValueError("Nur TXT-, PDF- und andere textbasierte Dateien werden unterstützt.")
+                logger.error(f"Fehler beim Fan-out an {model}: {e}")
+                result["status"] = "Fehler"
+                updates.put((index, f"\n\n**Fehler:** {str(e)}"))
+            end = time.perf_counter()
+            result["total"] = end - start
+            if stats.get("eval_count") and stats.get("eval_duration"):
+                result["tokens_per_s"] = stats["eval_count"] / (stats["eval_duration"] / 1e9)
+            elif chunks > 1 and "ttft" in result:
+                result["tokens_per_s"] = (chunks - 1) / max(end - start - result["ttft"], 1e-9)
+            updates.put((index, None))
+
+        def render() -> Tuple[str, ...]:
+            panes = [f"**{model}**\n\n{formatter.getvalue()}" for model, formatter in zip(models, formatters)]
+            panes += [""] * (OLLAMA_FANOUT_MAX_MODELS - len(panes))
+            return tuple(panes) + (self._format_fan_out_stats(results),)
+
+        pool = ThreadPoolExecutor(max_workers=max(1, int(parallelism)), thread_name_prefix="ollama-fanout")
+        try:
+            for index, model in enumerate(models):
+                pool.submit(worker, index, model)
+            pending = len(models)
+            last_update = 0.0
+            while pending:
+                index, chunk = updates.get()
+                if chunk is None:
+                    pending -= 1
+                    formatters[index].finish()
+                else:
+                    formatters[index].feed(chunk)
+                now = time.monotonic()
+                if now - last_update >= OLLAMA_UI_UPDATE_INTERVAL or not pending:
+                    last_update = now
+                    yield render()
+        finally:
+            stop.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+            if unregister is not None:
+                unregister()
+
+    def _format_fan_out_stats(self, results: List[Dict[str, Any]]) -> str:
+        lines = ["| Modell | Status | Erstes Token | Token/s | Gesamt |", "|---|---|---|---|---|"]
+        for result in results:
+            ttft = f"{result['ttft']:.2f} s" if "ttft" in result else "–"
+            rate = f"{result['tokens_per_s']:.1f}" if "tokens_per_s" in result else "–"
+            total = f"{result['total']:.2f} s" if "total" in result else "–"
+            lines.append(f"| {result['model']} | {result['status']} | {ttft} | {rate} | {total} |")
+        return "\n".join(lines)
+
+    def _run_ollama_cli(self, prompt: str, model: str, cancel_token: Optional[CancellationToken] = None) -> Generator[str, None, None]:
+        """
+        Führt `ollama run` als Unterprozess aus und liefert die bereinigte Ausgabe.
 
+        Die Ausgabe wird ungepuffert in Stücken gelesen, sodass Token nicht erst am Zeilenende
+        erscheinen. Escape-Sequenzen, die über zwei Lesevorgänge verteilt sind, entfernt der
+        `AnsiStripper` trotzdem vollständig.
+
+        Args:
+            prompt (str): Der Prompt für die Ausführung.
+            model (str): Das ausgewählte Modell.
+            cancel_token (Optional[CancellationToken]): Token, über den der Prozess beendet wird.
 
+        Yields:
+            str: Die bereinigten Textstücke.
 
-    def compare_documents(self, file1: gr.File, file2: gr.File) -> str:
+        Raises:
+            GenerationCancelled: Wenn über `cancel_token` abgebrochen wurde.
         """
-        Vergleicht zwei hochgeladene Dokumente und gibt die Unterschiede zurück.
+        process = subprocess.Popen(
+            ["ollama", "run", model],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=0,
+        )
+        process.stdin.write((prompt + "\n").encode('utf-8'))
+        process.stdin.close()
+
+        stripper = AnsiStripper()
+        unregister = cancel_token.on_cancel(process.kill) if cancel_token is not None else None
+        try:
+            for raw in iter(lambda: process.stdout.read(4096), b''):
+                clean_chunk = stripper.feed(raw)
+                if clean_chunk:
+                    yield clean_chunk
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            rest = stripper.flush()
+            if rest:
+                yield rest
+        finally:
+            if unregister is not None:
+                unregister()
+            if process.poll() is None:
+                process.kill()
+            process.stdout.close()
+            process.wait()
+
+    def process_uploaded_file(self, file: gr.File) -> str:
+        """
+        Verarbeitet hochgeladene TXT-, PDF-, und andere textbasierte Dateien.
+
+        Der aus PDF-Dateien extrahierte Text wird über die `document_ingestion` anhand des
+        Dateiinhalts zwischengespeichert.
+
+        Args:
+            file (gr.File): Die hochgeladene Datei oder ihr Pfad.
+
+        Returns:
+            str: Der Inhalt der Datei.
+
+        Raises:
+            ValueError: Wenn das Lesen der Datei fehlschlägt.
+        """
+        return document_ingestion.extract_text(file)
+
+    def compare_documents(self, file1: gr.File, file2: gr.File, page: int = 1) -> str:
+        """
+        Vergleicht zwei hochgeladene Dokumente und gibt eine Seite der Unterschiede zurück.
+
+        Der Vergleich wird über die `diff_engine` berechnet und anhand der Dateiinhalte
+        zwischengespeichert, sodass das Blättern zwischen den Seiten keinen neuen Diff erzeugt.
 
         Args:
             file1 (gr.File): Die erste hochgeladene Datei.
             file2 (gr.File): Die zweite hochgeladene Datei.
+            page (int): Die anzuzeigende Seite (beginnend bei 1).
 
         Returns:
-            str: Die Unterschiede zwischen den beiden Dokumenten.
+            str: Eine Zusammenfassung und die angeforderte Seite der Unterschiede.
 
         Raises:
             ValueError: Wenn das Vergleichen der Dokumente fehlschlägt.
@@ -166,16 +348,18 @@ class OllamaFunctions:
             content1 = self.process_uploaded_file(file1)
             content2 = self.process_uploaded_file(file2)
 
-            diff = difflib.unified_diff(
-                content1.splitlines(),
-                content2.splitlines(),
-                fromfile='File1',
-                tofile='File2',
-                lineterm=''
-            )
+            result = diff_engine.diff(content1, content2, fromfile='File1', tofile='File2')
+            if not result.hunks:
+                return "Die Dokumente sind identisch."
 
-            diff_output = '\n'.join(diff)
-            return self.format_as_codeblock(diff_output)
+            pages = result.pages()
+            page = min(max(int(page or 1), 1), len(pages))
+            summary = f"**{len(result.hunks)} Abschnitte, +{result.added} / -{result.removed} Zeilen** – Seite {page} von {len(pages)}"
+            lines = pages[page - 1]
+            if page == 1:
+                lines = result.header + lines
+            diff_output = '\n'.join(lines)
+            return f"{summary}\n\n{self.format_as_codeblock(diff_output)}"
 
         except ValueError as e:
             logger.error(f"Fehler beim Vergleichen der Dokumente: {e}")
@@ -184,7 +368,7 @@ class OllamaFunctions:
             logger.error(f"Unerwarteter Fehler beim Vergleichen der Dokumente: {e}")
             return f"**Unerwarteter Fehler:** {str(e)}"
 
-    def chatbot_interface(self, input_text: str, model: str, file1: Optional[gr.File] = None, file2: Optional[gr.File] = None, audio_file: Optional[gr.File] = None) -> Generator[Tuple[str, str], None, None]:
+    def chatbot_interface(self, input_text: str, model: str, file1: Optional[gr.File] = None, file2: Optional[gr.File] = None, audio_file: Optional[gr.File] = None, cancel_token: Optional[CancellationToken] = None) -> Generator[Tuple[str, str], None, None]:
         """
         Schnittstelle für die Ollama-Chatbot-Funktion.
 
@@ -194,16 +378,19 @@ class OllamaFunctions:
             file1 (Optional[gr.File]): Die erste hochgeladene Datei.
             file2 (Optional[gr.File]): Die zweite hochgeladene Datei.
             audio_file (Optional[gr.File]): Die hochgeladene Audiodatei.
+            cancel_token (Optional[CancellationToken]): Token, über den die Generierung abgebrochen wird.
 
         Yields:
             Tuple[str, str]: Die Ausgabe und der Status.
         """
         yield "", STATUS_MESSAGE_GENERATING
 
+        documents: List[Tuple[str, str]] = []
         if file1 and file2:
             try:
                 content1 = self.process_uploaded_file(file1)
                 content2 = self.process_uploaded_file(file2)
+                documents = [("Dokument 1", content1), ("Dokument 2", content2)]
                 combined_input = f"{input_text}\n\nVergleichen Sie die folgenden beiden Dokumente und antworten Sie immer auf Deutsch:\n\nDokument 1:\n{content1}\n\nDokument 2:\n{content2}"
             except ValueError as e:
                 yield f"**Fehler:** {str(e)}", STATUS_MESSAGE_ERROR
@@ -215,6 +402,7 @@ class OllamaFunctions:
         elif file1 or file2:
             try:
                 content = self.process_uploaded_file(file1 or file2)
+                documents = [("Dokument", content)]
                 combined_input = f"{input_text}\n\nInhalt des Dokuments:\n{content}"
             except ValueError as e:
                 yield f"**Fehler:** {str(e)}", STATUS_MESSAGE_ERROR
@@ -234,11 +422,100 @@ class OllamaFunctions:
         else:
             combined_input = input_text
 
+        # Einfache Fragen ohne Dokumente und Audio werden im FAQ-Betrieb aus dem Antwort-Cache beantwortet.
+        plain = not documents and not audio_file
+        if documents and estimate_tokens(combined_input) > OLLAMA_CONTEXT_TOKENS - OLLAMA_CHUNK_RESERVE_TOKENS:
+            yield from self.map_reduce_documents(input_text, documents, model, cancel_token=cancel_token)
+            return
+
+        chunk = ""
         try:
-            for chunk in self.run_ollama_live(combined_input, model):
+            for chunk in self.run_ollama_live(combined_input, model, cancel_token, cache=plain and SEMANTIC_CACHE_ENABLED):
                 yield chunk, STATUS_MESSAGE_GENERATING
             yield chunk, STATUS_MESSAGE_COMPLETE
+        except GenerationCancelled:
+            yield chunk, STATUS_MESSAGE_CANCELLED
         except Exception as e:
             yield f"**Fehler bei der Kommunikation mit Ollama:** {str(e)}", STATUS_MESSAGE_ERROR
 
+    def map_reduce_documents(self, question: str, documents: List[Tuple[str, str]], model: str, workers: int = OLLAMA_CHUNK_WORKERS, cancel_token: Optional[CancellationToken] = None) -> Generator[Tuple[str, str], None, None]:
+        """
+        Beantwortet eine Frage zu Dokumenten, die nicht in den Kontext des Modells passen.
+
+        Die Dokumente werden in Abschnitte innerhalb des Tokenbudgets zerlegt, die mit höchstens
+        `workers` gleichzeitigen Anfragen einzeln beantwortet werden (Map). Die Teilantworten
+        werden anschließend zu einer Antwort zusammengeführt (Reduce); passen sie selbst nicht in
+        den Kontext, werden sie vorher gruppenweise verdichtet.
+
+        Args:
+            question (str): Die Frage des Benutzers.
+            documents (List[Tuple[str, str]]): Bezeichnung und Inhalt jedes Dokuments.
+            model (str): Das ausgewählte Modell.
+            workers (int): Die Anzahl gleichzeitiger Anfragen.
+            cancel_token (Optional[CancellationToken]): Token, über den alle Anfragen abgebrochen werden.
+
+        Yields:
+            Tuple[str, str]: Die Ausgabe (Fortschritt, Teilantworten, dann die Antwort) und der Status.
+        """
+        budget = OLLAMA_CONTEXT_TOKENS - OLLAMA_CHUNK_RESERVE_TOKENS
+        question = question.strip() or "Fassen Sie den Inhalt zusammen."
+        labels: List[str] = []
+        prompts: List[str] = []
+        for name, content in documents:
+            chunks = split_into_chunks(content, budget)
+            for number, chunk in enumerate(chunks, 1):
+                label = f"{name}, Abschnitt {number}/{len(chunks)}"
+                labels.append(label)
+                prompts.append(f"{question}\n\nDies ist {label} eines längeren Textes. Fassen Sie alle Informationen aus diesem Abschnitt zusammen, die für die Frage relevant sind, und antworten Sie immer auf Deutsch:\n\n{chunk}")
+
+        # Die Abschnitte sind für OLLAMA_CONTEXT_TOKENS bemessen; ohne num_ctx kürzt der Daemon sie auf seinen Standardkontext.
+        options = {"num_ctx": OLLAMA_CONTEXT_TOKENS}
+
+        def complete(prompt: str) -> str:
+            return "".join(self.stream_ollama(prompt, model, cancel_token=cancel_token, options=options)).strip()
+
+        partials: List[Optional[str]] = [None] * len(prompts)
+        output = self._format_map_progress(labels, partials)
+        yield output, STATUS_MESSAGE_GENERATING
+        try:
+            for index, answer in map_concurrently(complete, prompts, workers):
+                partials[index] = answer
+                output = self._format_map_progress(labels, partials)
+                yield output, STATUS_MESSAGE_GENERATING
+
+            texts = [f"{label}:\n{answer}" for label, answer in zip(labels, partials)]
+            while len(texts) > 1 and estimate_tokens("\n\n".join(texts)) > budget:
+                groups = group_by_budget(texts, budget)
+                if len(groups) == len(texts):
+                    break
+                yield self._format_map_progress(labels, partials) + f"\n\n*Verdichte {len(texts)} Teilantworten in {len(groups)} Gruppen...*", STATUS_MESSAGE_GENERATING
+                condense = [f"Fassen Sie die folgenden Teilantworten zur Frage „{question}“ knapp zusammen, ohne relevante Informationen zu verlieren, und antworten Sie immer auf Deutsch:\n\n" + "\n\n".join(group) for group in groups]
+                condensed: List[str] = [""] * len(groups)
+                for index, answer in map_concurrently(complete, condense, workers):
+                    condensed[index] = answer
+                texts = condensed
+
+            if len(documents) > 1:
+                instruction = "Die folgenden Teilantworten stammen aus Abschnitten zweier Dokumente. Vergleichen Sie die Dokumente anhand dieser Teilantworten und antworten Sie immer auf Deutsch:"
+            else:
+                instruction = "Die folgenden Teilantworten stammen aus aufeinanderfolgenden Abschnitten eines Dokuments. Führen Sie sie zu einer vollständigen Antwort zusammen und antworten Sie immer auf Deutsch:"
+            reduce_prompt = f"{question}\n\n{instruction}\n\n" + "\n\n".join(texts)
+            footer = f"\n\n---\n*Zusammengeführt aus {len(prompts)} Abschnitten.*"
+            for output in self.run_ollama_live(reduce_prompt, model, cancel_token, options=options):
+                yield output, STATUS_MESSAGE_GENERATING
+            yield output + footer, STATUS_MESSAGE_COMPLETE
+        except GenerationCancelled:
+            yield output, STATUS_MESSAGE_CANCELLED
+        except Exception as e:
+            logger.error(f"Fehler bei der abschnittsweisen Verarbeitung: {e}")
+            yield f"**Fehler bei der Kommunikation mit Ollama:** {str(e)}", STATUS_MESSAGE_ERROR
+
+    def _format_map_progress(self, labels: List[str], partials: List[Optional[str]]) -> str:
+        done = sum(partial is not None for partial in partials)
+        lines = [f"**Abschnitte verarbeitet: {done} von {len(labels)}**"]
+        for label, partial in zip(labels, partials):
+            if partial is not None:
+                lines.append(f"\n**{label}**\n\n{self.format_output(partial)}")
+        return "\n".join(lines)
+
 ollama_functions = OllamaFunctions()
\ No newline at end of file
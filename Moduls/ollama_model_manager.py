@@ -0,0 +1,245 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+import requests
+from ollama_client import OllamaClient, OllamaError, ollama_client
+from config import OLLAMA_RAM_BUDGET_GB, OLLAMA_KEEP_ALIVE
+import logging
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+STATE_COLD = "nicht geladen"
+STATE_LOADING = "wird geladen"
+STATE_WARM = "geladen"
+
+class OllamaModelManager:
+    """
+    Klasse zur Verwaltung der im Ollama-Daemon geladenen Modelle.
+
+    Der Manager merkt sich, welche Modelle resident sind und wie viel Arbeitsspeicher sie
+    ungefähr belegen. Bevor ein Modell geladen wird, werden die am längsten nicht benutzten
+    Modelle entladen, bis das neue Modell in das RAM-Budget passt. Ladevorgänge laufen pro
+    Modell getrennt: Eine Anfrage an ein bereits geladenes Modell wartet nie auf das Laden
+    eines anderen Modells.
+
+    Attributes:
+        client (OllamaClient): Der Client für die HTTP-API.
+        ram_budget (int): Das RAM-Budget in Bytes.
+        keep_alive (str): Wie lange der Daemon ein Modell nach der letzten Anfrage hält.
+    """
+
+    def __init__(self, client: OllamaClient, ram_budget_gb: float = OLLAMA_RAM_BUDGET_GB, keep_alive: str = OLLAMA_KEEP_ALIVE):
+        """
+        Initialisiert den OllamaModelManager.
+
+        Args:
+            client (OllamaClient): Der Client für die HTTP-API.
+            ram_budget_gb (float): Das RAM-Budget in Gigabyte.
+            keep_alive (str): Wie lange der Daemon ein Modell nach der letzten Anfrage hält.
+        """
+        self.client = client
+        self.ram_budget = int(ram_budget_gb * 1024 ** 3)
+        self.keep_alive = keep_alive
+        self._lock = threading.Lock()
+        self._resident: "OrderedDict[str, int]" = OrderedDict()  # älteste Nutzung zuerst
+        self._loading: Dict[str, threading.Event] = {}
+        self._in_use: Dict[str, int] = {}
+        self._sizes: Dict[str, int] = {}
+        self._load_times: Dict[str, float] = {}
+
+    def refresh(self) -> None:
+        """
+        Gleicht den bekannten Zustand mit `/api/ps` und `/api/tags` des Daemons ab.
+        """
+        try:
+            running = self.client.get_json("/api/ps").get("models", [])
+            tags = self.client.get_json("/api/tags").get("models", [])
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"Ollama-Modellstatus konnte nicht abgefragt werden: {e}")
+            return
+        with self._lock:
+            for tag in tags:
+                self._sizes.setdefault(tag["name"], tag.get("size", 0))
+            loaded = {entry["name"]: entry.get("size", 0) for entry in running}
+            for name in list(self._resident):
+                if name not in loaded and name not in self._loading:
+                    del self._resident[name]
+            for name, size in loaded.items():
+                if name not in self._resident:
+                    self._resident[name] = size
+                    self._resident.move_to_end(name, last=False)
+                else:
+                    self._resident[name] = size
+                self._sizes[name] = size
+
+    def state(self, model: str) -> str:
+        """
+        Gibt den Ladezustand eines Modells zurück.
+
+        Args:
+            model (str): Das Modell.
+
+        Returns:
+            str: `STATE_WARM`, `STATE_LOADING` oder `STATE_COLD`.
+        """
+        with self._lock:
+            if model in self._loading:
+                return STATE_LOADING
+            if model in self._resident:
+                return STATE_WARM
+            return STATE_COLD
+
+    def ensure_loaded(self, model: str) -> None:
+        """
+        Stellt sicher, dass ein Modell geladen ist, und markiert es als zuletzt benutzt.
+
+        Ist das Modell bereits geladen, kehrt die Methode sofort zurück. Lädt ein anderer
+        Thread gerade dasselbe Modell, wird nur auf diesen Ladevorgang gewartet.
+
+        Args:
+            model (str): Das Modell.
+        """
+        with self._lock:
+            if model in self._resident and model not in self._loading:
+                self._resident.move_to_end(model)
+                return
+            event = self._loading.get(model)
+            owner = event is None
+            if owner:
+                event = threading.Event()
+                self._loading[model] = event
+        if not owner:
+            event.wait()
+            return
+        try:
+            self._load(model)
+        finally:
+            with self._lock:
+                del self._loading[model]
+            event.set()
+
+    def preload_async(self, model: str) -> threading.Event:
+        """
+        Lädt ein Modell im Hintergrund vor.
+
+        Args:
+            model (str): Das Modell.
+
+        Returns:
+            threading.Event: Wird gesetzt, sobald das Modell geladen ist oder das Laden fehlschlug.
+        """
+        done = threading.Event()
+
+        def run():
+            try:
+                self.ensure_loaded(model)
+            finally:
+                done.set()
+
+        threading.Thread(target=run, name=f"ollama-preload-{model}", daemon=True).start()
+        return done
+
+    @contextmanager
+    def use(self, model: str) -> Iterator[None]:
+        """
+        Kontextmanager für eine Anfrage an ein Modell.
+
+        Das Modell wird bei Bedarf geladen und während der Anfrage nicht verdrängt.
+
+        Args:
+            model (str): Das Modell.
+        """
+        with self._lock:
+            self._in_use[model] = self._in_use.get(model, 0) + 1
+        try:
+            self.ensure_loaded(model)
+            yield
+        finally:
+            with self._lock:
+                self._in_use[model] -= 1
+                if not self._in_use[model]:
+                    del self._in_use[model]
+                if model in self._resident:
+                    self._resident.move_to_end(model)
+
+    def status(self) -> List[Tuple[str, str, int]]:
+        """
+        Gibt den Zustand aller bekannten Modelle zurück.
+
+        Returns:
+            List[Tuple[str, str, int]]: Tupel aus Modell, Ladezustand und Größe in Bytes,
+            zuletzt benutzte Modelle zuerst.
+        """
+        with self._lock:
+            rows = [(name, STATE_LOADING if name in self._loading else STATE_WARM, size)
+                    for name, size in reversed(self._resident.items())]
+            rows += [(name, STATE_LOADING, self._sizes.get(name, 0))
+                     for name in self._loading if name not in self._resident]
+        return rows
+
+    def status_markdown(self) -> str:
+        """
+        Formatiert den Zustand der Modelle für die Anzeige in der Oberfläche.
+
+        Returns:
+            str: Eine Markdown-Tabelle mit Modell, Zustand und Speicherbedarf.
+        """
+        rows = self.status()
+        used = sum(size for _, state, size in rows if state == STATE_WARM)
+        lines = [
+            f"**Geladene Modelle** ({used / 1024 ** 3:.1f} von {self.ram_budget / 1024 ** 3:.1f} GB)",
+            "",
+            "| Modell | Zustand | Größe |",
+            "|---|---|---|",
+        ]
+        lines += [f"| {name} | {state} | {size / 1024 ** 3:.1f} GB |" for name, state, size in rows]
+        if not rows:
+            lines.append("| – | nicht geladen | – |")
+        return "\n".join(lines)
+
+    def _load(self, model: str) -> None:
+        if not self._sizes:
+            self.refresh()
+        size = self._sizes.get(model, 0)
+        for victim in self._select_victims(model, size):
+            self._unload(victim)
+        start = time.perf_counter()
+        try:
+            self.client.post_json("/api/generate", {"model": model, "keep_alive": self.keep_alive})
+        except (requests.exceptions.RequestException, OllamaError) as e:
+            logger.error(f"Fehler beim Laden des Modells {model}: {e}")
+            return
+        self._load_times[model] = time.perf_counter() - start
+        logger.info(f"Ollama-Modell {model} in {self._load_times[model]:.1f}s geladen ({size / 1024 ** 3:.1f} GB)")
+        self.refresh()
+        with self._lock:
+            self._resident.setdefault(model, size)
+            self._resident.move_to_end(model)
+
+    def _select_victims(self, model: str, size: int) -> List[str]:
+        with self._lock:
+            used = sum(s for name, s in self._resident.items() if name != model)
+            victims = []
+            for name, resident_size in self._resident.items():
+                if used + size <= self.ram_budget:
+                    break
+                if name == model or name in self._in_use or name in self._loading:
+                    continue
+                victims.append(name)
+                used -= resident_size
+            return victims
+
+    def _unload(self, model: str) -> None:
+        try:
+            self.client.post_json("/api/generate", {"model": model, "keep_alive": 0})
+            logger.info(f"Ollama-Modell {model} entladen, um RAM-Budget einzuhalten")
+        except (requests.exceptions.RequestException, OllamaError) as e:
+            logger.error(f"Fehler beim Entladen des Modells {model}: {e}")
+            return
+        with self._lock:
+            self._resident.pop(model, None)
+
+ollama_model_manager = OllamaModelManager(ollama_client)
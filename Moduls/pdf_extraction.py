@@ -0,0 +1,95 @@
+import atexit
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Generator, List, Optional, Tuple
+from PyPDF2 import PdfReader
+from config import PDF_EXTRACT_WORKERS, PDF_EXTRACT_BATCH_PAGES, PDF_PARALLEL_MIN_PAGES
+import logging
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Die Pools werden beim ersten Bedarf gestartet und für alle weiteren Dateien wiederverwendet.
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers)
+            atexit.register(pool.shutdown, wait=False, cancel_futures=True)
+        return pool
+
+# Im Worker-Prozess: zuletzt geöffnete Datei, damit mehrere Bereiche derselben Datei sie nur
+# einmal parsen.
+_worker_reader: Dict[str, PdfReader] = {}
+
+def _extract_range(path: str, start: int, stop: int) -> List[str]:
+    """
+    Extrahiert den Text der Seiten `start` bis `stop` (exklusiv). Läuft im Worker-Prozess.
+    """
+    reader = _worker_reader.get(path)
+    if reader is None:
+        reader = PdfReader(path)
+        _worker_reader.clear()
+        _worker_reader[path] = reader
+    return [reader.pages[index].extract_text() or "" for index in range(start, stop)]
+
+def iter_pdf_pages(path: str, workers: int = PDF_EXTRACT_WORKERS, batch_pages: Optional[int] = None) -> Generator[str, None, None]:
+    """
+    Liefert den Text einer PDF-Datei Seite für Seite in Dokumentreihenfolge.
+
+    Ab `PDF_PARALLEL_MIN_PAGES` Seiten werden Seitenbereiche auf einen Prozess-Pool verteilt.
+    Die Seiten eines Bereichs werden ausgegeben, sobald er und alle vorherigen Bereiche fertig
+    sind, sodass die Weiterverarbeitung beginnen kann, bevor die letzte Seite gelesen wurde.
+    Ohne Angabe von `batch_pages` ist der erste Bereich `PDF_EXTRACT_BATCH_PAGES` Seiten lang,
+    damit die ersten Seiten schnell verfügbar sind; der Rest wird in etwa zwei Bereiche pro
+    Prozess aufgeteilt, weil jeder Bereich die Datei im Worker erneut öffnen kann.
+
+    Args:
+        path (str): Der Pfad zur PDF-Datei.
+        workers (int): Die Anzahl der Worker-Prozesse; 1 liest seriell im aufrufenden Prozess.
+        batch_pages (Optional[int]): Die Anzahl der Seiten pro Auftrag an den Pool.
+
+    Yields:
+        str: Der Text einer Seite (leer, wenn die Seite keinen Text enthält).
+    """
+    reader = PdfReader(path)
+    page_count = len(reader.pages)
+    if workers <= 1 or page_count < PDF_PARALLEL_MIN_PAGES:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+
+    pool = _get_pool(workers)
+    futures: List[Future] = [
+        pool.submit(_extract_range, path, start, stop)
+        for start, stop in _page_ranges(page_count, workers, batch_pages)
+    ]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+def _page_ranges(page_count: int, workers: int, batch_pages: Optional[int]) -> List[Tuple[int, int]]:
+    if batch_pages is not None:
+        return [(start, min(start + batch_pages, page_count)) for start in range(0, page_count, batch_pages)]
+    first = min(PDF_EXTRACT_BATCH_PAGES, page_count)
+    size = max(PDF_EXTRACT_BATCH_PAGES, -(-(page_count - first) // (workers * 2)))
+    return [(0, first)] + [(start, min(start + size, page_count)) for start in range(first, page_count, size)]
+
+def extract_pdf_text(path: str, workers: int = PDF_EXTRACT_WORKERS) -> str:
+    """
+    Extrahiert den gesamten Text einer PDF-Datei.
+
+    Args:
+        path (str): Der Pfad zur PDF-Datei.
+        workers (int): Die Anzahl der Worker-Prozesse.
+
+    Returns:
+        str: Der Text aller Seiten.
+    """
+    return "".join(iter_pdf_pages(path, workers))
@@ -0,0 +1,298 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional, Tuple
+from PIL import Image
+from cancellation import CancellationToken
+from disk_cache import DiskCache
+from helpers import image_hash
+from semantic_cache import SemanticCache, semantic_cache
+from config import RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_DIR, RESPONSE_CACHE_MAX_MB, RESPONSE_CACHE_TTL_S, SEMANTIC_CACHE_ENABLED
+import logging
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normalisiert einen Prompt für den Cache-Schlüssel.
+
+    Zeilenenden werden vereinheitlicht und Leerzeichen am Zeilenende sowie Leerzeilen am Anfang
+    und Ende entfernt. Die Einrückung bleibt erhalten, da sie bei Code die Bedeutung ändert.
+
+    Args:
+        prompt (str): Der Prompt.
+
+    Returns:
+        str: Der normalisierte Prompt.
+    """
+    lines = prompt.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+def attachment_hash(attachment: Any) -> str:
+    """
+    Bildet den Hash eines Anhangs.
+
+    Args:
+        attachment (Any): Ein Bild (`Image.Image`), Bytes oder ein Text.
+
+    Returns:
+        str: Der SHA-256 des Inhalts; bei Bildern der `image_hash`.
+    """
+    if isinstance(attachment, Image.Image):
+        return image_hash(attachment)
+    if isinstance(attachment, str):
+        attachment = attachment.encode("utf-8")
+    return hashlib.sha256(attachment).hexdigest()
+
+def is_deterministic(params: Optional[Dict[str, Any]]) -> bool:
+    """
+    Prüft, ob eine Anfrage bei gleicher Eingabe dieselbe Antwort liefert.
+
+    Eine Anfrage mit `temperature` über 0 ohne festen `seed` wird gesampelt; ihre Antwort wird
+    nicht zwischengespeichert, da ein erneuter Aufruf bewusst eine andere Antwort liefern soll.
+    Fehlt `temperature`, gilt die Voreinstellung des Anbieters, die bei Gemini, Mistral und Ollama
+    ebenfalls sampelt. Ollama-Parameter unter `options` werden ebenfalls geprüft.
+
+    Args:
+        params (Optional[Dict[str, Any]]): Die Generierungsparameter.
+
+    Returns:
+        bool: True, wenn die Antwort zwischengespeichert werden darf.
+    """
+    params = dict(params or {})
+    params.update(params.pop("options", None) or {})
+    return params.get("temperature") == 0 or params.get("seed") is not None
+
+class ResponseCache:
+    """
+    Klasse zum Zwischenspeichern von Modellantworten für alle Anbieter.
+
+    Der Schlüssel besteht aus Anbieter, Modell, normalisiertem Prompt, Generierungsparametern und
+    den Hashes der Anhänge, sodass ein Modellwechsel oder andere Parameter nie eine fremde
+    Antwort liefern. Die Antworten liegen als JSON im `DiskCache` und überstehen damit einen
+    Neustart; der `DiskCache` begrenzt die Größe und entfernt die am längsten nicht benutzten
+    Einträge. Einträge, die älter als `ttl` Sekunden sind, gelten als abgelaufen. Gesampelte
+    Anfragen (siehe `is_deterministic`) werden nur zwischengespeichert, wenn der Aufrufer eine
+    frühere Antwort ausdrücklich wiederverwenden will (`cache_sampled`). Mit einem
+    `SemanticCache` werden Anfragen ohne Anhänge, die keinen exakten Treffer haben, auch mit
+    der Antwort auf einen inhaltlich gleichen Prompt beantwortet, sofern der Aufrufer dies mit
+    `semantic` anfordert. Prompts mit Code oder Dateiinhalten dürfen das nicht, da ein ähnlicher
+    Prompt dort eine andere Antwort braucht. Ohne `DiskCache` ist der Cache
+    abgeschaltet und jede Anfrage wird an das Modell gestellt.
+
+    Attributes:
+        cache (Optional[DiskCache]): Der Speicher der Einträge; None schaltet den Cache ab.
+        ttl (float): Die Lebensdauer eines Eintrags in Sekunden.
+        semantic (Optional[SemanticCache]): Der semantische Cache oder None.
+    """
+
+    def __init__(self, cache: Optional[DiskCache], ttl: float = RESPONSE_CACHE_TTL_S, semantic: Optional[SemanticCache] = None):
+        """
+        Initialisiert den ResponseCache.
+
+        Args:
+            cache (Optional[DiskCache]): Der Speicher der Einträge; None schaltet den Cache ab.
+            ttl (float): Die Lebensdauer eines Eintrags in Sekunden.
+            semantic (Optional[SemanticCache]): Der semantische Cache oder None.
+        """
+        self.cache = cache
+        self.ttl = ttl
+        self.semantic = semantic
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._semantic_hits = 0
+        self._misses = 0
+        self._skipped = 0
+        self._expired = 0
+        self._saved_seconds = 0.0
+
+    @staticmethod
+    def key(provider: str, model: str, prompt: str, params: Optional[Dict[str, Any]] = None, attachments: Iterable[Any] = ()) -> str:
+        """
+        Bildet den Schlüssel einer Anfrage.
+
+        Args:
+            provider (str): Der Anbieter, z.B. "gemini", "mistral" oder "ollama".
+            model (str): Der Modellname.
+            prompt (str): Der Prompt.
+            params (Optional[Dict[str, Any]]): Die Generierungsparameter.
+            attachments (Iterable[Any]): Die Anhänge, z.B. Bilder.
+
+        Returns:
+            str: Der Schlüssel.
+        """
+        request = {
+            "provider": provider,
+            "model": str(model),
+            "prompt": normalize_prompt(prompt),
+            "params": params or {},
+            "attachments": [attachment_hash(attachment) for attachment in attachments],
+        }
+        return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def cached(self, provider: str, model: str, prompt: str, compute: Callable[[], Optional[str]],
+               params: Optional[Dict[str, Any]] = None, attachments: Iterable[Any] = (), cache_sampled: bool = False,
+               semantic: bool = False) -> Optional[str]:
+        """
+        Gibt die zwischengespeicherte Antwort zurück oder erzeugt und speichert sie.
+
+        Löst `compute` eine Ausnahme aus oder liefert None, wird nichts gespeichert.
+
+        Args:
+            provider (str): Der Anbieter.
+            model (str): Der Modellname.
+            prompt (str): Der Prompt.
+            compute (Callable[[], Optional[str]]): Fragt das Modell an und gibt die Antwort zurück.
+            params (Optional[Dict[str, Any]]): Die Generierungsparameter, mit denen `compute` anfragt.
+            attachments (Iterable[Any]): Die Anhänge der Anfrage.
+            cache_sampled (bool): Auch gesampelte Antworten speichern und wiederverwenden, z.B. wenn
+                eine frühere Analyse desselben Codes genügt.
+            semantic (bool): Auch die Antwort auf einen inhaltlich gleichen Prompt zurückgeben; nur
+                für einfache Fragen ohne Code oder Dateiinhalte.
+
+        Returns:
+            Optional[str]: Die Antwort.
+        """
+        cached, store = self._lookup(provider, model, prompt, params, attachments, cache_sampled, semantic)
+        if cached is not None:
+            return cached
+        start = time.perf_counter()
+        response = compute()
+        if store is not None and response is not None:
+            store(response, time.perf_counter() - start)
+        return response
+
+    def cached_stream(self, provider: str, model: str, prompt: str, stream: Callable[[], Iterable[str]],
+                      params: Optional[Dict[str, Any]] = None, cache_sampled: bool = False, semantic: bool = False,
+                      cancel_token: Optional[CancellationToken] = None) -> Generator[str, None, None]:
+        """
+        Wie `cached`, aber für gestreamte Antworten.
+
+        Bei einem Treffer wird die ganze Antwort als ein Textstück geliefert, sonst werden die
+        Textstücke von `stream` weitergegeben und die zusammengesetzte Antwort gespeichert. Bricht
+        der Stream ab, wird er vorzeitig geschlossen oder über `cancel_token` abgebrochen, wird
+        nichts gespeichert.
+
+        Args:
+            provider (str): Der Anbieter.
+            model (str): Der Modellname.
+            prompt (str): Der Prompt.
+            stream (Callable[[], Iterable[str]]): Fragt das Modell an und liefert die Textstücke.
+            params (Optional[Dict[str, Any]]): Die Generierungsparameter, mit denen `stream` anfragt.
+            cache_sampled (bool): Auch gesampelte Antworten speichern und wiederverwenden.
+            semantic (bool): Auch die Antwort auf einen inhaltlich gleichen Prompt zurückgeben.
+            cancel_token (Optional[CancellationToken]): Token der Generierung.
+
+        Yields:
+            str: Die Textstücke der Antwort.
+        """
+        cached, store = self._lookup(provider, model, prompt, params, (), cache_sampled, semantic)
+        if cached is not None:
+            yield cached
+            return
+        start = time.perf_counter()
+        parts: List[str] = []
+        for chunk in stream():
+            parts.append(chunk)
+            yield chunk
+        response = "".join(parts)
+        if store is not None and response and (cancel_token is None or not cancel_token.cancelled):
+            store(response, time.perf_counter() - start)
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Gibt die Kennzahlen des Caches zurück.
+
+        Returns:
+            Dict[str, float]: Exakte und semantische Treffer, Fehlversuche (davon abgelaufen),
+            nicht zwischengespeicherte gesampelte Anfragen, Trefferquote, Größe in Bytes und die
+            eingesparte Antwortzeit der exakten Treffer.
+        """
+        with self._lock:
+            hits, misses = self._hits + self._semantic_hits, self._misses
+            return {
+                "hits": self._hits,
+                "semantic_hits": self._semantic_hits,
+                "misses": misses,
+                "expired": self._expired,
+                "skipped": self._skipped,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "bytes": self.cache.size() if self.cache is not None else 0,
+                "saved_seconds": self._saved_seconds,
+            }
+
+    def status_markdown(self) -> str:
+        """
+        Formatiert die Kennzahlen des Caches für die Anzeige in der Oberfläche.
+
+        Returns:
+            str: Eine Markdown-Tabelle mit den Werten aus `metrics`.
+        """
+        if self.cache is None:
+            return "**Antwort-Cache**\n\nAbgeschaltet (`RESPONSE_CACHE_ENABLED=0`)."
+        metrics = self.metrics()
+        return "\n".join([
+            "**Antwort-Cache**",
+            "",
+            "| Treffer | Semantische Treffer | Fehlversuche | Nicht zwischengespeichert | Trefferquote | Größe | Gesparte Zeit |",
+            "|---|---|---|---|---|---|---|",
+            f"| {metrics['hits']} | {metrics['semantic_hits']} | {metrics['misses']} | {metrics['skipped']} | {metrics['hit_rate']:.0%} "
+            f"| {metrics['bytes'] / 1024 ** 2:.1f} MB | {metrics['saved_seconds']:.1f} s |",
+        ])
+
+    def _lookup(self, provider: str, model: str, prompt: str, params: Optional[Dict[str, Any]], attachments: Iterable[Any],
+                cache_sampled: bool, semantic: bool) -> Tuple[Optional[str], Optional[Callable[[str, float], None]]]:
+        if self.cache is None:
+            return None, None
+        if not cache_sampled and not is_deterministic(params):
+            with self._lock:
+                self._skipped += 1
+            return None, None
+        attachments = list(attachments)
+        key = self.key(provider, model, prompt, params, attachments)
+        entry = self._get(key)
+        if entry is not None:
+            with self._lock:
+                self._hits += 1
+                self._saved_seconds += entry["seconds"]
+            logger.info(f"Antwort von {provider}/{model} aus dem Cache geladen ({entry['seconds']:.1f}s gespart)")
+            return entry["response"], None
+        scope, vector = None, None
+        if semantic and self.semantic is not None and not attachments:
+            scope = self.key(provider, model, "", params)
+            response, vector = self.semantic.lookup(scope, prompt)
+            if response is not None:
+                with self._lock:
+                    self._semantic_hits += 1
+                return response, None
+        with self._lock:
+            self._misses += 1
+
+        def store(response: str, seconds: float) -> None:
+            entry = {"created": time.time(), "seconds": seconds, "response": response}
+            self.cache.put(key, json.dumps(entry).encode("utf-8"))
+            if vector is not None:
+                self.semantic.add(scope, vector, response)
+
+        return None, store
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        data = self.cache.get(key)
+        if data is None:
+            return None
+        try:
+            entry = json.loads(data)
+        except ValueError:
+            self.cache.delete(key)
+            return None
+        if time.time() - entry["created"] > self.ttl:
+            self.cache.delete(key)
+            with self._lock:
+                self._expired += 1
+            return None
+        return entry
+
+response_cache = ResponseCache(DiskCache(RESPONSE_CACHE_DIR, RESPONSE_CACHE_MAX_MB * 1024 * 1024) if RESPONSE_CACHE_ENABLED else None,
+                               semantic=semantic_cache if SEMANTIC_CACHE_ENABLED else None)
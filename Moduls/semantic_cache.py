@@ -0,0 +1,190 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from ollama_client import ollama_client
+from config import SEMANTIC_CACHE_MODEL, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX_ENTRIES
+import logging
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+def _embed_with_ollama(text: str) -> Sequence[float]:
+    return ollama_client.embed(SEMANTIC_CACHE_MODEL, [text])[0]
+
+class VectorIndex:
+    """
+    Klasse für einen Index normierter Vektoren mit exakter Suche nach dem ähnlichsten Eintrag.
+
+    Die Vektoren liegen zeilenweise in einer `float32`-Matrix, sodass eine Suche ein einziges
+    Matrix-Vektor-Produkt ist. Die Matrix wächst durch Verdoppeln; ist `max_entries` erreicht,
+    wird jeweils der älteste Eintrag überschrieben.
+
+    Attributes:
+        max_entries (int): Die maximale Anzahl der Einträge.
+    """
+
+    def __init__(self, dim: int, max_entries: int):
+        """
+        Initialisiert den VectorIndex.
+
+        Args:
+            dim (int): Die Dimension der Vektoren.
+            max_entries (int): Die maximale Anzahl der Einträge.
+        """
+        self.max_entries = max_entries
+        self._vectors = np.empty((min(1024, max_entries), dim), dtype=np.float32)
+        self._values: List[Any] = []
+        self._oldest = 0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def add(self, vector: np.ndarray, value: Any) -> None:
+        """
+        Fügt einen normierten Vektor mit seinem Wert hinzu.
+
+        Args:
+            vector (np.ndarray): Der Vektor mit der Länge 1.
+            value (Any): Der Wert des Eintrags.
+        """
+        if len(self._values) < self.max_entries:
+            slot = len(self._values)
+            if slot == len(self._vectors):
+                grown = np.empty((min(2 * slot, self.max_entries), self._vectors.shape[1]), dtype=np.float32)
+                grown[:slot] = self._vectors
+                self._vectors = grown
+            self._values.append(value)
+        else:
+            slot = self._oldest
+            self._oldest = (slot + 1) % self.max_entries
+            self._values[slot] = value
+        self._vectors[slot] = vector
+
+    def search(self, vector: np.ndarray) -> Tuple[float, Any]:
+        """
+        Sucht den Eintrag mit der größten Kosinus-Ähnlichkeit.
+
+        Args:
+            vector (np.ndarray): Der normierte Suchvektor.
+
+        Returns:
+            Tuple[float, Any]: Die Ähnlichkeit und der Wert, bei leerem Index (-1.0, None).
+        """
+        if not self._values:
+            return -1.0, None
+        scores = self._vectors[:len(self._values)] @ vector
+        index = int(np.argmax(scores))
+        return float(scores[index]), self._values[index]
+
+class SemanticCache:
+    """
+    Klasse zum Zwischenspeichern von Antworten auf inhaltlich gleiche Prompts.
+
+    Jeder Prompt wird mit einem lokalen Embedding-Modell (über Ollama) in einen Vektor umgewandelt.
+    Pro Bereich, d.h. Anbieter, Modell und Generierungsparameter, gibt es einen eigenen
+    `VectorIndex`; liegt die Kosinus-Ähnlichkeit zum ähnlichsten gespeicherten Prompt über
+    `threshold`, wird dessen Antwort zurückgegeben. Der Index liegt nur im Arbeitsspeicher.
+    Ist das Embedding-Modell nicht erreichbar, verhält sich der Cache wie ein Fehlversuch.
+
+    Attributes:
+        embed (Callable[[str], Sequence[float]]): Berechnet das Embedding eines Textes.
+        threshold (float): Die Mindestähnlichkeit für einen Treffer.
+        max_entries (int): Die maximale Anzahl der Einträge pro Bereich.
+    """
+
+    def __init__(self, embed: Callable[[str], Sequence[float]] = _embed_with_ollama,
+                 threshold: float = SEMANTIC_CACHE_THRESHOLD, max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES):
+        """
+        Initialisiert den SemanticCache.
+
+        Args:
+            embed (Callable[[str], Sequence[float]]): Berechnet das Embedding eines Textes.
+            threshold (float): Die Mindestähnlichkeit für einen Treffer.
+            max_entries (int): Die maximale Anzahl der Einträge pro Bereich.
+        """
+        self.embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._indexes: Dict[str, VectorIndex] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._errors = 0
+        self._embed_seconds = 0.0
+        self._search_seconds = 0.0
+
+    def lookup(self, scope: str, prompt: str) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """
+        Sucht die Antwort auf einen inhaltlich gleichen Prompt.
+
+        Args:
+            scope (str): Der Bereich, z.B. aus Anbieter, Modell und Parametern gebildet.
+            prompt (str): Der Prompt.
+
+        Returns:
+            Tuple[Optional[str], Optional[np.ndarray]]: Die Antwort oder None und das Embedding des
+            Prompts für `add` (None, wenn es nicht berechnet werden konnte).
+        """
+        start = time.perf_counter()
+        try:
+            vector = np.asarray(self.embed(prompt), dtype=np.float32)
+        except Exception as e:
+            with self._lock:
+                self._errors += 1
+            logger.warning(f"Embedding für den semantischen Cache fehlgeschlagen: {e}")
+            return None, None
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            return None, None
+        vector /= norm
+        embedded = time.perf_counter()
+        with self._lock:
+            index = self._indexes.get(scope)
+            score, response = index.search(vector) if index is not None else (-1.0, None)
+            hit = score >= self.threshold
+            self._hits += hit
+            self._misses += not hit
+            self._embed_seconds += embedded - start
+            self._search_seconds += time.perf_counter() - embedded
+        if hit:
+            logger.info(f"Semantischer Cache-Treffer (Ähnlichkeit {score:.3f})")
+            return response, vector
+        return None, vector
+
+    def add(self, scope: str, vector: np.ndarray, response: str) -> None:
+        """
+        Speichert eine Antwort unter dem Embedding ihres Prompts.
+
+        Args:
+            scope (str): Der Bereich.
+            vector (np.ndarray): Das normierte Embedding aus `lookup`.
+            response (str): Die Antwort.
+        """
+        with self._lock:
+            index = self._indexes.get(scope)
+            if index is None:
+                index = self._indexes[scope] = VectorIndex(len(vector), self.max_entries)
+            index.add(vector, response)
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Gibt die Kennzahlen des Caches zurück.
+
+        Returns:
+            Dict[str, float]: Treffer, Fehlversuche, fehlgeschlagene Embeddings, Trefferquote,
+            Anzahl der Einträge sowie die mittlere Dauer von Embedding und Suche in Millisekunden.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "errors": self._errors,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "entries": sum(len(index) for index in self._indexes.values()),
+                "mean_embed_ms": self._embed_seconds / lookups * 1000 if lookups else 0.0,
+                "mean_search_ms": self._search_seconds / lookups * 1000 if lookups else 0.0,
+            }
+
+semantic_cache = SemanticCache()
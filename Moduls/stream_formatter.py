@@ -0,0 +1,141 @@
+from typing import List
+import logging
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+FENCE = "```"
+
+class StreamingFormatter:
+    """
+    Klasse zur inkrementellen Formatierung gestreamter Modellantworten.
+
+    Der Formatierer verarbeitet nur die jeweils neu eingetroffenen Zeichen und merkt sich den
+    Zustand zwischen den Aufrufen (Position in der aktuellen Zeile, ausstehende Leerzeichen,
+    angefangene Backtick-Folgen und ob gerade ein Code-Block offen ist). Die Kosten pro Token
+    hängen damit nur von der Länge des Tokens ab, nicht von der bisherigen Antwort.
+
+    Außerhalb von Code-Blöcken werden Leerraumfolgen zu einem Leerzeichen zusammengefasst und
+    Zeilen ab `line_width` Zeichen am nächsten Leerraum umbrochen. Innerhalb von ```-Blöcken
+    wird der Text unverändert übernommen.
+
+    Attributes:
+        line_width (int): Mindestlänge einer Zeile, ab der umbrochen wird.
+        in_code (bool): Ob gerade ein Code-Block offen ist.
+    """
+
+    def __init__(self, line_width: int = 80):
+        """
+        Initialisiert den StreamingFormatter.
+
+        Args:
+            line_width (int): Mindestlänge einer Zeile, ab der umbrochen wird.
+        """
+        self.line_width = line_width
+        self.in_code = False
+        self._line_len = 0
+        self._pending_space = False
+        self._ticks = 0
+        self._last_char = "\n"
+        self._parts: List[str] = []
+
+    def feed(self, chunk: str) -> str:
+        """
+        Verarbeitet ein neues Textstück.
+
+        Args:
+            chunk (str): Das neu eingetroffene Textstück.
+
+        Returns:
+            str: Das Render-Delta, das an die bisherige Ausgabe angehängt werden muss.
+        """
+        out: List[str] = []
+        for char in chunk:
+            if char == "`":
+                self._ticks += 1
+                if self._ticks == 3:
+                    self._ticks = 0
+                    self._toggle_fence(out)
+                continue
+            if self._ticks:
+                self._emit_text("`" * self._ticks, out)
+                self._ticks = 0
+            if self.in_code:
+                out.append(char)
+                self._last_char = char
+            elif char.isspace():
+                self._pending_space = True
+            else:
+                self._emit_text(char, out)
+        delta = "".join(out)
+        if delta:
+            self._parts.append(delta)
+        return delta
+
+    def finish(self) -> str:
+        """
+        Schließt den Stream ab und gibt ausstehende Zeichen aus.
+
+        Offene Code-Blöcke werden geschlossen, eine volle letzte Zeile erhält einen Zeilenumbruch.
+
+        Returns:
+            str: Das abschließende Render-Delta.
+        """
+        out: List[str] = []
+        if self._ticks:
+            self._emit_text("`" * self._ticks, out)
+            self._ticks = 0
+        if self.in_code:
+            self._toggle_fence(out)
+        elif self._line_len >= self.line_width:
+            out.append("\n")
+            self._line_len = 0
+        self._pending_space = False
+        delta = "".join(out)
+        if delta:
+            self._parts.append(delta)
+        return delta
+
+    def getvalue(self) -> str:
+        """
+        Gibt die bisher gerenderte Ausgabe zurück.
+
+        Returns:
+            str: Die Verkettung aller bisherigen Render-Deltas.
+        """
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def _emit_text(self, text: str, out: List[str]) -> None:
+        if self.in_code:
+            out.append(text)
+            self._last_char = text[-1]
+            return
+        if self._pending_space and self._line_len:
+            if self._line_len >= self.line_width:
+                out.append("\n")
+                self._line_len = 0
+            else:
+                out.append(" ")
+                self._line_len += 1
+        self._pending_space = False
+        out.append(text)
+        self._line_len += len(text)
+
+    def _toggle_fence(self, out: List[str]) -> None:
+        if self.in_code:
+            if self._last_char != "\n":
+                out.append("\n")
+            out.append(FENCE + "\n")
+            self.in_code = False
+            self._line_len = 0
+            self._pending_space = False
+        else:
+            if self._line_len:
+                out.append("\n")
+            out.append(FENCE)
+            self.in_code = True
+            self._last_char = "`"
+            self._line_len = 0
+            self._pending_space = False
@@ -0,0 +1,238 @@
+import abc
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+import numpy as np
+from audio_preprocessing import load_pcm, prepare_upload, encode_pcm
+from asr_batcher import ASRBatcher, asr_batcher
+from model_pipeline import model_pipeline
+from config import TRANSCRIPTION_BACKEND, OPENAI_TRANSCRIPTION_MODEL, WHISPER_SAMPLING_RATE, LONG_AUDIO_WORKERS
+import logging
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+class TranscriptSegment(NamedTuple):
+    """
+    Ein erkannter Abschnitt mit Start- und Endzeit in Sekunden.
+    """
+    start: float
+    end: float
+    text: str
+
+class TranscriptionBackend(abc.ABC):
+    """
+    Abstrakte Basisklasse für Backends, die Sprache in Text umwandeln.
+
+    Attributes:
+        name (str): Der Name, unter dem das Backend in `TRANSCRIPTION_BACKEND` gewählt wird.
+        max_workers (int): Wie viele Abschnitte einer langen Aufnahme gleichzeitig transkribiert
+            werden sollen.
+    """
+
+    name = ""
+    max_workers = 1
+
+    @property
+    def cache_id(self) -> str:
+        """
+        Kennung von Backend und Modell für Cache-Schlüssel.
+        """
+        return self.name
+
+    def transcribe(self, audio_file_path: str) -> str:
+        """
+        Transkribiert eine Audiodatei.
+
+        Args:
+            audio_file_path (str): Der Pfad zur Audiodatei.
+
+        Returns:
+            str: Der erkannte Text.
+        """
+        segments = self.transcribe_segments(load_pcm(audio_file_path))
+        return " ".join(segment.text for segment in segments).strip()
+
+    @abc.abstractmethod
+    def transcribe_segments(self, samples: np.ndarray) -> List[TranscriptSegment]:
+        """
+        Transkribiert ein 16-kHz-Mono-Signal mit Zeitstempeln.
+
+        Args:
+            samples (np.ndarray): Die Samples als float32 im Bereich [-1, 1].
+
+        Returns:
+            List[TranscriptSegment]: Die erkannten Abschnitte, Zeiten relativ zum Signalbeginn.
+        """
+
+class OpenAITranscriptionBackend(TranscriptionBackend):
+    """
+    Backend für die gehostete Transkription über die OpenAI-API (`whisper-1`).
+    """
+
+    name = "openai"
+    max_workers = LONG_AUDIO_WORKERS
+
+    def __init__(self, model: str = OPENAI_TRANSCRIPTION_MODEL):
+        """
+        Initialisiert das Backend. Der OpenAI-Client wird erst bei der ersten Anfrage erstellt,
+        damit ohne API-Schlüssel andere Backends nutzbar bleiben.
+
+        Args:
+            model (str): Das Transkriptionsmodell.
+        """
+        self.model = model
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def cache_id(self) -> str:
+        return f"{self.name}:{self.model}"
+
+    def transcribe(self, audio_file_path: str) -> str:
+        return self._create(prepare_upload(audio_file_path)).text or ""
+
+    def transcribe_segments(self, samples: np.ndarray) -> List[TranscriptSegment]:
+        transcription = self._create(encode_pcm(samples), ["segment"])
+        segments = getattr(transcription, "segments", None)
+        if not segments:
+            text = (transcription.text or "").strip()
+            return [TranscriptSegment(0.0, len(samples) / WHISPER_SAMPLING_RATE, text)] if text else []
+        return [TranscriptSegment(segment.start, segment.end, segment.text.strip()) for segment in segments]
+
+    def _create(self, upload, granularities: Optional[List[str]] = None) -> Any:
+        from openai import OpenAI
+
+        with self._client_lock:
+            if self._client is None:
+                self._client = OpenAI()
+        if not granularities:
+            # Ohne Zeitstempel genügt die kleine JSON-Antwort mit dem Text.
+            return self._client.audio.transcriptions.create(file=upload, model=self.model, response_format="json")
+        return self._client.audio.transcriptions.create(
+            file=upload,
+            model=self.model,
+            response_format="verbose_json",
+            timestamp_granularities=granularities
+        )
+
+class LocalWhisperBackend(TranscriptionBackend):
+    """
+    Backend für die Offline-Transkription mit der Whisper-Pipeline aus `ModelPipeline`.
+
+    Die Audiodatei wird in ein 16-kHz-Mono-Signal umgewandelt und über den `ASRBatcher` an die
+    transformers-Pipeline übergeben, der gleichzeitige Aufträge zu einem Batch bündelt.
+    Aufnahmen über 30 Sekunden verarbeitet die Pipeline in Abschnitten von
+    `WHISPER_CHUNK_LENGTH_S` Sekunden. Da das Modell bereits alle Kerne nutzt, werden
+    Abschnitte langer Aufnahmen nacheinander transkribiert.
+    """
+
+    name = "local"
+
+    def __init__(self, batcher: ASRBatcher = asr_batcher, model_id: str = model_pipeline.model_id,
+                 quantized: bool = model_pipeline.quantize):
+        """
+        Initialisiert das Backend.
+
+        Args:
+            batcher (ASRBatcher): Der Batcher vor der ASR-Pipeline. Das Modell wird erst mit dem
+                ersten Batch geladen.
+            model_id (str): Die ID des Modells der Pipeline.
+            quantized (bool): Ob die Pipeline int8-quantisiert ist; int8-Transkripte werden
+                getrennt zwischengespeichert.
+        """
+        self.batcher = batcher
+        self.model_id = model_id
+        self.quantized = quantized
+
+    @property
+    def cache_id(self) -> str:
+        return f"{self.name}:{self.model_id}" + ("-int8" if self.quantized else "")
+
+    def transcribe_segments(self, samples: np.ndarray) -> List[TranscriptSegment]:
+        duration = len(samples) / WHISPER_SAMPLING_RATE
+        start = time.perf_counter()
+        result = self.batcher.transcribe(samples)
+        elapsed = time.perf_counter() - start
+        logger.info(f"Lokal transkribiert: {duration:.1f}s Audio in {elapsed:.1f}s (RTF {elapsed / max(duration, 1e-9):.2f})")
+        chunks = result.get("chunks")
+        if not chunks:
+            text = result["text"].strip()
+            return [TranscriptSegment(0.0, duration, text)] if text else []
+        segments = []
+        for chunk in chunks:
+            begin, end = chunk["timestamp"]
+            segments.append(TranscriptSegment(begin or 0.0, end if end is not None else duration, chunk["text"].strip()))
+        return segments
+
+class AutoTranscriptionBackend(TranscriptionBackend):
+    """
+    Backend, das die OpenAI-API verwendet und ohne Netzwerk oder API-Schlüssel auf die lokale
+    Pipeline ausweicht.
+    """
+
+    name = "auto"
+
+    def __init__(self, remote: Optional[TranscriptionBackend] = None, local: Optional[TranscriptionBackend] = None):
+        """
+        Initialisiert das Backend.
+
+        Args:
+            remote (Optional[TranscriptionBackend]): Das bevorzugte Backend.
+            local (Optional[TranscriptionBackend]): Das Ausweich-Backend.
+        """
+        self.remote = remote or OpenAITranscriptionBackend()
+        self.local = local or LocalWhisperBackend()
+        self.max_workers = self.remote.max_workers
+
+    @property
+    def cache_id(self) -> str:
+        return f"{self.name}:{self.remote.cache_id}|{self.local.cache_id}"
+
+    def transcribe(self, audio_file_path: str) -> str:
+        return self._with_fallback(lambda backend: backend.transcribe(audio_file_path))
+
+    def transcribe_segments(self, samples: np.ndarray) -> List[TranscriptSegment]:
+        return self._with_fallback(lambda backend: backend.transcribe_segments(samples))
+
+    def _with_fallback(self, call: Callable[[TranscriptionBackend], Any]) -> Any:
+        import openai
+
+        try:
+            return call(self.remote)
+        except openai.OpenAIError as e:
+            # Fehlerantworten der API (außer ungültigem Schlüssel) werden nicht verdeckt.
+            if isinstance(e, openai.APIStatusError) and not isinstance(e, openai.AuthenticationError):
+                raise
+            logger.warning(f"OpenAI-Transkription nicht verfügbar, verwende lokales Modell: {e}")
+            return call(self.local)
+
+TRANSCRIPTION_BACKENDS: Dict[str, Callable[[], TranscriptionBackend]] = {
+    OpenAITranscriptionBackend.name: OpenAITranscriptionBackend,
+    LocalWhisperBackend.name: LocalWhisperBackend,
+    AutoTranscriptionBackend.name: AutoTranscriptionBackend,
+}
+
+_backends: Dict[str, TranscriptionBackend] = {}
+_backends_lock = threading.Lock()
+
+def get_backend(name: Optional[str] = None) -> TranscriptionBackend:
+    """
+    Gibt das Transkriptions-Backend mit dem angegebenen Namen zurück.
+
+    Args:
+        name (Optional[str]): `openai`, `local` oder `auto`; ohne Angabe `TRANSCRIPTION_BACKEND`.
+
+    Returns:
+        TranscriptionBackend: Das (wiederverwendete) Backend.
+
+    Raises:
+        ValueError: Wenn der Name unbekannt ist.
+    """
+    name = name or TRANSCRIPTION_BACKEND
+    if name not in TRANSCRIPTION_BACKENDS:
+        raise ValueError(f"Unbekanntes Transkriptions-Backend: {name} (erlaubt: {', '.join(TRANSCRIPTION_BACKENDS)})")
+    with _backends_lock:
+        if name not in _backends:
+            _backends[name] = TRANSCRIPTION_BACKENDS[name]()
+        return _backends[name]
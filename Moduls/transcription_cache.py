@@ -0,0 +1,101 @@
+import hashlib
+import json
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+from disk_cache import DiskCache
+from transcription import TranscriptionBackend, TranscriptSegment
+from config import TRANSCRIPTION_CACHE_DIR, TRANSCRIPTION_CACHE_MAX_MB
+import logging
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+class TranscriptionCache:
+    """
+    Klasse zum Zwischenspeichern von Transkripten.
+
+    Der Schlüssel ist der SHA-256 des dekodierten 16-kHz-Mono-Signals zusammen mit Backend und
+    Modell. Dieselbe Aufnahme trifft den Cache daher auch unter anderem Dateinamen oder in
+    einem anderen verlustfreien Container (z.B. WAV und FLAC). Die Segmente werden als JSON im
+    `DiskCache` abgelegt.
+
+    Attributes:
+        cache (DiskCache): Der Speicher der Einträge.
+    """
+
+    def __init__(self, cache: DiskCache):
+        """
+        Initialisiert den TranscriptionCache.
+
+        Args:
+            cache (DiskCache): Der Speicher der Einträge.
+        """
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._saved_seconds = 0.0
+
+    @staticmethod
+    def key(samples: np.ndarray, backend: TranscriptionBackend) -> str:
+        """
+        Bildet den Schlüssel einer Aufnahme.
+
+        Args:
+            samples (np.ndarray): Das 16-kHz-Mono-Signal.
+            backend (TranscriptionBackend): Das Backend, das transkribiert.
+
+        Returns:
+            str: Der Schlüssel.
+        """
+        digest = hashlib.sha256(np.ascontiguousarray(samples, dtype=np.float32).tobytes()).hexdigest()
+        return f"{backend.cache_id}:{digest}"
+
+    def get(self, key: str, duration: float = 0.0) -> Optional[List[TranscriptSegment]]:
+        """
+        Liest die Segmente einer Aufnahme.
+
+        Args:
+            key (str): Der Schlüssel aus `key`.
+            duration (float): Die Länge der Aufnahme in Sekunden, für die Kennzahlen.
+
+        Returns:
+            Optional[List[TranscriptSegment]]: Die Segmente oder None.
+        """
+        data = self.cache.get(key)
+        if data is None:
+            return None
+        with self._lock:
+            self._saved_seconds += duration
+        logger.info(f"Transkript aus dem Cache geladen ({duration:.0f}s Audio, Trefferquote {self.metrics()['hit_rate']:.0%})")
+        return [TranscriptSegment(*segment) for segment in json.loads(data)]
+
+    def put(self, key: str, segments: List[TranscriptSegment]) -> None:
+        """
+        Speichert die Segmente einer Aufnahme.
+
+        Args:
+            key (str): Der Schlüssel aus `key`.
+            segments (List[TranscriptSegment]): Die Segmente.
+        """
+        self.cache.put(key, json.dumps([list(segment) for segment in segments]).encode("utf-8"))
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Gibt die Kennzahlen des Caches zurück.
+
+        Returns:
+            Dict[str, float]: Treffer, Fehlversuche, Trefferquote, Größe in Bytes und die Länge
+            der nicht erneut transkribierten Aufnahmen in Sekunden.
+        """
+        hits, misses = self.cache.hits, self.cache.misses
+        with self._lock:
+            saved = self._saved_seconds
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "bytes": self.cache.size(),
+            "saved_audio_seconds": saved,
+        }
+
+transcription_cache = TranscriptionCache(DiskCache(TRANSCRIPTION_CACHE_DIR, TRANSCRIPTION_CACHE_MAX_MB * 1024 * 1024))
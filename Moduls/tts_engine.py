@@ -0,0 +1,504 @@
+import abc
+import io
+import multiprocessing
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from cancellation import CancellationToken
+from config import TTS_ENGINE, TTS_LANGUAGE, TTS_PREFETCH_SENTENCES, TTS_MIN_SENTENCE_CHARS, TTS_PHRASE_CACHE_MAX_MB, TTS_GTTS_SLOW_WPM
+import logging
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+class SpeechClip(NamedTuple):
+    """
+    Synthetisierte Sprache als Audiodaten mit Dateiendung (z.B. `.mp3`).
+    """
+    audio: bytes
+    suffix: str
+
+class TTSEngine(abc.ABC):
+    """
+    Abstrakte Basisklasse für Engines, die Text in Sprache umwandeln.
+
+    Attributes:
+        name (str): Der Name, unter dem die Engine in `TTS_ENGINE` gewählt wird.
+    """
+
+    name = ""
+
+    @abc.abstractmethod
+    def synthesize(self, text: str, language: str, voice: str, speed: int) -> SpeechClip:
+        """
+        Synthetisiert einen Text.
+
+        Args:
+            text (str): Der Text, in der Regel ein Satz.
+            language (str): Der Sprachcode, z.B. `de`.
+            voice (str): Die Stimme; Engines ohne Stimmauswahl ignorieren sie.
+            speed (int): Die Sprechgeschwindigkeit in Wörtern pro Minute.
+
+        Returns:
+            SpeechClip: Die Audiodaten.
+        """
+
+class GTTSEngine(TTSEngine):
+    """
+    Engine über Google Text-to-Speech (gTTS). Benötigt eine Internetverbindung.
+
+    gTTS kennt keine Stimmen und nur eine langsame und eine normale Geschwindigkeit; unter
+    `TTS_GTTS_SLOW_WPM` Wörtern pro Minute wird langsam gesprochen.
+    """
+
+    name = "gtts"
+
+    def synthesize(self, text: str, language: str, voice: str, speed: int) -> SpeechClip:
+        from gtts import gTTS
+
+        buffer = io.BytesIO()
+        gTTS(text, lang=language, slow=speed < TTS_GTTS_SLOW_WPM).write_to_fp(buffer)
+        return SpeechClip(buffer.getvalue(), ".mp3")
+
+class Pyttsx3Engine(TTSEngine):
+    """
+    Offline-Engine über pyttsx3 (SAPI5, NSSpeechSynthesizer oder eSpeak, je nach Betriebssystem).
+
+    Die Sprachausgabe des Betriebssystems wird einmal initialisiert und ist nicht threadsicher,
+    daher synthetisiert immer nur ein Thread gleichzeitig. Ist die konfigurierte Stimme nicht
+    installiert, wird die erste Stimme für die Sprache verwendet.
+    """
+
+    name = "pyttsx3"
+
+    def __init__(self):
+        """
+        Initialisiert die Engine. pyttsx3 wird erst bei der ersten Synthese geladen.
+        """
+        self._engine = None
+        self._voices: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def synthesize(self, text: str, language: str, voice: str, speed: int) -> SpeechClip:
+        with self._lock:
+            engine = self._get_engine()
+            engine.setProperty("rate", speed)
+            voice_id = self._select_voice(engine, voice, language)
+            if voice_id:
+                engine.setProperty("voice", voice_id)
+            fd, path = tempfile.mkstemp(suffix=".wav", prefix="tts_")
+            os.close(fd)
+            try:
+                engine.save_to_file(text, path)
+                engine.runAndWait()
+                with open(path, "rb") as f:
+                    return SpeechClip(f.read(), ".wav")
+            finally:
+                os.remove(path)
+
+    def _get_engine(self):
+        if self._engine is None:
+            import pyttsx3
+
+            self._engine = pyttsx3.init()
+        return self._engine
+
+    def _select_voice(self, engine, voice: str, language: str) -> Optional[str]:
+        key = f"{voice}|{language}"
+        if key not in self._voices:
+            voices = engine.getProperty("voices") or []
+            ids = [v.id for v in voices]
+            matching = [v.id for v in voices if language in v.id.lower() or any(language in str(lang).lower() for lang in v.languages or [])]
+            self._voices[key] = voice if voice in ids else (matching[0] if matching else None)
+        return self._voices[key]
+
+TTS_ENGINES: Dict[str, Callable[[], TTSEngine]] = {
+    GTTSEngine.name: GTTSEngine,
+    Pyttsx3Engine.name: Pyttsx3Engine,
+}
+
+_engines: Dict[str, TTSEngine] = {}
+_engines_lock = threading.Lock()
+
+def get_engine(name: Optional[str] = None) -> TTSEngine:
+    """
+    Gibt die TTS-Engine mit dem angegebenen Namen zurück.
+
+    Args:
+        name (Optional[str]): `gtts` oder `pyttsx3`; ohne Angabe `TTS_ENGINE`.
+
+    Returns:
+        TTSEngine: Die (wiederverwendete) Engine.
+
+    Raises:
+        ValueError: Wenn der Name unbekannt ist.
+    """
+    name = name or TTS_ENGINE
+    if name not in TTS_ENGINES:
+        raise ValueError(f"Unbekannte TTS-Engine: {name} (erlaubt: {', '.join(TTS_ENGINES)})")
+    with _engines_lock:
+        if name not in _engines:
+            _engines[name] = TTS_ENGINES[name]()
+        return _engines[name]
+
+class PhraseCache:
+    """
+    Klasse, die synthetisierte Sätze im Arbeitsspeicher zwischenspeichert.
+
+    Der Schlüssel ist (Engine, Text, Sprache, Stimme, Geschwindigkeit). Wiederkehrende Sätze wie
+    Begrüßungen oder Rückfragen werden so nur einmal synthetisiert. Überschreitet die Summe der
+    Audiodaten `max_bytes`, werden die am längsten nicht benutzten Einträge entfernt.
+
+    Attributes:
+        max_bytes (int): Die größte Gesamtgröße der Audiodaten.
+    """
+
+    def __init__(self, max_bytes: int):
+        """
+        Initialisiert den PhraseCache.
+
+        Args:
+            max_bytes (int): Die größte Gesamtgröße der Audiodaten.
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str, str, str, int], SpeechClip]" = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str, str, str, int]) -> Optional[SpeechClip]:
+        """
+        Liest einen Satz aus dem Cache.
+
+        Args:
+            key (Tuple[str, str, str, str, int]): Engine, Text, Sprache, Stimme und Geschwindigkeit.
+
+        Returns:
+            Optional[SpeechClip]: Die Audiodaten oder None.
+        """
+        with self._lock:
+            clip = self._entries.get(key)
+            if clip is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return clip
+
+    def put(self, key: Tuple[str, str, str, str, int], clip: SpeechClip) -> None:
+        """
+        Speichert einen Satz im Cache.
+
+        Args:
+            key (Tuple[str, str, str, str, int]): Engine, Text, Sprache, Stimme und Geschwindigkeit.
+            clip (SpeechClip): Die Audiodaten.
+        """
+        if len(clip.audio) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous.audio)
+            self._entries[key] = clip
+            self._bytes += len(clip.audio)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.audio)
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Gibt die Kennzahlen des Caches zurück.
+
+        Returns:
+            Dict[str, float]: Treffer, Fehlversuche, Trefferquote, Anzahl der Einträge und Größe in Bytes.
+        """
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+# Ein Punkt nach höchstens zwei Buchstaben oder einer Zahl beendet keinen Satz (z.B., Nr. 3.).
+_ABBREVIATION = re.compile(r"(?:^|[\s.])[^\W\d_]{1,2}\.$|\d\.$")
+
+def split_sentences(text: str, min_chars: int = TTS_MIN_SENTENCE_CHARS) -> List[str]:
+    """
+    Teilt einen Text in Sätze zum Vorlesen.
+
+    Markdown-Zeichen und Aufzählungszeichen werden entfernt, getrennt wird nach Satzzeichen und
+    an Zeilenumbrüchen, aber nicht nach Abkürzungen wie "z.B.". Teile unter `min_chars` Zeichen
+    werden mit dem folgenden Teil verbunden, damit kurze Ausrufe keine eigene Pause erzeugen.
+
+    Args:
+        text (str): Der Text, z.B. eine Chat-Antwort.
+        min_chars (int): Die kleinste Länge eines Satzes.
+
+    Returns:
+        List[str]: Die Sätze in Reihenfolge.
+    """
+    text = re.sub(r"^\s*(?:[-+]|\d+\.)\s+", "", text, flags=re.MULTILINE)
+    text = re.sub(r"[#>|]+", " ", re.sub(r"[*_`]+", "", text))
+    sentences: List[str] = []
+    pending = ""
+    for part in re.split(r"(?<=[.!?…:;])\s+|\s*\n\s*", text):
+        part = " ".join(part.split())
+        if not part:
+            continue
+        pending = f"{pending} {part}" if pending else part
+        if len(pending) >= min_chars and not _ABBREVIATION.search(pending):
+            sentences.append(pending)
+            pending = ""
+    if pending:
+        if sentences and len(pending) < min_chars:
+            sentences[-1] = f"{sentences[-1]} {pending}"
+        else:
+            sentences.append(pending)
+    return sentences
+
+def _playsound(path: str) -> None:
+    from playsound import playsound
+
+    playsound(path)
+
+def _play_files(play: Callable[[str], None], paths: "multiprocessing.Queue", results: "multiprocessing.Queue") -> None:
+    for path in iter(paths.get, None):
+        try:
+            play(path)
+            results.put(None)
+        except Exception as e:
+            results.put(str(e))
+
+class ClipPlayer:
+    """
+    Klasse, die Audiodaten in einem langlebigen Wiedergabeprozess abspielt.
+
+    Der Prozess wird bei der ersten Wiedergabe gestartet und erhält die Dateien über eine
+    Warteschlange, sodass nicht für jeden Satz ein neuer Prozess entsteht. Da `playsound` selbst
+    nicht unterbrochen werden kann, wird der Prozess beim Abbruch beendet und erst bei der
+    nächsten Wiedergabe neu gestartet.
+
+    Attributes:
+        play (Callable[[str], None]): Spielt eine Datei ab; muss für `multiprocessing` auf Modulebene definiert sein.
+    """
+
+    def __init__(self, play: Callable[[str], None] = _playsound):
+        """
+        Initialisiert den ClipPlayer. Der Prozess wird erst bei der ersten Wiedergabe gestartet.
+
+        Args:
+            play (Callable[[str], None]): Spielt eine Datei ab.
+        """
+        self.play = play
+        self._process: Optional[multiprocessing.Process] = None
+        self._paths: Optional[multiprocessing.Queue] = None
+        self._results: Optional[multiprocessing.Queue] = None
+        self._lock = threading.Lock()
+        self._process_lock = threading.Lock()
+        self._starts = 0
+
+    def __call__(self, clip: SpeechClip, cancel_token: CancellationToken) -> None:
+        """
+        Spielt Audiodaten ab und kehrt nach dem Ende der Wiedergabe oder beim Abbruch zurück.
+
+        Args:
+            clip (SpeechClip): Die Audiodaten.
+            cancel_token (CancellationToken): Token, über den die Wiedergabe abgebrochen wird.
+        """
+        if cancel_token.cancelled:
+            return
+        fd, path = tempfile.mkstemp(suffix=clip.suffix, prefix="tts_")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(clip.audio)
+            with self._lock:
+                process, paths, results = self._ensure_started()
+                paths.put(path)
+                unregister = cancel_token.on_cancel(lambda: self._stop(process))
+                try:
+                    error = self._wait(process, results)
+                finally:
+                    unregister()
+            if error:
+                logger.error(f"Fehler bei der Wiedergabe: {error}")
+        finally:
+            os.remove(path)
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Gibt die Kennzahlen des Players zurück.
+
+        Returns:
+            Dict[str, float]: Wie oft der Wiedergabeprozess gestartet wurde.
+        """
+        return {"process_starts": self._starts}
+
+    def close(self) -> None:
+        """
+        Beendet den Wiedergabeprozess.
+        """
+        with self._process_lock:
+            process = self._process
+        if process is not None:
+            self._stop(process)
+
+    def _ensure_started(self) -> Tuple[multiprocessing.Process, "multiprocessing.Queue", "multiprocessing.Queue"]:
+        with self._process_lock:
+            if self._process is None or not self._process.is_alive():
+                # Ein beendeter Prozess kann die Warteschlangen in einem ungültigen Zustand hinterlassen.
+                self._paths, self._results = multiprocessing.Queue(), multiprocessing.Queue()
+                self._process = multiprocessing.Process(target=_play_files, args=(self.play, self._paths, self._results),
+                                                        name="tts-player", daemon=True)
+                self._process.start()
+                self._starts += 1
+            return self._process, self._paths, self._results
+
+    @staticmethod
+    def _wait(process: multiprocessing.Process, results: "multiprocessing.Queue") -> Optional[str]:
+        while True:
+            try:
+                return results.get(timeout=0.1)
+            except queue.Empty:
+                if not process.is_alive():
+                    return None
+
+    def _stop(self, process: multiprocessing.Process) -> None:
+        process.terminate()
+        process.join()
+        with self._process_lock:
+            if self._process is process:
+                self._process = None
+
+clip_player = ClipPlayer()
+
+_DONE = object()
+
+class SpeechPipeline:
+    """
+    Klasse, die Text satzweise synthetisiert und abspielt.
+
+    Ein Hintergrund-Thread synthetisiert die Sätze der Reihe nach und hält bis zu `prefetch`
+    fertige Sätze bereit, während der aufrufende Thread den vorherigen abspielt. Die erste
+    Ausgabe beginnt daher nach der Synthese des ersten Satzes statt nach der des ganzen Textes.
+    Synthetisierte Sätze werden im `PhraseCache` abgelegt.
+
+    Attributes:
+        engine (Optional[TTSEngine]): Die Engine; ohne Angabe die aus `TTS_ENGINE`.
+        cache (Optional[PhraseCache]): Der Cache für synthetisierte Sätze; None schaltet ihn ab.
+        player (Callable[[SpeechClip, CancellationToken], None]): Spielt einen Satz ab.
+        prefetch (int): Wie viele Sätze im Voraus synthetisiert werden.
+    """
+
+    def __init__(self, engine: Optional[TTSEngine] = None, cache: Optional[PhraseCache] = None,
+                 player: Callable[[SpeechClip, CancellationToken], None] = clip_player, prefetch: int = TTS_PREFETCH_SENTENCES):
+        """
+        Initialisiert die SpeechPipeline.
+
+        Args:
+            engine (Optional[TTSEngine]): Die Engine; ohne Angabe die aus `TTS_ENGINE`.
+            cache (Optional[PhraseCache]): Der Cache für synthetisierte Sätze.
+            player (Callable[[SpeechClip, CancellationToken], None]): Spielt einen Satz ab.
+            prefetch (int): Wie viele Sätze im Voraus synthetisiert werden.
+        """
+        self.engine = engine
+        self.cache = cache
+        self.player = player
+        self.prefetch = max(1, int(prefetch))
+        self._lock = threading.Lock()
+        self._spoken = 0
+        self._first_audio_seconds = 0.0
+
+    def speak(self, text: str, config: dict, cancel_token: CancellationToken) -> None:
+        """
+        Liest einen Text satzweise vor.
+
+        Args:
+            text (str): Der vorzulesende Text.
+            config (dict): Die Konfiguration für TTS (`tts_speed`, `tts_voice`).
+            cancel_token (CancellationToken): Token, über den Synthese und Wiedergabe abgebrochen werden.
+
+        Raises:
+            Exception: Der Fehler der Engine, wenn ein Satz nicht synthetisiert werden kann.
+        """
+        sentences = split_sentences(text)
+        if not sentences:
+            return
+        engine = self.engine or get_engine()
+        voice, speed = config.get("tts_voice", ""), int(config.get("tts_speed", 150))
+        clips: queue.Queue = queue.Queue(maxsize=self.prefetch)
+        start = time.perf_counter()
+
+        def put(item) -> bool:
+            while not cancel_token.cancelled:
+                try:
+                    clips.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def produce() -> None:
+            try:
+                for sentence in sentences:
+                    if cancel_token.cancelled or not put(self._synthesize(engine, sentence, TTS_LANGUAGE, voice, speed)):
+                        return
+            except Exception as e:
+                put(e)
+            put(_DONE)
+
+        threading.Thread(target=produce, name="tts-synthesis", daemon=True).start()
+        played = 0
+        while not cancel_token.cancelled:
+            try:
+                item = clips.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            if played == 0:
+                first_audio = time.perf_counter() - start
+                with self._lock:
+                    self._spoken += 1
+                    self._first_audio_seconds += first_audio
+                logger.debug(f"Erste Sprachausgabe nach {first_audio * 1000:.0f} ms ({len(sentences)} Sätze)")
+            self.player(item, cancel_token)
+            played += 1
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Gibt die Kennzahlen der Pipeline zurück.
+
+        Returns:
+            Dict[str, float]: Anzahl der vorgelesenen Texte, mittlere Zeit bis zur ersten
+            Sprachausgabe in Millisekunden und die Kennzahlen des Caches.
+        """
+        with self._lock:
+            metrics = {
+                "spoken": self._spoken,
+                "mean_first_audio_ms": self._first_audio_seconds / self._spoken * 1000 if self._spoken else 0.0,
+            }
+        if self.cache is not None:
+            metrics.update({f"cache_{key}": value for key, value in self.cache.metrics().items()})
+        return metrics
+
+    def _synthesize(self, engine: TTSEngine, sentence: str, language: str, voice: str, speed: int) -> SpeechClip:
+        key = (engine.name, sentence, language, voice, speed)
+        clip = self.cache.get(key) if self.cache is not None else None
+        if clip is None:
+            clip = engine.synthesize(sentence, language, voice, speed)
+            if self.cache is not None:
+                self.cache.put(key, clip)
+        return clip
+
+speech_pipeline = SpeechPipeline(cache=PhraseCache(TTS_PHRASE_CACHE_MAX_MB * 1024 * 1024))
@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, NamedTuple, Optional
+from cancellation import CancellationToken
+from tts_engine import speech_pipeline
+from config import TTS_QUEUE_MAX_PENDING
+import logging
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+class TTSJob(NamedTuple):
+    """
+    Ein Vorleseauftrag in der Warteschlange.
+    """
+    text: str
+    config: dict
+    session_id: str
+    token: CancellationToken
+    queued: float
+
+class TTSQueue:
+    """
+    Klasse, die Sprachausgaben in einem Hintergrund-Thread nacheinander abspielt.
+
+    `submit` kehrt sofort zurück, sodass die Antwort im Chat erscheint, ohne auf Synthese und
+    Wiedergabe zu warten. Ein einzelner Thread spielt die Aufträge in Reihenfolge ab, damit
+    sich Sprachausgaben nicht überlagern. Die Warteschlange hält höchstens `max_pending`
+    Aufträge; ist sie voll, wird der älteste wartende Auftrag verworfen, weil die neueste
+    Antwort die relevanteste ist. Jeder Auftrag hat einen `CancellationToken`, über den die
+    Sprechfunktion die laufende Wiedergabe beenden kann.
+
+    Attributes:
+        speak (Callable[[str, dict, CancellationToken], None]): Synthetisiert und spielt einen Text ab.
+        max_pending (int): Die größte Anzahl wartender Aufträge.
+    """
+
+    def __init__(self, speak: Callable[[str, dict, CancellationToken], None], max_pending: int = TTS_QUEUE_MAX_PENDING):
+        """
+        Initialisiert die TTSQueue. Der Hintergrund-Thread startet mit dem ersten Auftrag.
+
+        Args:
+            speak (Callable[[str, dict, CancellationToken], None]): Synthetisiert und spielt einen Text ab.
+            max_pending (int): Die größte Anzahl wartender Aufträge.
+        """
+        self.speak = speak
+        self.max_pending = max(1, int(max_pending))
+        self._pending: Deque[TTSJob] = deque()
+        self._condition = threading.Condition()
+        self._current: Optional[TTSJob] = None
+        self._thread = None
+        self._played = 0
+        self._dropped = 0
+        self._cancelled = 0
+        self._wait_seconds = 0.0
+
+    def submit(self, text: str, config: dict, session_id: Optional[str] = None) -> CancellationToken:
+        """
+        Stellt einen Text zum Vorlesen in die Warteschlange.
+
+        Args:
+            text (str): Der vorzulesende Text.
+            config (dict): Die Konfiguration für TTS (Geschwindigkeit, Lautstärke, Stimme).
+            session_id (Optional[str]): Die Sitzungs-ID, über die der Auftrag abgebrochen wird.
+
+        Returns:
+            CancellationToken: Der Token des Auftrags.
+        """
+        job = TTSJob(text, config, session_id or "", CancellationToken("tts"), time.monotonic())
+        with self._condition:
+            self._ensure_worker()
+            if len(self._pending) >= self.max_pending:
+                dropped = self._pending.popleft()
+                dropped.token.cancel()
+                self._dropped += 1
+                logger.warning(f"TTS-Warteschlange voll ({self.max_pending}), ältester Auftrag verworfen")
+            self._pending.append(job)
+            self._condition.notify()
+        return job.token
+
+    def cancel(self, session_id: Optional[str] = None) -> int:
+        """
+        Bricht die wartenden und den laufenden Auftrag einer Sitzung ab.
+
+        Args:
+            session_id (Optional[str]): Die Sitzungs-ID. Ohne Angabe werden alle Aufträge abgebrochen.
+
+        Returns:
+            int: Die Anzahl der abgebrochenen Aufträge.
+        """
+        with self._condition:
+            jobs = [job for job in self._pending if session_id is None or job.session_id == (session_id or "")]
+            for job in jobs:
+                self._pending.remove(job)
+            current = self._current
+            if current is not None and (session_id is None or current.session_id == (session_id or "")):
+                jobs.append(current)
+            self._cancelled += len(jobs)
+        for job in jobs:
+            job.token.cancel()
+        if jobs:
+            logger.info(f"{len(jobs)} TTS-Aufträge abgebrochen")
+        return len(jobs)
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Gibt die Kennzahlen der Warteschlange zurück.
+
+        Returns:
+            Dict[str, float]: Wartende, abgespielte, verworfene und abgebrochene Aufträge sowie die
+            mittlere Wartezeit bis zum Start der Wiedergabe in Millisekunden.
+        """
+        with self._condition:
+            started = self._played + (self._current is not None)
+            return {
+                "pending": len(self._pending),
+                "played": self._played,
+                "dropped": self._dropped,
+                "cancelled": self._cancelled,
+                "mean_wait_ms": self._wait_seconds / started * 1000 if started else 0.0,
+            }
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wartet, bis keine Aufträge mehr wartend oder laufend sind.
+
+        Args:
+            timeout (Optional[float]): Die längste Wartezeit in Sekunden.
+
+        Returns:
+            bool: True, wenn die Warteschlange leer ist.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and self._current is None, timeout)
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="tts-queue", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending)
+                job = self._current = self._pending.popleft()
+                self._wait_seconds += time.monotonic() - job.queued
+            try:
+                if not job.token.cancelled:
+                    self.speak(job.text, job.config, job.token)
+            except Exception as e:
+                logger.error(f"Fehler bei der Sprachausgabe: {e}")
+            finally:
+                with self._condition:
+                    self._current = None
+                    if not job.token.cancelled:
+                        self._played += 1
+                    self._condition.notify_all()
+
+tts_queue = TTSQueue(speech_pipeline.speak)
@@ -0,0 +1,78 @@
+"""
+Benchmark für das Entfernen von Steuersequenzen aus der `ollama run`-Ausgabe.
+
+Vergleicht die bisherige Kette aus fünf `re.sub`-Aufrufen pro Zeile mit dem `AnsiStripper`,
+jeweils auf denselben zeilenweise gelesenen Terminal-Daten.
+
+Aufruf:
+    python benchmarks/bench_ansi_stripper.py [--lines 20000]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Moduls"))
+
+from ansi_stripper import AnsiStripper
+
+SPINNER = "\x1b[?25l\x1b[?2026h\x1b[?25l\x1b[1G⠙ \x1b[K\x1b[?25h\x1b[?2026l"
+LINE = "Die Antwort enthält Umlaute (äöü), Code wie `x = 1` und ganz normalen Text.\r\n"
+STYLED_LINE = "Eine Zeile mit \x1b[1mfettem\x1b[0m Text.\r\n"
+
+def legacy_clean_output(output: str) -> str:
+    """Die bisherige Bereinigung aus `OllamaFunctions.clean_output`."""
+    cleaned_output = re.sub(r'(?:\x1B[@-_]|[\x1B\x9B][0-?]*[ -/]*[@-~])', '', output)
+    cleaned_output = re.sub(r'\?\d+[lh]', '', cleaned_output)
+    cleaned_output = re.sub(r'[⠀-⣿]', '', cleaned_output)
+    cleaned_output = re.sub(r'\r', '', cleaned_output)
+    cleaned_output = re.sub(r'2K1G ?(?:2K1G)*!?', '', cleaned_output)
+    return cleaned_output
+
+def make_lines(count: int):
+    """Spinner-Phase vor der Antwort, danach überwiegend Klartext mit gelegentlicher Formatierung."""
+    lines = [SPINNER * 40]
+    lines += [STYLED_LINE if i % 20 == 0 else LINE for i in range(count)]
+    return lines
+
+def make_reads(lines, size: int = 4096):
+    """Zerlegt die Ausgabe in Lesevorgänge fester Größe, wie sie der CLI-Fallback liest."""
+    data = "".join(lines).encode("utf-8")
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+def timed(func, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=20000, help="Anzahl der Zeilen")
+    args = parser.parse_args()
+
+    lines = make_lines(args.lines)
+    reads = make_reads(lines)
+    size_mb = sum(len(chunk) for chunk in reads) / 1e6
+
+    legacy = timed(lambda: [legacy_clean_output(line) for line in lines])
+
+    def run_stripper(chunks):
+        stripper = AnsiStripper()
+        for chunk in chunks:
+            stripper.feed(chunk)
+        stripper.flush()
+
+    stripper_str = timed(lambda: run_stripper(lines))
+    stripper_bytes = timed(lambda: run_stripper(reads))
+
+    print(f"{args.lines} Zeilen, {size_mb:.2f} MB")
+    print(f"  fünf re.sub-Aufrufe pro Zeile : {legacy * 1e3:8.1f} ms")
+    print(f"  AnsiStripper, zeilenweise str : {stripper_str * 1e3:8.1f} ms  ({legacy / stripper_str:.1f}x)")
+    print(f"  AnsiStripper, 4-KB-Bytes      : {stripper_bytes * 1e3:8.1f} ms  ({legacy / stripper_bytes:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark für das Bündeln gleichzeitiger Transkriptionsaufträge.
+
+Lädt ein Whisper-Modell über `ModelPipeline` und schickt bei 1, 4 und 16 gleichzeitigen
+Aufrufern jeweils `--requests` kurze Aufnahmen durch den `ASRBatcher`, einmal ohne Bündeln
+(`max_batch=1`) und einmal mit `--max-batch`. Ausgegeben werden Durchsatz (Aufträge und
+Audiosekunden pro Sekunde) sowie Median und 95. Perzentil der Latenz.
+
+Ohne `--audio` werden synthetische Aufnahmen (Ton mit Rauschen) verwendet; sie taugen nur zur
+Messung der Rechenzeit.
+
+Aufruf:
+    python benchmarks/bench_asr_batcher.py [--model openai/whisper-tiny] [--concurrency 1 4 16]
+        [--requests 32] [--seconds 8] [--max-batch 8] [--audio aufnahme.wav]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Moduls"))
+
+import numpy as np
+from asr_batcher import ASRBatcher
+from audio_preprocessing import load_pcm
+from config import device, torch_dtype, WHISPER_SAMPLING_RATE, ASR_BATCH_MAX_SIZE, ASR_BATCH_MAX_WAIT_MS
+from model_pipeline import ModelPipeline
+
+def synthetic(seconds: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * WHISPER_SAMPLING_RATE)) / WHISPER_SAMPLING_RATE
+    return (0.3 * np.sin(2 * np.pi * rng.uniform(120, 300) * t) + rng.normal(0, 0.05, len(t))).astype(np.float32)
+
+def run(batcher: ASRBatcher, signals, concurrency: int):
+    latencies = []
+
+    def job(samples):
+        start = time.perf_counter()
+        batcher.transcribe(samples)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(job, signals))
+    return time.perf_counter() - start, np.percentile(latencies, 50), np.percentile(latencies, 95)
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="openai/whisper-tiny")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=8.0)
+    parser.add_argument("--max-batch", type=int, default=ASR_BATCH_MAX_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=ASR_BATCH_MAX_WAIT_MS)
+    parser.add_argument("--audio", help="Audiodatei, die für alle Aufträge verwendet wird")
+    args = parser.parse_args()
+
+    if args.audio:
+        signals = [load_pcm(args.audio)] * args.requests
+    else:
+        signals = [synthetic(args.seconds, seed) for seed in range(args.requests)]
+    audio = sum(len(samples) for samples in signals) / WHISPER_SAMPLING_RATE
+
+    pipeline = ModelPipeline(args.model, device, torch_dtype, idle_timeout=0)
+    start = time.perf_counter()
+    pipeline.pipe
+    print(f"Modell {args.model} auf {device} in {time.perf_counter() - start:.1f}s geladen; "
+          f"{args.requests} Aufträge mit zusammen {audio:.0f}s Audio")
+    ASRBatcher(pipeline.use, max_batch=1).transcribe(signals[0])  # Aufwärmen
+
+    print(f"{'Gleichzeitig':>12}{'Batch':>7}{'Aufträge/s':>12}{'Audio-s/s':>11}{'p50':>9}{'p95':>9}{'Ø Batch':>9}")
+    for concurrency in args.concurrency:
+        for max_batch in (1, args.max_batch):
+            batcher = ASRBatcher(pipeline.use, max_batch=max_batch, max_wait_ms=args.max_wait_ms)
+            total, p50, p95 = run(batcher, signals, concurrency)
+            print(f"{concurrency:>12}{max_batch:>7}{args.requests / total:>12.2f}{audio / total:>11.1f}"
+                  f"{p50:>8.2f}s{p95:>8.2f}s{batcher.metrics()['mean_batch_size']:>9.1f}")
+
+if __name__ == "__main__":
+    main()
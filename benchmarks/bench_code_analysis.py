@@ -0,0 +1,93 @@
+"""
+Benchmark für die Code-Analyse im Code Editor nach einer kleinen Änderung.
+
+Erzeugt ein Modul mit `--functions` Funktionen (Standard etwa 2000 Zeilen), analysiert es einmal
+und ändert dann ein Zeichen in einer Funktion. Verglichen werden die gesendeten Bytes und die
+Dauer der zweiten Analyse:
+
+- "ganze Datei": der bisherige Weg, der Cache-Schlüssel ist die ganze Datei,
+- "pro Funktion": `IncrementalCodeAnalyzer`, der nur die geänderte Funktion sendet.
+
+Das Modell wird simuliert: feste Latenz plus Verarbeitungszeit pro 1000 Zeichen.
+
+Aufruf:
+    python benchmarks/bench_code_analysis.py [--functions 200] [--latency 0.3] [--ms-per-kchar 40] [--workers 4]
+"""
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Moduls"))
+
+from code_analysis import IncrementalCodeAnalyzer
+from disk_cache import DiskCache
+from response_cache import ResponseCache
+
+logging.disable(logging.INFO)
+
+class SimulatedModel:
+    def __init__(self, latency: float, ms_per_kchar: float):
+        self.latency = latency
+        self.per_char = ms_per_kchar / 1000 / 1000
+        self.sent = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, prompt: str) -> str:
+        with self.lock:
+            self.sent += len(prompt.encode("utf-8"))
+        time.sleep(self.latency + len(prompt) * self.per_char)
+        return "Feedback"
+
+def make_module(functions: int) -> str:
+    parts = ["import math\n\n"]
+    for number in range(functions):
+        parts.append(f"def function_{number}(values):\n"
+                     f"    \"\"\"Berechnet Kennzahl {number}.\"\"\"\n"
+                     f"    total = 0\n"
+                     f"    for value in values:\n"
+                     f"        if value > {number}:\n"
+                     f"            total += math.sqrt(value)\n"
+                     f"        else:\n"
+                     f"            total -= value\n"
+                     f"    return total\n\n")
+    return "".join(parts)
+
+def run(name, analyze, model, code, edited):
+    analyze(code)
+    sent = model.sent
+    start = time.perf_counter()
+    analyze(edited)
+    print(f"{name:<14}: zweite Analyse {time.perf_counter() - start:6.2f} s, {(model.sent - sent) / 1024:8.1f} KB gesendet")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--functions", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--ms-per-kchar", type=float, default=40.0, help="Simulierte Verarbeitungszeit pro 1000 Zeichen")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    code = make_module(args.functions)
+    target = f"if value > {args.functions // 2}:"
+    edited = code.replace(target, target.replace(">", ">="), 1)
+    print(f"Modul mit {code.count(chr(10))} Zeilen ({len(code) / 1024:.0f} KB), eine Funktion geändert")
+
+    directory = tempfile.mkdtemp()
+    try:
+        cache = ResponseCache(DiskCache(directory, 256 * 1024 * 1024))
+        model = SimulatedModel(args.latency, args.ms_per_kchar)
+        instruction = "Analysiere diesen Python-Code und gib Feedback:"
+        run("ganze Datei", lambda source: cache.cached("simuliert", "modell", f"{instruction}\n\n{source}", lambda: model(f"{instruction}\n\n{source}"), cache_sampled=True), model, code, edited)
+        model = SimulatedModel(args.latency, args.ms_per_kchar)
+        analyzer = IncrementalCodeAnalyzer(model, lambda: "modell", provider="simuliert", cache=cache, workers=args.workers)
+        run("pro Funktion", lambda source: analyzer.analyze(source, instruction), model, code, edited)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark für den Dokumentvergleich in `OllamaFunctions.compare_documents`.
+
+Vergleicht den bisherigen Weg über `difflib.unified_diff` mit der `DiffEngine` auf zwei
+Dokumenten mit vielen fast gleichen Zeilen (typisch für Logs, CSV-Exporte und generierten
+Code), in denen verstreut Zeilen geändert, eingefügt und gelöscht wurden.
+
+Aufruf:
+    python benchmarks/bench_diff_engine.py [--lines 100000] [--skip-difflib]
+"""
+import argparse
+import difflib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Moduls"))
+
+from diff_engine import DiffEngine
+
+def make_documents(count: int, seed: int = 0):
+    """Zeilen aus wenigen Vorlagen, sodass sich viele Zeilen wiederholen oder kaum unterscheiden."""
+    rng = random.Random(seed)
+    templates = [
+        "    value_{0} = compute({1})",
+        "    if value_{0} > {1}:",
+        "        return None",
+        "",
+        "log: request {1} finished with status 200",
+    ]
+    lines1 = [templates[i % len(templates)].format(i % 500, i % 97) for i in range(count)]
+    lines2 = list(lines1)
+    for _ in range(count // 200):
+        pos = rng.randrange(len(lines2))
+        action = rng.random()
+        if action < 0.4:
+            lines2[pos] = lines2[pos] + "  # geändert"
+        elif action < 0.7:
+            lines2.insert(pos, f"    neu_{pos} = {rng.randrange(1000)}")
+        else:
+            del lines2[pos]
+    return "\n".join(lines1), "\n".join(lines2)
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=100000, help="Anzahl der Zeilen pro Dokument")
+    parser.add_argument("--skip-difflib", action="store_true", help="Den (langsamen) difflib-Weg überspringen")
+    args = parser.parse_args()
+
+    content1, content2 = make_documents(args.lines)
+    print(f"{args.lines} Zeilen, {(len(content1) + len(content2)) / 1e6:.1f} MB")
+
+    if not args.skip_difflib:
+        legacy = timed(lambda: "\n".join(difflib.unified_diff(content1.splitlines(), content2.splitlines(), "File1", "File2", lineterm="")))
+        print(f"  difflib.unified_diff        : {legacy:8.2f} s")
+
+    engine = DiffEngine()
+    result = None
+
+    def run():
+        nonlocal result
+        result = engine.diff(content1, content2)
+
+    cold = timed(run)
+    warm = timed(run)
+    first_page = timed(lambda: result.pages()[0])
+    print(f"  DiffEngine, erster Vergleich: {cold:8.2f} s" + ("" if args.skip_difflib else f"  ({legacy / cold:.1f}x)"))
+    print(f"  DiffEngine, aus dem Cache   : {warm * 1e3:8.2f} ms")
+    print(f"  Seitenaufteilung            : {first_page * 1e3:8.2f} ms, {len(result.pages())} Seiten, {len(result.hunks)} Hunks")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark für die Gemini-Unterhaltungen über 50 Runden.
+
+Vergleicht pro Runde die Größe der Anfrage (serialisierter `GenerateContentRequest`), die
+geschätzten Eingabetokens und die Antwortzeit für:
+
+- "bisher": pro Runde eine neue `ChatSession`, deren Verlauf die Nachricht bereits enthält und
+  die sie noch einmal sendet (ohne Kontext früherer Runden),
+- "voll": eine Unterhaltung pro Sitzung mit ungekürztem Verlauf,
+- "budget": eine Unterhaltung pro Sitzung, deren Verlauf auf `--budget` Tokens gekürzt wird.
+
+Ohne `--live` wird ein simuliertes Modell verwendet, dessen Antwortzeit einer festen Latenz
+plus einer Prefill-Zeit pro 1000 Eingabetokens entspricht; mit `--live` wird das Gemini-Modell
+aus `api_client` verwendet (API-Schlüssel erforderlich).
+
+Aufruf:
+    python benchmarks/bench_gemini_sessions.py [--turns 50] [--budget 4000] [--user-chars 400]
+        [--reply-chars 1500] [--latency 0.05] [--prefill-ms 20] [--live]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Moduls"))
+
+from google.generativeai import protos
+from gemini_sessions import GeminiSessionRegistry, estimate_tokens
+
+class SimulatedChat:
+    def __init__(self, model, history):
+        self.model = model
+        self.history = list(history)
+
+    def send_message(self, content, stream=False):
+        contents = self.history + [{"role": "user", "parts": content}]
+        time.sleep(self.model.latency + sum(estimate_tokens(c) for c in contents) / 1000 * self.model.prefill)
+        reply = "Antwort " + "x" * self.model.reply_chars
+
+        def chunks():
+            yield type("Chunk", (), {"text": reply})()
+            self.history += [{"role": "user", "parts": content}, {"role": "model", "parts": [reply]}]
+
+        return chunks()
+
+class SimulatedModel:
+    model_name = "simuliert"
+
+    def __init__(self, latency: float, prefill_ms: float, reply_chars: int):
+        self.latency = latency
+        self.prefill = prefill_ms / 1000
+        self.reply_chars = reply_chars
+
+    def start_chat(self, history=None):
+        return SimulatedChat(self, history or [])
+
+def to_content(content) -> protos.Content:
+    if isinstance(content, protos.Content):
+        return content
+    return protos.Content(role=content["role"], parts=[protos.Part(text=part) for part in content["parts"]])
+
+def payload_bytes(model, contents) -> int:
+    request = protos.GenerateContentRequest(model=model.model_name, contents=[to_content(c) for c in contents])
+    return len(protos.GenerateContentRequest.serialize(request))
+
+def send(chat, message):
+    start = time.perf_counter()
+    for _ in chat.send_message(message, stream=True):
+        pass
+    return time.perf_counter() - start
+
+def run_previous(model, messages):
+    rows = []
+    for message in messages:
+        chat = model.start_chat(history=[{"role": "user", "parts": message}])
+        contents = list(chat.history) + [{"role": "user", "parts": message}]
+        rows.append((payload_bytes(model, contents), sum(map(estimate_tokens, contents)), send(chat, message)))
+    return rows
+
+def run_registry(model, messages, budget):
+    registry = GeminiSessionRegistry(lambda: model, idle_timeout=0, max_history_tokens=budget)
+    rows = []
+    for message in messages:
+        with registry.use("benchmark", message) as session:
+            contents = list(session.chat.history) + [{"role": "user", "parts": message}]
+            rows.append((payload_bytes(model, contents), sum(map(estimate_tokens, contents)), send(session.chat, message)))
+    return rows
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--budget", type=int, default=4000)
+    parser.add_argument("--user-chars", type=int, default=400)
+    parser.add_argument("--reply-chars", type=int, default=1500)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--prefill-ms", type=float, default=20.0, help="Simulierte Prefill-Zeit pro 1000 Eingabetokens")
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    if args.live:
+        from api_client import api_client
+        model = api_client.gemini_model
+    else:
+        model = SimulatedModel(args.latency, args.prefill_ms, args.reply_chars)
+    messages = [[f"Frage {turn}: " + "Bitte erkläre das genauer. " * (args.user_chars // 27)] for turn in range(1, args.turns + 1)]
+
+    results = {
+        "bisher": run_previous(model, messages),
+        "voll": run_registry(model, messages, budget=10 ** 9),
+        f"budget {args.budget}": run_registry(model, messages, budget=args.budget),
+    }
+
+    checkpoints = sorted({1, 10, 25, args.turns} & set(range(1, args.turns + 1)))
+    print(f"{args.turns} Runden, {'Gemini live' if args.live else 'simuliertes Modell'}")
+    print(f"{'Variante':<14}" + "".join(f"{f'Runde {turn}':>18}" for turn in checkpoints) + f"{'Summe KB':>10}{'Ø Latenz':>10}")
+    for name, rows in results.items():
+        cells = "".join(f"{rows[turn - 1][0] / 1024:>8.1f} KB {rows[turn - 1][1]:>5}T" for turn in checkpoints)
+        total = sum(row[0] for row in rows) / 1024
+        latency = sum(row[2] for row in rows) / len(rows)
+        print(f"{name:<14}{cells}{total:>10.0f}{latency:>9.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark für die abschnittsweise Transkription langer Aufnahmen.
+
+Erzeugt eine synthetische Aufnahme (standardmäßig 60 Minuten) aus Rauschen als "Sprache" mit
+zufälligen Pausen und misst Laden, Pausensuche sowie die Gesamtdauer und die Zeit bis zum
+ersten Teiltranskript mit 1 und mehreren Workern. Ohne `--backend` wird ein simuliertes
+Backend verwendet, dessen Antwortzeit einer festen Latenz plus einem Real-Time-Factor
+entspricht (ähnlich der gehosteten API); mit `--backend openai|local|auto` wird das echte
+Backend gemessen.
+
+Aufruf:
+    python benchmarks/bench_long_transcription.py [--minutes 60] [--workers 1 4 8] [--rtf 0.03]
+        [--latency 1.5] [--backend openai]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Moduls"))
+
+import numpy as np
+from audio_preprocessing import load_pcm
+from config import WHISPER_SAMPLING_RATE
+from long_transcription import find_split_points, iter_transcription
+from transcription import TranscriptionBackend, TranscriptSegment, get_backend
+
+class SimulatedBackend(TranscriptionBackend):
+    def __init__(self, latency: float, rtf: float):
+        self.latency = latency
+        self.rtf = rtf
+
+    def transcribe_segments(self, samples):
+        duration = len(samples) / WHISPER_SAMPLING_RATE
+        time.sleep(self.latency + duration * self.rtf)
+        return [TranscriptSegment(0.0, duration, "text")]
+
+def make_wav(path: str, minutes: int) -> None:
+    rng = np.random.default_rng(1)
+    rate = WHISPER_SAMPLING_RATE
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        for _ in range(minutes):
+            minute = (rng.normal(0, 0.2, 60 * rate) * 32767 * 0.5).clip(-32767, 32767).astype("<i2")
+            for start in rng.integers(0, 59 * rate, 12):
+                minute[start:start + int(rng.uniform(0.3, 1.2) * rate)] = 0
+            f.writeframes(minute.tobytes())
+
+def run(path: str, backend: TranscriptionBackend, workers: int):
+    start = time.perf_counter()
+    first = None
+    segments = []
+    for segments in iter_transcription(path, backend, workers=workers):
+        if first is None:
+            first = time.perf_counter() - start
+    return time.perf_counter() - start, first, len(segments)
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=int, default=60)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--latency", type=float, default=1.5, help="Simulierte Latenz pro Anfrage in Sekunden")
+    parser.add_argument("--rtf", type=float, default=0.03, help="Simulierter Real-Time-Factor")
+    parser.add_argument("--backend", choices=["openai", "local", "auto"], help="Echtes Backend statt Simulation")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "lang.wav")
+    make_wav(path, args.minutes)
+    duration = args.minutes * 60
+
+    start = time.perf_counter()
+    samples = load_pcm(path)
+    load = time.perf_counter() - start
+    start = time.perf_counter()
+    ranges = find_split_points(samples)
+    split = time.perf_counter() - start
+    lengths = [(end - begin) / WHISPER_SAMPLING_RATE for begin, end in ranges]
+    print(f"Aufnahme: {args.minutes} min, Laden {load:.2f}s, Pausensuche {split * 1000:.0f} ms, "
+          f"{len(ranges)} Abschnitte ({min(lengths):.0f}-{max(lengths):.0f}s)")
+
+    backend = get_backend(args.backend) if args.backend else SimulatedBackend(args.latency, args.rtf)
+    baseline = args.latency + duration * args.rtf if not args.backend else None
+    if baseline is not None:
+        print(f"Ein einziger Aufruf (simuliert): {baseline:.1f}s ohne Teilergebnisse")
+    print(f"{'Worker':>8}{'Gesamt':>10}{'Erstes Teilergebnis':>22}{'RTF':>8}")
+    for workers in args.workers:
+        total, first, count = run(path, backend, workers)
+        print(f"{workers:>8}{total:>9.1f}s{first:>21.1f}s{total / duration:>8.4f}")
+
+if __name__ == "__main__":
+    main()
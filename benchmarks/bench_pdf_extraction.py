@@ -0,0 +1,71 @@
+"""
+Benchmark für die Textextraktion aus PDF-Dateien.
+
+Vergleicht die bisherige serielle Schleife mit `content += page.extract_text()` mit
+`pdf_extraction.extract_pdf_text` (seriell und mit Prozess-Pool) auf einer synthetischen PDF-Datei.
+Zusätzlich wird gemessen, wann die erste Seite aus `iter_pdf_pages` verfügbar ist.
+
+Aufruf:
+    python benchmarks/bench_pdf_extraction.py [--pages 1000] [--workers 4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Moduls"))
+
+from fpdf import FPDF
+from PyPDF2 import PdfReader
+from pdf_extraction import extract_pdf_text, iter_pdf_pages
+
+def make_pdf(path: str, pages: int) -> None:
+    pdf = FPDF()
+    pdf.set_font("Arial", size=9)
+    for number in range(pages):
+        pdf.add_page()
+        for line in range(45):
+            pdf.cell(0, 5, f"Seite {number}, Zeile {line}: Beispieltext fuer die Extraktion mit etwas Inhalt.", ln=1)
+    pdf.output(path)
+
+def legacy_extract(path: str) -> str:
+    """Die bisherige Extraktion aus `OllamaFunctions.process_uploaded_file`."""
+    reader = PdfReader(path)
+    content = ""
+    for page in reader.pages:
+        content += page.extract_text()
+    return content
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=1000, help="Anzahl der Seiten")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Anzahl der Worker-Prozesse")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "synthetisch.pdf")
+        make_pdf(path, args.pages)
+        print(f"{args.pages} Seiten, {os.path.getsize(path) / 1e6:.1f} MB")
+
+        legacy = timed(lambda: legacy_extract(path))
+        serial = timed(lambda: extract_pdf_text(path, workers=1))
+        extract_pdf_text(path, workers=args.workers)  # Pool starten
+        parallel = timed(lambda: extract_pdf_text(path, workers=args.workers))
+
+        start = time.perf_counter()
+        next(iter_pdf_pages(path, workers=args.workers))
+        first_page = time.perf_counter() - start
+
+        print(f"  content += extract_text()     : {legacy:6.2f} s")
+        print(f"  extract_pdf_text, seriell     : {serial:6.2f} s  ({legacy / serial:.1f}x)")
+        print(f"  extract_pdf_text, {args.workers:2d} Prozesse: {parallel:6.2f} s  ({legacy / parallel:.1f}x)")
+        print(f"  erste Seite aus iter_pdf_pages: {first_page * 1e3:6.1f} ms")
+
+if __name__ == "__main__":
+    main()
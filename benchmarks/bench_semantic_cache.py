@@ -0,0 +1,82 @@
+"""
+Benchmark für die Suche im semantischen Cache (`semantic_cache.py`).
+
+Füllt einen Bereich des `SemanticCache` mit zufälligen normierten Vektoren und misst die Dauer
+von `lookup` ohne die Berechnung des Embeddings (das Embedding wird vorab erzeugt). Mit `--live`
+wird zusätzlich die Dauer eines Embeddings über Ollama (`SEMANTIC_CACHE_MODEL`) gemessen.
+
+Aufruf:
+    python benchmarks/bench_semantic_cache.py [--entries 1000,10000,100000] [--dim 768] [--queries 200] [--live]
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Moduls"))
+
+from semantic_cache import SemanticCache
+
+logging.getLogger("semantic_cache").setLevel(logging.WARNING)
+
+def random_unit_vectors(count: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    vectors = rng.standard_normal((count, dim), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def bench_lookup(entries: int, dim: int, queries: int, rng: np.random.Generator) -> None:
+    stored = random_unit_vectors(entries, dim, rng)
+    # Die Hälfte der Anfragen sind leicht veränderte gespeicherte Prompts (Treffer), die andere Hälfte neue.
+    near = stored[rng.integers(0, entries, queries // 2)] + 0.01 * random_unit_vectors(queries // 2, dim, rng)
+    probes = np.concatenate([near, random_unit_vectors(queries - queries // 2, dim, rng)])
+    pending = iter(probes)
+    cache = SemanticCache(lambda text: next(pending), threshold=0.95, max_entries=entries)
+    start = time.perf_counter()
+    for number, vector in enumerate(stored):
+        cache.add("gemini", vector, f"Antwort {number}")
+    fill = time.perf_counter() - start
+
+    durations = []
+    for _ in range(queries):
+        start = time.perf_counter()
+        cache.lookup("gemini", "Prompt")
+        durations.append((time.perf_counter() - start) * 1000)
+    metrics = cache.metrics()
+    print(f"{entries:>9} Einträge: Suche Median {statistics.median(durations):7.3f} ms, p95 {percentile(durations, 0.95):7.3f} ms, "
+          f"Trefferquote {metrics['hit_rate']:.0%}, Index {entries * dim * 4 / 1024 ** 2:6.1f} MB, Befüllen {fill:.2f} s")
+
+def bench_embedding(queries: int) -> None:
+    from semantic_cache import _embed_with_ollama
+    from config import SEMANTIC_CACHE_MODEL
+
+    durations = []
+    for number in range(queries):
+        start = time.perf_counter()
+        _embed_with_ollama(f"Analysiere diesen Code und gib Feedback, Variante {number}")
+        durations.append((time.perf_counter() - start) * 1000)
+    print(f"Embedding mit {SEMANTIC_CACHE_MODEL}: Median {statistics.median(durations):.1f} ms, p95 {percentile(durations, 0.95):.1f} ms")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", default="1000,10000,100000", help="Kommagetrennte Anzahlen gespeicherter Einträge")
+    parser.add_argument("--dim", type=int, default=768, help="Dimension der Embeddings (nomic-embed-text: 768)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--live", action="store_true", help="Zusätzlich die Embedding-Dauer über Ollama messen")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"Dimension {args.dim}, {args.queries} Anfragen pro Größe")
+    for entries in (int(value) for value in args.entries.split(",")):
+        bench_lookup(entries, args.dim, args.queries, rng)
+    if args.live:
+        bench_embedding(min(args.queries, 20))
+
+if __name__ == "__main__":
+    main()
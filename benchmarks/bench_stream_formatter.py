@@ -0,0 +1,80 @@
+"""
+Micro-Benchmark für die Formatierung gestreamter Ollama-Antworten.
+
+Vergleicht die bisherige Formatierung (gesamten Puffer nach jedem Token neu formatieren) mit dem
+inkrementellen `StreamingFormatter` und zeigt die Kosten pro Token je Zehntel der Ausgabe.
+
+Aufruf:
+    python benchmarks/bench_stream_formatter.py [--lines 10000]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Moduls"))
+
+from stream_formatter import StreamingFormatter
+
+def legacy_format_output(output: str) -> str:
+    """Die bisherige Formatierung aus `OllamaFunctions.format_output`."""
+    output = re.sub(r'\s+', ' ', output)
+    output = re.sub(r'(.{80,}?)(\s+|$)', r'\1\n', output)
+    code_blocks = re.findall(r'```(.*?)```', output, re.DOTALL)
+    for block in code_blocks:
+        output = output.replace(f'```{block}```', f"```\n{block.strip()}\n```")
+    return output
+
+def make_tokens(lines: int):
+    """Erzeugt Token einer synthetischen Antwort mit `lines` Zeilen und gelegentlichen Code-Blöcken."""
+    tokens = []
+    for i in range(lines):
+        if i % 50 == 0:
+            tokens += ["```", "python\n", f"x_{i} = {i}\n", "```\n"]
+        else:
+            tokens += [f"Zeile {i}", " enthält", " etwas", " Text", " zum", " Formatieren.\n"]
+    return tokens
+
+def per_decile(costs):
+    size = max(len(costs) // 10, 1)
+    return [sum(costs[i:i + size]) / len(costs[i:i + size]) * 1e6 for i in range(0, size * 10, size)]
+
+def bench_streaming(tokens):
+    formatter = StreamingFormatter()
+    costs = []
+    for token in tokens:
+        start = time.perf_counter()
+        formatter.feed(token)
+        costs.append(time.perf_counter() - start)
+    formatter.finish()
+    return costs
+
+def bench_legacy(tokens):
+    buffer = ""
+    costs = []
+    for token in tokens:
+        start = time.perf_counter()
+        buffer += token
+        legacy_format_output(buffer)
+        costs.append(time.perf_counter() - start)
+    return costs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=10000, help="Zeilen der Antwort für den StreamingFormatter")
+    parser.add_argument("--legacy-lines", type=int, default=500, help="Zeilen der Antwort für die bisherige Formatierung")
+    args = parser.parse_args()
+
+    tokens = make_tokens(args.lines)
+    costs = bench_streaming(tokens)
+    print(f"StreamingFormatter: {args.lines} Zeilen, {len(tokens)} Token, gesamt {sum(costs) * 1e3:.1f} ms")
+    print("  µs/Token je Zehntel: " + " ".join(f"{c:.2f}" for c in per_decile(costs)))
+
+    tokens = make_tokens(args.legacy_lines)
+    costs = bench_legacy(tokens)
+    print(f"Bisherige Formatierung: {args.legacy_lines} Zeilen, {len(tokens)} Token, gesamt {sum(costs) * 1e3:.1f} ms")
+    print("  µs/Token je Zehntel: " + " ".join(f"{c:.2f}" for c in per_decile(costs)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark für die lokale Spracherkennung mit verschiedenen Whisper-Größen.
+
+Misst für jedes Modell die Ladezeit, die Latenz einer Transkription (bester von mehreren
+Durchläufen nach einem Aufwärmlauf) und den Real-Time-Factor (RTF = Rechenzeit / Audiodauer).
+Optional wird zum Vergleich das OpenAI-Backend gemessen, dessen Latenz die Netzwerk-Rundreise
+und den Upload enthält.
+
+Ohne `--audio` wird eine synthetische Aufnahme (Ton mit Rauschen) erzeugt; sie taugt nur zur
+Messung der Rechenzeit, nicht zur Beurteilung der Erkennungsqualität.
+
+Aufruf:
+    python benchmarks/bench_transcription.py [--audio aufnahme.wav] [--models tiny base small]
+        [--repeat 3] [--openai]
+"""
+import argparse
+import math
+import os
+import struct
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Moduls"))
+
+from config import device, torch_dtype, WHISPER_SAMPLING_RATE
+from model_pipeline import ModelPipeline
+from asr_batcher import ASRBatcher
+from audio_preprocessing import load_pcm
+from transcription import LocalWhisperBackend, OpenAITranscriptionBackend
+
+WHISPER_SIZES = {
+    "tiny": "openai/whisper-tiny",
+    "base": "openai/whisper-base",
+    "small": "openai/whisper-small",
+    "medium": "openai/whisper-medium",
+    "large-v3-turbo": "openai/whisper-large-v3-turbo",
+}
+
+def make_wav(path: str, seconds: int) -> None:
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(WHISPER_SAMPLING_RATE)
+        f.writeframes(b"".join(
+            struct.pack("<h", int(8000 * math.sin(2 * math.pi * 220 * i / WHISPER_SAMPLING_RATE) + (i * 7919 % 2001) - 1000))
+            for i in range(seconds * WHISPER_SAMPLING_RATE)
+        ))
+
+def measure(backend, path: str, repeat: int) -> float:
+    backend.transcribe(path)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        backend.transcribe(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--audio", help="Audiodatei; ohne Angabe wird eine synthetische Aufnahme erzeugt")
+    parser.add_argument("--seconds", type=int, default=30, help="Dauer der synthetischen Aufnahme")
+    parser.add_argument("--models", nargs="+", default=["tiny", "base", "small"], choices=list(WHISPER_SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--openai", action="store_true", help="Zusätzlich das OpenAI-Backend messen")
+    args = parser.parse_args()
+
+    path = args.audio
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "synthetisch.wav")
+        make_wav(path, args.seconds)
+    duration = len(load_pcm(path)) / WHISPER_SAMPLING_RATE
+    print(f"Audio: {path} ({duration:.1f}s), Gerät: {device}, Datentyp: {torch_dtype}")
+    print(f"{'Modell':<28}{'Laden':>10}{'Latenz':>10}{'RTF':>8}")
+
+    for size in args.models:
+        pipeline = ModelPipeline(WHISPER_SIZES[size], device, torch_dtype, idle_timeout=0)
+        start = time.perf_counter()
+        pipeline.pipe
+        load = time.perf_counter() - start
+        latency = measure(LocalWhisperBackend(ASRBatcher(pipeline.use, max_batch=1), WHISPER_SIZES[size]), path, args.repeat)
+        print(f"{WHISPER_SIZES[size]:<28}{load:>9.1f}s{latency:>9.2f}s{latency / duration:>8.3f}")
+        pipeline.unload()
+
+    if args.openai:
+        latency = measure(OpenAITranscriptionBackend(), path, args.repeat)
+        print(f"{'OpenAI whisper-1':<28}{'-':>10}{latency:>9.2f}s{latency / duration:>8.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark für die int8-Quantisierung des lokalen Whisper-Modells auf der CPU.
+
+Transkribiert die Referenzaufnahmen aus `--audio` einmal mit dem float32-Modell und einmal mit
+dem quantisierten Modell und gibt pro Aufnahme die Latenz, die Beschleunigung und die
+Wortfehlerrate (WER) der int8-Transkripte gegenüber den float32-Transkripten aus. Mit
+`--reference` (eine Textdatei pro Aufnahme, gleiche Reihenfolge) wird zusätzlich die WER beider
+Modelle gegenüber dem Referenztext berechnet, sodass die Abweichung durch die Quantisierung
+von der Fehlerrate des Modells selbst getrennt werden kann.
+
+Beim ersten Lauf wird das quantisierte Modell erzeugt und in `WHISPER_QUANTIZED_DIR`
+gespeichert; die Ladezeiten beider Läufe werden ebenfalls ausgegeben.
+
+Aufruf:
+    python benchmarks/bench_whisper_quantization.py --audio a.wav b.wav [--reference a.txt b.txt]
+        [--model openai/whisper-small] [--threads 4] [--repeat 3]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Moduls"))
+
+import numpy as np
+import torch
+from asr_batcher import ASRBatcher
+from audio_preprocessing import load_pcm
+from config import WHISPER_SAMPLING_RATE
+from model_pipeline import ModelPipeline, configure_cpu_threads
+
+def words(text: str):
+    return re.findall(r"\w+", text.lower())
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    ref, hyp = words(reference), words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    # Levenshtein-Distanz auf Wortebene, zeilenweise.
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1] / len(ref)
+
+def measure(pipeline: ModelPipeline, signals, repeat: int):
+    start = time.perf_counter()
+    pipeline.pipe
+    load = time.perf_counter() - start
+    batcher = ASRBatcher(pipeline.use, max_batch=1)
+    batcher.transcribe(signals[0][:WHISPER_SAMPLING_RATE])  # Aufwärmen
+    texts, latencies = [], []
+    for samples in signals:
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            text = batcher.transcribe(samples)["text"]
+            runs.append(time.perf_counter() - start)
+        texts.append(text.strip())
+        latencies.append(min(runs))
+    pipeline.unload()
+    return load, texts, latencies
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--audio", nargs="+", required=True, help="Referenzaufnahmen")
+    parser.add_argument("--reference", nargs="+", help="Referenztexte zu den Aufnahmen")
+    parser.add_argument("--model", default="openai/whisper-small")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    if args.reference and len(args.reference) != len(args.audio):
+        parser.error("--reference braucht genau einen Text pro Aufnahme")
+
+    configure_cpu_threads(args.threads)
+    signals = [load_pcm(path) for path in args.audio]
+    references = []
+    for path in args.reference or []:
+        with open(path, encoding="utf-8") as f:
+            references.append(f.read())
+
+    load_fp32, texts_fp32, latency_fp32 = measure(ModelPipeline(args.model, "cpu", torch.float32, idle_timeout=0, quantize=False), signals, args.repeat)
+    load_int8, texts_int8, latency_int8 = measure(ModelPipeline(args.model, "cpu", torch.float32, idle_timeout=0, quantize=True, cpu_threads=args.threads), signals, args.repeat)
+    print(f"Modell {args.model}, {args.threads} Threads: geladen in {load_fp32:.1f}s (float32) und {load_int8:.1f}s (int8)")
+
+    header = f"{'Aufnahme':<24}{'Dauer':>8}{'float32':>9}{'int8':>9}{'Faktor':>8}{'Drift':>8}"
+    if references:
+        header += f"{'WER fp32':>10}{'WER int8':>10}"
+    print(header)
+    for index, path in enumerate(args.audio):
+        duration = len(signals[index]) / WHISPER_SAMPLING_RATE
+        drift = word_error_rate(texts_fp32[index], texts_int8[index])
+        line = (f"{os.path.basename(path)[:23]:<24}{duration:>7.1f}s{latency_fp32[index]:>8.2f}s{latency_int8[index]:>8.2f}s"
+                f"{latency_fp32[index] / latency_int8[index]:>7.2f}x{drift:>8.1%}")
+        if references:
+            line += f"{word_error_rate(references[index], texts_fp32[index]):>10.1%}{word_error_rate(references[index], texts_int8[index]):>10.1%}"
+        print(line)
+
+    speedup = sum(latency_fp32) / sum(latency_int8)
+    drift = np.mean([word_error_rate(a, b) for a, b in zip(texts_fp32, texts_int8)])
+    print(f"Gesamt: {speedup:.2f}x schneller, mittlere WER-Drift gegenüber float32 {drift:.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+import os
+
+# Vor dem ersten Import von `response_cache`, damit kein Cache unter `.gradio` angelegt wird.
+os.environ.setdefault("RESPONSE_CACHE_ENABLED", "0")
+
+import pytest
+from disk_cache import DiskCache
+from response_cache import response_cache
+
+@pytest.fixture(autouse=True)
+def isolated_response_cache(tmp_path, monkeypatch):
+    """Leitet den gemeinsamen Antwort-Cache für jeden Test in ein eigenes temporäres Verzeichnis um."""
+    monkeypatch.setattr(response_cache, "cache", DiskCache(str(tmp_path / "response_cache"), 1024 * 1024))
+    monkeypatch.setattr(response_cache, "semantic", None)
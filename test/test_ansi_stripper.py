@@ -0,0 +1,92 @@
+import random
+import unittest
+from ansi_stripper import AnsiStripper, strip_ansi
+
+# Mitschnitt einer `ollama run gemma2:2b`-Sitzung mit Spinner, Cursor-Steuerung und Umlauten.
+RECORDED_TTY = (
+    "\x1b[?25l\x1b[?2026h\x1b[?25l\x1b[1G⠋ \x1b[K\x1b[?25h\x1b[?2026l"
+    "\x1b[?25l\x1b[?2026h\x1b[?25l\x1b[1G⠙ \x1b[K\x1b[?25h\x1b[?2026l"
+    "\x1b[?25l\x1b[?2026h\x1b[?25l\x1b[1G⠹ \x1b[K\x1b[?25h\x1b[?2026l"
+    "\x1b[?25l\x1b[?2026h\x1b[?25l\x1b[1G\x1b[K\x1b[?25h\x1b[?2026l\x1b[2K\x1b[1G\x1b[?25h"
+    "Grüß dich! Hier ist ein Beispiel:\r\n"
+    "\r\n"
+    "```python\r\n"
+    "print(\"Hallo Welt\")\r\n"
+    "```\r\n"
+    "\x1b[?25l⠸ \x1b[?25h\x1b[?25l\x1b[2K\x1b[1G⠼ \x1b[?25h\x1b[?25l\x1b[2K\x1b[1G\x1b[?25h"
+    "Viel Spaß beim Ausprobieren – 😊\r\n"
+    "\x1b]0;ollama\x07\x1b[0m\r\n"
+).encode("utf-8")
+
+RECORDED_TEXT = (
+    "   Grüß dich! Hier ist ein Beispiel:\n"
+    "\n"
+    "```python\n"
+    "print(\"Hallo Welt\")\n"
+    "```\n"
+    "  Viel Spaß beim Ausprobieren – 😊\n"
+    "\n"
+)
+
+SEQUENCES = [
+    "\x1b[?25l", "\x1b[?25h", "\x1b[2K", "\x1b[1G", "\x1b[K", "\x1b[0m", "\x1b[1;31m", "\x1b[?2026h",
+    "\x1b]0;titel\x07", "\x1b]2;titel\x1b\\", "\x1b7", "\x1b8", "\x1b(B", "\x9b2K", "\r", "⠋", "⠼",
+]
+TEXT = ["Hallo", " ", "Welt", "\n", "äöü", "ß", "€", "😊", "[1G", "?25l", "2K1G", "\t", "Code: `x`"]
+
+def split_randomly(data, rng):
+    chunks, i = [], 0
+    while i < len(data):
+        j = i + rng.randint(1, 9)
+        chunks.append(data[i:j])
+        i = j
+    return chunks
+
+def strip_chunks(chunks):
+    stripper = AnsiStripper()
+    return "".join(stripper.feed(chunk) for chunk in chunks) + stripper.flush()
+
+class TestAnsiStripper(unittest.TestCase):
+    def test_strip_recorded_output(self):
+        self.assertEqual(strip_ansi(RECORDED_TTY), RECORDED_TEXT)
+        self.assertEqual(strip_ansi(RECORDED_TTY.decode("utf-8")), RECORDED_TEXT)
+
+    def test_sequence_split_across_reads(self):
+        stripper = AnsiStripper()
+        self.assertEqual(stripper.feed("Hallo\x1b["), "Hallo")
+        self.assertEqual(stripper.feed("?25"), "")
+        self.assertEqual(stripper.feed("lWelt"), "Welt")
+        self.assertEqual(stripper.flush(), "")
+
+    def test_utf8_split_across_reads(self):
+        data = "Grüß".encode("utf-8")
+        self.assertEqual(strip_chunks([data[:3], data[3:5], data[5:]]), "Grüß")
+
+    def test_fuzz_recorded_output_bytes(self):
+        rng = random.Random(1)
+        for _ in range(300):
+            self.assertEqual(strip_chunks(split_randomly(RECORDED_TTY, rng)), RECORDED_TEXT)
+
+    def test_fuzz_recorded_output_str(self):
+        rng = random.Random(2)
+        recorded = RECORDED_TTY.decode("utf-8")
+        for _ in range(300):
+            self.assertEqual(strip_chunks(split_randomly(recorded, rng)), RECORDED_TEXT)
+
+    def test_fuzz_random_streams(self):
+        rng = random.Random(3)
+        for _ in range(500):
+            parts, expected = [], []
+            for _ in range(rng.randint(1, 40)):
+                if rng.random() < 0.4:
+                    parts.append(rng.choice(SEQUENCES))
+                else:
+                    token = rng.choice(TEXT)
+                    parts.append(token)
+                    expected.append(token)
+            data = "".join(parts)
+            self.assertEqual(strip_chunks(split_randomly(data, rng)), "".join(expected))
+            self.assertEqual(strip_chunks(split_randomly(data.encode("utf-8"), rng)), "".join(expected))
+
+if __name__ == "__main__":
+    unittest.main()
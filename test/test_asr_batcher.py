@@ -0,0 +1,62 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import numpy as np
+from asr_batcher import ASRBatcher
+
+class SlowBatchPipe:
+    """Pipeline, die pro Aufruf eine feste Zeit braucht und jedes Signal an seinem ersten Sample erkennt."""
+
+    def __init__(self, seconds=0.05, fail=False):
+        self.seconds = seconds
+        self.fail = fail
+        self.batch_sizes = []
+        self.lock = threading.Lock()
+
+    def __call__(self, inputs, **kwargs):
+        with self.lock:
+            self.batch_sizes.append(len(inputs))
+        time.sleep(self.seconds)
+        if self.fail:
+            raise RuntimeError("Modell kaputt")
+        return [{"text": f"signal {int(item['raw'][0])}", "chunks": []} for item in inputs]
+
+class TestASRBatcher(unittest.TestCase):
+    def test_results_are_routed_to_callers(self):
+        pipe = SlowBatchPipe()
+        batcher = ASRBatcher(lambda: nullcontext(pipe), max_batch=8, max_wait_ms=50)
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(lambda index: batcher.transcribe(np.full(10, index, dtype=np.float32)), range(16)))
+        self.assertEqual([result["text"] for result in results], [f"signal {index}" for index in range(16)])
+        self.assertLess(len(pipe.batch_sizes), 16)
+        self.assertLessEqual(max(pipe.batch_sizes), 8)
+        metrics = batcher.metrics()
+        self.assertEqual(metrics["jobs"], 16)
+        self.assertGreater(metrics["mean_batch_size"], 1)
+
+    def test_single_request_waits_at_most_max_wait(self):
+        pipe = SlowBatchPipe(seconds=0)
+        batcher = ASRBatcher(lambda: nullcontext(pipe), max_batch=8, max_wait_ms=20)
+        start = time.perf_counter()
+        batcher.transcribe(np.zeros(10, dtype=np.float32))
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(pipe.batch_sizes, [1])
+
+    def test_max_batch_one_disables_batching(self):
+        pipe = SlowBatchPipe(seconds=0.01)
+        batcher = ASRBatcher(lambda: nullcontext(pipe), max_batch=1)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda index: batcher.transcribe(np.full(10, index, dtype=np.float32)), range(4)))
+        self.assertEqual(pipe.batch_sizes, [1, 1, 1, 1])
+
+    def test_errors_reach_every_caller_of_the_batch(self):
+        batcher = ASRBatcher(lambda: nullcontext(SlowBatchPipe(fail=True)), max_batch=4, max_wait_ms=50)
+        futures = [batcher.submit(np.zeros(10, dtype=np.float32)) for _ in range(3)]
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import io
+import math
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+import wave
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from audio_preprocessing import load_pcm, prepare_upload
+
+def write_wav(path, rate, channels, seconds, frequency=440):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        samples = (int(16000 * math.sin(2 * math.pi * frequency * i / rate)) for i in range(int(rate * seconds)))
+        f.writeframes(b"".join(struct.pack("<h", value) * channels for value in samples))
+
+class TestAudioPreprocessing(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp()
+        cls.stereo = os.path.join(cls.tmp, "stereo.wav")
+        cls.mono16k = os.path.join(cls.tmp, "mono16k.wav")
+        write_wav(cls.stereo, 44100, 2, 2)
+        write_wav(cls.mono16k, 16000, 1, 2)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp)
+
+    def test_load_pcm_mono_16k_float(self):
+        for path in (self.stereo, self.mono16k):
+            samples = load_pcm(path)
+            self.assertEqual(samples.dtype, np.float32)
+            self.assertEqual(samples.ndim, 1)
+            self.assertAlmostEqual(len(samples) / 16000, 2.0, places=2)
+            self.assertLessEqual(float(np.abs(samples).max()), 1.0)
+
+    def test_suitable_wav_is_uploaded_unchanged(self):
+        name, data = prepare_upload(self.mono16k)
+        self.assertEqual(name, "mono16k.wav")
+        with open(self.mono16k, "rb") as f:
+            self.assertEqual(data, f.read())
+
+    def test_unsuitable_wav_is_downmixed_and_resampled(self):
+        name, data = prepare_upload(self.stereo)
+        self.assertLess(len(data), os.path.getsize(self.stereo) / 4)
+        if name.endswith(".wav"):
+            with wave.open(io.BytesIO(data), "rb") as f:
+                self.assertEqual((f.getnchannels(), f.getframerate()), (1, 16000))
+
+    def test_parallel_calls_do_not_share_files(self):
+        paths = []
+        for index in range(6):
+            path = os.path.join(self.tmp, f"parallel{index}.wav")
+            write_wav(path, 22050, 2, 0.5, frequency=200 + 100 * index)
+            paths.append(path)
+        cwd = set(os.listdir("."))
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            results = list(pool.map(prepare_upload, paths))
+        self.assertEqual(set(os.listdir(".")), cwd)
+        self.assertEqual(len({data for _, data in results}), len(paths))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import threading
+import time
+import unittest
+from cancellation import CancellationRegistry, CancellationToken, GenerationCancelled
+
+class TestCancellationToken(unittest.TestCase):
+    def test_callbacks_run_on_cancel(self):
+        token = CancellationToken("ollama")
+        calls = []
+        token.on_cancel(lambda: calls.append("a"))
+        unregister = token.on_cancel(lambda: calls.append("b"))
+        unregister()
+        token.cancel()
+        token.cancel()
+        self.assertEqual(calls, ["a"])
+        self.assertTrue(token.cancelled)
+        self.assertIsNotNone(token.release_time)
+        with self.assertRaises(GenerationCancelled):
+            token.raise_if_cancelled()
+
+    def test_callback_after_cancel_runs_immediately(self):
+        token = CancellationToken()
+        token.cancel()
+        calls = []
+        token.on_cancel(lambda: calls.append(1))
+        self.assertEqual(calls, [1])
+
+    def test_failing_callback_does_not_stop_others(self):
+        token = CancellationToken()
+        calls = []
+        token.on_cancel(lambda: calls.append(1))
+        token.on_cancel(lambda: 1 / 0)
+        token.cancel()
+        self.assertEqual(calls, [1])
+
+class TestCancellationRegistry(unittest.TestCase):
+    def test_cancel_only_matching_session_and_name(self):
+        registry = CancellationRegistry()
+        with registry.track("a", "ollama") as ollama, registry.track("a", "mistral") as mistral, registry.track("b", "ollama") as other:
+            self.assertEqual(registry.cancel("a", "ollama"), 1)
+            self.assertTrue(ollama.cancelled)
+            self.assertFalse(mistral.cancelled)
+            self.assertFalse(other.cancelled)
+            self.assertEqual(registry.cancel("a"), 1)
+            self.assertTrue(mistral.cancelled)
+        self.assertEqual(registry.cancel("b"), 0)
+
+    def test_generation_cancelled_is_swallowed(self):
+        registry = CancellationRegistry()
+        with registry.track("a", "ollama") as token:
+            registry.cancel("a")
+            token.raise_if_cancelled()
+        self.assertEqual(registry.metrics()["cancelled"], 1)
+
+    def test_metrics_estimate_saved_time(self):
+        registry = CancellationRegistry()
+        with registry.track("a", "ollama"):
+            time.sleep(0.2)
+        stopped = threading.Event()
+        with registry.track("a", "ollama") as token:
+            token.on_cancel(stopped.set)
+            registry.cancel("a", "ollama")
+        metrics = registry.metrics()
+        self.assertTrue(stopped.is_set())
+        self.assertEqual(metrics["completed"], 1)
+        self.assertEqual(metrics["cancelled"], 1)
+        self.assertGreater(metrics["saved_seconds"], 0.1)
+        self.assertLess(metrics["max_release_ms"], 100)
+        self.assertIn("| 1 | 1 |", registry.status_markdown())
+
+if __name__ == "__main__":
+    unittest.main()
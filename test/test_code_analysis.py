@@ -0,0 +1,127 @@
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from api_client import api_client
+from code_analysis import IncrementalCodeAnalyzer, split_units, unit_hash
+from disk_cache import DiskCache
+from gemini_functions import GeminiFunctions
+from response_cache import ResponseCache
+
+CODE = '''import os
+
+LIMIT = 3
+
+@staticmethod
+def load(path):
+    return open(path).read()
+
+class Parser:
+    def parse(self, text):
+        return text.split()
+
+def main():
+    print(load(os.getcwd()))
+'''
+
+class FakeModel:
+    def __init__(self, delay=0.0, fail_on=None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def __call__(self, prompt):
+        with self.lock:
+            self.prompts.append(prompt)
+        time.sleep(self.delay)
+        if self.fail_on and self.fail_on in prompt:
+            raise ConnectionError("Netzwerkfehler")
+        return f"Feedback {len(prompt)}"
+
+class TestSplitUnits(unittest.TestCase):
+    def test_top_level_functions_and_classes(self):
+        units = split_units(CODE)
+        self.assertEqual([unit.name for unit in units], ["Modulebene", "def load", "class Parser", "def main"])
+        self.assertEqual(units[0].source, "import os\nLIMIT = 3\n")
+        self.assertEqual((units[1].start, units[1].end), (5, 7))
+        self.assertTrue(units[1].source.startswith("@staticmethod"))
+
+    def test_invalid_code_is_one_unit(self):
+        self.assertEqual([unit.name for unit in split_units("def broken(:\n")], ["Datei"])
+        self.assertEqual(split_units("  \n"), [])
+
+    def test_hash_ignores_comments_and_formatting(self):
+        self.assertEqual(unit_hash("def f(a):\n    return a+1\n"), unit_hash("def f( a ):  # Kommentar\n\n    return (a + 1)\n"))
+        self.assertNotEqual(unit_hash("def f(a):\n    return a + 1\n"), unit_hash("def f(a):\n    return a + 2\n"))
+
+class TestIncrementalCodeAnalyzer(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = ResponseCache(DiskCache(self.directory, 1024 * 1024))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def analyzer(self, model, workers=4):
+        return IncrementalCodeAnalyzer(model, lambda: "gemini-test", params={"temperature": 0}, cache=self.cache, workers=workers)
+
+    def test_only_changed_units_are_sent(self):
+        model = FakeModel()
+        analyzer = self.analyzer(model)
+        first = analyzer.analyze(CODE, "Analysiere:")
+        self.assertEqual(len(model.prompts), 4)
+        self.assertIn("4 von 4 Einheiten neu analysiert", first)
+        edited = CODE.replace("text.split()", "text.split(',')").replace("LIMIT = 3", "LIMIT = 3  # Obergrenze")
+        second = analyzer.analyze(edited, "Analysiere:")
+        self.assertEqual(len(model.prompts), 5)
+        self.assertIn("class Parser", model.prompts[-1])
+        self.assertIn("1 von 4 Einheiten neu analysiert", second)
+
+    def test_report_keeps_file_order(self):
+        report = self.analyzer(FakeModel()).analyze(CODE, "Analysiere:")
+        positions = [report.index(f"### {name}") for name in ("Modulebene", "def load", "class Parser", "def main")]
+        self.assertEqual(positions, sorted(positions))
+        self.assertIn("### def load (Zeilen 5–7)", report)
+
+    def test_units_are_analyzed_in_parallel(self):
+        start = time.perf_counter()
+        self.analyzer(FakeModel(delay=0.2), workers=4).analyze(CODE, "Analysiere:")
+        self.assertLess(time.perf_counter() - start, 0.6)
+
+    def test_failed_unit_is_reported_and_retried(self):
+        model = FakeModel(fail_on="class Parser")
+        analyzer = self.analyzer(model)
+        report = analyzer.analyze(CODE, "Analysiere:")
+        self.assertIn("Fehler während der Analyse: Netzwerkfehler", report)
+        model.fail_on = None
+        analyzer.analyze(CODE, "Analysiere:")
+        self.assertEqual(len(model.prompts), 5)
+
+class TestGeminiIncrementalAnalysis(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.original_model = api_client.gemini_model
+        self.prompts = []
+        api_client.gemini_model = SimpleNamespace(model_name="models/gemini-test", generate_content=self.generate_content)
+
+    def tearDown(self):
+        api_client.gemini_model = self.original_model
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def generate_content(self, prompt, generation_config=None):
+        self.prompts.append(prompt)
+        return SimpleNamespace(text="Sieht gut aus.")
+
+    def test_incremental_mode_uses_analyzer(self):
+        functions = GeminiFunctions()
+        functions.code_analyzer.cache = ResponseCache(DiskCache(self.directory, 1024 * 1024))
+        report = functions.suggest_code_improvements(CODE, incremental=True)
+        self.assertEqual(len(self.prompts), 4)
+        self.assertTrue(all(prompt.startswith("Schlage Verbesserungen") for prompt in self.prompts))
+        self.assertIn("### def main", report)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import difflib
+import random
+import unittest
+from diff_engine import DiffEngine, _intern_lines, get_opcodes
+
+def apply_opcodes(a, b, opcodes):
+    result = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            result.extend(a[i1:i2])
+        else:
+            result.extend(b[j1:j2])
+    return result
+
+class TestDiffEngine(unittest.TestCase):
+    def test_opcodes_reconstruct_second_document(self):
+        rng = random.Random(0)
+        for _ in range(500):
+            a = [rng.choice("abcdef") for _ in range(rng.randint(0, 40))]
+            b = [rng.choice("abcdefg") for _ in range(rng.randint(0, 40))]
+            ids1, ids2 = _intern_lines(a, b)
+            opcodes = get_opcodes(ids1, ids2)
+            for tag, i1, i2, j1, j2 in opcodes:
+                if tag == "equal":
+                    self.assertEqual(a[i1:i2], b[j1:j2])
+            self.assertEqual(apply_opcodes(a, b, opcodes), b)
+
+    def test_matches_difflib_for_simple_change(self):
+        content1 = "\n".join(f"Zeile {i}" for i in range(50))
+        content2 = content1.replace("Zeile 20", "Zeile 20 geändert")
+        expected = "\n".join(difflib.unified_diff(content1.splitlines(), content2.splitlines(), "File1", "File2", lineterm=""))
+        self.assertEqual(DiffEngine().diff(content1, content2).text(), expected)
+
+    def test_identical_documents_have_no_hunks(self):
+        result = DiffEngine().diff("a\nb\n", "a\nb\n")
+        self.assertEqual(result.hunks, [])
+        self.assertEqual(result.text(), "")
+
+    def test_result_is_cached_by_content(self):
+        engine = DiffEngine(cache_size=1)
+        first = engine.diff("a\nb", "a\nc")
+        self.assertIs(engine.diff("a\nb", "a\nc"), first)
+        engine.diff("x", "y")
+        self.assertIsNot(engine.diff("a\nb", "a\nc"), first)
+
+    def test_cache_keeps_file_names(self):
+        engine = DiffEngine()
+        engine.diff("a\nb", "a\nc", "alt.txt", "neu.txt")
+        self.assertEqual(engine.diff("a\nb", "a\nc", "v1.txt", "v2.txt").header, ["--- v1.txt", "+++ v2.txt"])
+
+    def test_pages_keep_hunks_together(self):
+        content1 = "\n".join(f"Zeile {i}" for i in range(1000))
+        content2 = "\n".join(f"Zeile {i}" + (" neu" if i % 50 == 0 else "") for i in range(1000))
+        result = DiffEngine().diff(content1, content2)
+        pages = result.pages(page_lines=30)
+        self.assertGreater(len(pages), 1)
+        for page in pages:
+            self.assertLessEqual(len(page), 30)
+            self.assertTrue(page[0].startswith("@@"))
+        self.assertEqual([line for page in pages for line in page], [line for hunk in result.hunks for line in hunk])
+
+if __name__ == "__main__":
+    unittest.main()
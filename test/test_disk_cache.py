@@ -0,0 +1,47 @@
+import os
+import tempfile
+import time
+import unittest
+from disk_cache import DiskCache
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_put_and_get(self):
+        cache = DiskCache(self.tmp.name, 1024)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", b"Inhalt")
+        self.assertEqual(cache.get("a"), b"Inhalt")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        cache = DiskCache(self.tmp.name, 250)
+        cache.put("a", b"a" * 100)
+        cache.put("b", b"b" * 100)
+        old = time.time() - 60
+        os.utime(os.path.join(self.tmp.name, cache._name("a")), (old, old))
+        os.utime(os.path.join(self.tmp.name, cache._name("b")), (old - 60, old - 60))
+        self.assertIsNotNone(cache.get("b"))
+        cache.put("c", b"c" * 100)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), b"b" * 100)
+        self.assertEqual(cache.size(), 200)
+
+    def test_oversized_entry_is_skipped(self):
+        cache = DiskCache(self.tmp.name, 10)
+        cache.put("a", b"x" * 11)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.size(), 0)
+
+    def test_size_survives_restart(self):
+        DiskCache(self.tmp.name, 1024).put("a", b"x" * 100)
+        cache = DiskCache(self.tmp.name, 1024)
+        self.assertEqual(cache.size(), 100)
+        cache.delete("a")
+        self.assertEqual(cache.size(), 0)
+        self.assertIsNone(cache.get("a"))
+
+if __name__ == "__main__":
+    unittest.main()
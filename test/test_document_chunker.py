@@ -0,0 +1,30 @@
+import unittest
+from document_chunker import estimate_tokens, split_into_chunks, group_by_budget, map_concurrently
+
+class TestDocumentChunker(unittest.TestCase):
+    def test_chunks_respect_budget(self):
+        text = "\n\n".join(f"Absatz {i}. " + "Ein Satz mit einigen Wörtern. " * (i % 30 + 1) for i in range(200))
+        chunks = split_into_chunks(text, 100)
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(estimate_tokens(chunk), 100)
+        self.assertEqual(" ".join(" ".join(chunks).split()), " ".join(text.split()))
+
+    def test_splits_at_paragraphs_first(self):
+        chunks = split_into_chunks("Erster Absatz.\n\nZweiter Absatz.", 5)
+        self.assertEqual(chunks, ["Erster Absatz.", "Zweiter Absatz."])
+
+    def test_long_word_is_split_hard(self):
+        chunks = split_into_chunks("x" * 100, 5)
+        self.assertEqual(chunks, ["x" * 20] * 5)
+
+    def test_group_by_budget(self):
+        groups = group_by_budget(["a" * 30, "b" * 30, "c" * 30, "d" * 100], 20)
+        self.assertEqual(groups, [["a" * 30, "b" * 30], ["c" * 30], ["d" * 100]])
+
+    def test_map_concurrently_returns_all_results(self):
+        results = dict(map_concurrently(str.upper, ["a", "b", "c"], workers=2))
+        self.assertEqual(results, {0: "A", 1: "B", 2: "C"})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from fpdf import FPDF
+from disk_cache import DiskCache
+from document_ingestion import DocumentIngestion
+
+class TestDocumentIngestion(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.ingestion = DocumentIngestion(DiskCache(os.path.join(self.tmp, "cache"), 1024 * 1024))
+        self.pdf_path = os.path.join(self.tmp, "bericht.pdf")
+        pdf = FPDF()
+        for number in range(3):
+            pdf.add_page()
+            pdf.set_font("Arial", size=12)
+            pdf.cell(0, 10, f"Seite {number}")
+        pdf.output(self.pdf_path)
+
+    def test_pdf_is_extracted_once_per_content(self):
+        first = self.ingestion.extract_text(self.pdf_path)
+        self.assertIn("Seite 2", first)
+
+        copy_path = os.path.join(self.tmp, "kopie.pdf")
+        shutil.copy(self.pdf_path, copy_path)
+        with patch("document_ingestion.iter_pdf_pages", side_effect=AssertionError("nicht erneut extrahieren")):
+            self.assertEqual(self.ingestion.extract_text(copy_path), first)
+        self.assertEqual(self.ingestion.cache.hits, 1)
+
+    def test_accepts_objects_with_name(self):
+        text_path = os.path.join(self.tmp, "notiz.md")
+        with open(text_path, "w", encoding="utf-8") as f:
+            f.write("# Notiz")
+
+        class Upload:
+            name = text_path
+
+        self.assertEqual(self.ingestion.extract_text(Upload()), "# Notiz")
+
+    def test_unsupported_type(self):
+        with self.assertRaises(ValueError):
+            self.ingestion.extract_text(os.path.join(self.tmp, "bild.png"))
+
+    def test_broken_pdf_raises_value_error(self):
+        broken = os.path.join(self.tmp, "kaputt.pdf")
+        with open(broken, "wb") as f:
+            f.write(b"kein PDF")
+        with self.assertRaises(ValueError):
+            self.ingestion.extract_text(broken)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+import time
+import unittest
+from types import SimpleNamespace
+from api_client import api_client
+from cancellation import CancellationToken
+from gemini_functions import GeminiFunctions
+from gemini_sessions import GeminiSessionRegistry, estimate_tokens, trim_history
+
+class FakeChat:
+    """ChatSession-Ersatz, der wie das SDK den Verlauf erst nach vollständigem Streamen erweitert."""
+
+    def __init__(self, model, history):
+        self.model = model
+        self.history = list(history)
+
+    def send_message(self, content, stream=False):
+        self.model.sent.append(list(self.history) + [{"role": "user", "parts": content}])
+
+        def chunks():
+            for text in self.model.reply:
+                yield SimpleNamespace(text=text)
+            self.history += [{"role": "user", "parts": content}, {"role": "model", "parts": ["".join(self.model.reply)]}]
+
+        return chunks()
+
+class BlockedChat(FakeChat):
+    """Wie eine ChatSession nach einer Antwort mit finish_reason SAFETY: `history` löst danach aus."""
+
+    blocked = False
+
+    @property
+    def history(self):
+        if self.blocked:
+            raise ValueError("Antwort wurde blockiert")
+        return self._history
+
+    @history.setter
+    def history(self, value):
+        self._history = value
+
+    def send_message(self, content, stream=False):
+        chunks = super().send_message(content, stream)
+
+        def blocking():
+            yield from chunks
+            self.blocked = True
+
+        return blocking()
+
+class FakeModel:
+    def __init__(self, reply=("Antwort",)):
+        self.reply = list(reply)
+        self.sent = []
+        self.chats = 0
+
+    def start_chat(self, history=None):
+        self.chats += 1
+        return FakeChat(self, history or [])
+
+def turn(user, model):
+    return [{"role": "user", "parts": [user]}, {"role": "model", "parts": [model]}]
+
+class TestTrimHistory(unittest.TestCase):
+    def test_removes_whole_rounds_from_the_front(self):
+        history = turn("a" * 400, "b" * 400) + turn("c" * 40, "d" * 40)
+        trimmed, dropped = trim_history(history, budget=50)
+        self.assertEqual(dropped, 2)
+        self.assertEqual(trimmed[0]["role"], "user")
+        self.assertEqual(trim_history(history, budget=10_000), (history, 0))
+
+    def test_images_count_as_fixed_tokens(self):
+        self.assertEqual(estimate_tokens({"parts": ["abcd" * 10, object()]}), 11 + 258)
+
+class TestGeminiSessionRegistry(unittest.TestCase):
+    def setUp(self):
+        self.model = FakeModel()
+        self.registry = GeminiSessionRegistry(lambda: self.model, idle_timeout=0, max_history_tokens=10_000)
+
+    def talk(self, session_id, text):
+        with self.registry.use(session_id, [text]) as session:
+            for _ in session.chat.send_message([text], stream=True):
+                pass
+
+    def test_session_keeps_context_and_sends_only_new_turn(self):
+        self.talk("a", "Ich heiße Anna.")
+        self.talk("a", "Wie heiße ich?")
+        self.assertEqual(self.model.chats, 1)
+        second = self.model.sent[1]
+        self.assertEqual(len(second), 3)
+        self.assertEqual(second[0]["parts"], ["Ich heiße Anna."])
+        self.assertEqual(second[-1]["parts"], ["Wie heiße ich?"])
+
+    def test_sessions_are_separate(self):
+        self.talk("a", "eins")
+        self.talk("b", "zwei")
+        self.assertEqual(len(self.model.sent[1]), 1)
+        self.assertEqual(self.registry.metrics()["sessions"], 2)
+
+    def test_history_is_trimmed_to_budget(self):
+        self.registry.max_history_tokens = 120
+        for index in range(20):
+            self.talk("a", f"Nachricht {index} " + "x" * 100)
+        self.assertLessEqual(sum(estimate_tokens(content) for content in self.model.sent[-1]), 120)
+        self.assertGreater(self.registry.metrics()["trimmed_messages"], 0)
+
+    def test_idle_sessions_are_evicted(self):
+        self.registry.idle_timeout = 0.05
+        self.talk("a", "hallo")
+        time.sleep(0.1)
+        self.assertEqual(self.registry.metrics(), {"sessions": 0, "created": 1, "evicted": 1, "trimmed_messages": 0})
+
+    def test_model_switch_keeps_history(self):
+        self.talk("a", "eins")
+        self.model = FakeModel()
+        self.talk("a", "zwei")
+        self.assertEqual(len(self.model.sent[0]), 3)
+
+    def test_failed_turn_is_discarded(self):
+        self.talk("a", "eins")
+        with self.assertRaises(RuntimeError):
+            with self.registry.use("a", ["zwei"]) as session:
+                session.chat.history.append({"role": "user", "parts": ["zwei"]})
+                raise RuntimeError("Netzwerkfehler")
+        with self.registry.use("a") as session:
+            self.assertEqual(len(session.chat.history), 2)
+
+    def test_unreadable_history_resumes_from_last_good_state(self):
+        self.talk("a", "eins")
+        with self.registry.use("a") as session:
+            session.chat = BlockedChat(self.model, session.chat.history)
+        self.talk("a", "zwei")
+        self.talk("a", "drei")
+        self.talk("a", "vier")
+        sent = self.model.sent[-2]
+        self.assertEqual([content["parts"] for content in sent], [["eins"], ["Antwort"], ["drei"]])
+        self.assertEqual(len(self.model.sent[-1]), 5)
+
+class TestGeminiChatSessions(unittest.TestCase):
+    def setUp(self):
+        self.original_model = api_client.gemini_model
+        api_client.gemini_model = FakeModel(reply=["Hallo", " Anna"])
+        self.functions = GeminiFunctions()
+
+    def tearDown(self):
+        api_client.gemini_model = self.original_model
+
+    def test_chat_continues_conversation_of_session(self):
+        for _ in self.functions.chat_with_gemini("Ich heiße Anna.", [], session_id="sitzung-1"):
+            pass
+        for _ in self.functions.chat_with_gemini("Wie heiße ich?", [], session_id="sitzung-1"):
+            pass
+        sent = api_client.gemini_model.sent
+        self.assertEqual([content["parts"] for content in sent[1]], [["Ich heiße Anna."], ["Hallo Anna"], ["Wie heiße ich?"]])
+
+    def test_cancelled_turn_is_not_remembered(self):
+        token = CancellationToken("gemini")
+        for history, _ in self.functions.chat_with_gemini("Erzähl was", [], cancel_token=token, session_id="sitzung-2"):
+            if history[-1][0] is None:
+                token.cancel()
+        for _ in self.functions.chat_with_gemini("Neue Frage", [], session_id="sitzung-2"):
+            pass
+        self.assertEqual(len(api_client.gemini_model.sent[-1]), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import time
+import unittest
+from types import SimpleNamespace
+from api_client import api_client
+from cancellation import CancellationToken
+from gemini_functions import GeminiFunctions
+from gemini_sessions import gemini_sessions
+
+class FakeGeminiModel:
+    """Lokaler Ersatz für das Gemini-Modell, der eine Antwort in Teilen mit Pausen liefert."""
+
+    def __init__(self, chunks, delay=0.0, first_delay=0.0):
+        self.chunks = chunks
+        self.delay = delay
+        self.first_delay = first_delay
+        self.requests = []
+
+    def _stream(self):
+        time.sleep(self.first_delay)
+        for index, text in enumerate(self.chunks):
+            if index:
+                time.sleep(self.delay)
+            yield SimpleNamespace(text=text)
+
+    def start_chat(self, history=None):
+        return SimpleNamespace(model=self, history=list(history or []), send_message=self.send_message)
+
+    def send_message(self, content, stream=False):
+        self.requests.append((content, stream))
+        return self._stream()
+
+    def generate_content(self, contents, stream=False):
+        self.requests.append((contents, stream))
+        return self._stream()
+
+class OfflineGeminiFunctions(GeminiFunctions):
+    def upload_to_gemini(self, image):
+        return "hochgeladenes-bild"
+
+def assistant_texts(updates):
+    return [history[-1][1] for history in updates if history and history[-1][0] is None]
+
+class TestGeminiStreaming(unittest.TestCase):
+    def setUp(self):
+        self.original_model = api_client.gemini_model
+        self.functions = OfflineGeminiFunctions()
+        gemini_sessions.reset(None)
+
+    def tearDown(self):
+        api_client.gemini_model = self.original_model
+
+    def test_chat_yields_progressive_history(self):
+        api_client.gemini_model = FakeGeminiModel(["Hallo", " Welt", ", wie", " geht's?"], delay=0.06)
+        updates = []
+        for history, user_input in self.functions.chat_with_gemini("Hi", []):
+            self.assertEqual(user_input, "")
+            updates.append(list(history))
+        self.assertEqual(updates[0], [("Hi", None)])
+        texts = assistant_texts(updates)
+        self.assertIn("Hallo<", texts[0])
+        self.assertIn("Hallo Welt, wie geht's?<", texts[-1])
+        self.assertGreater(len(set(texts)), 2)
+        self.assertEqual(len(updates[-1]), 2)
+        self.assertEqual(api_client.gemini_model.requests[0], (["Hi"], True))
+
+    def test_fast_chunks_are_throttled(self):
+        chunks = [f"{index} " for index in range(500)]
+        api_client.gemini_model = FakeGeminiModel(chunks)
+        updates = [list(history) for history, _ in self.functions.chat_with_gemini("Zähle", [])]
+        self.assertLess(len(updates), 20)
+        self.assertIn("".join(chunks), updates[-1][-1][1])
+
+    def test_first_token_is_shown_before_stream_ends(self):
+        api_client.gemini_model = FakeGeminiModel(["Erst", "es", " Token"], delay=0.2, first_delay=0.05)
+        start = time.perf_counter()
+        with self.assertLogs("gemini_functions", level="INFO") as logs:
+            for history, _ in self.functions.chat_with_gemini("Hi", []):
+                if history[-1][0] is None:
+                    first_update = time.perf_counter() - start
+                    break
+        self.assertLess(first_update, 0.2)
+        self.assertTrue(any("erstes Token" in line for line in logs.output))
+
+    def test_cancel_stops_stream(self):
+        api_client.gemini_model = FakeGeminiModel(["eins", " zwei", " drei", " vier"], delay=0.02)
+        token = CancellationToken("gemini")
+        updates = []
+        for history, _ in self.functions.chat_with_gemini("Hi", [], cancel_token=token):
+            updates.append(list(history))
+            if history[-1][0] is None:
+                token.cancel()
+        final = updates[-1][-1][1]
+        self.assertIn("abgebrochen", final)
+        self.assertNotIn("vier", final)
+
+    def test_analyze_image_streams(self):
+        api_client.gemini_model = FakeGeminiModel(["Ein ", "rotes ", "Auto."], delay=0.06)
+        updates = [list(history) for history in self.functions.analyze_image_gemini(object(), [], "Was ist das?")]
+        self.assertGreater(len(updates), 1)
+        self.assertIn("Ein rotes Auto.", updates[-1][-1][1])
+        contents, stream = api_client.gemini_model.requests[0]
+        self.assertTrue(stream)
+        self.assertEqual(contents[1], "hochgeladenes-bild")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import datetime
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from PIL import Image
+from gemini_uploads import GeminiUploadManager
+
+class FakeUploader:
+    """Ersatz für `genai.upload_file`, der die Aufrufe zählt."""
+
+    def __init__(self, delay=0.0, expiration_time=None, fail=False):
+        self.delay = delay
+        self.expiration_time = expiration_time
+        self.fail = fail
+        self.calls = []
+
+    def __call__(self, data, mime_type, display_name):
+        self.calls.append((data.read(), mime_type, display_name))
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("Upload fehlgeschlagen")
+        return SimpleNamespace(uri=f"files/{len(self.calls)}", expiration_time=self.expiration_time)
+
+def image(color="red", size=(32, 32)):
+    return Image.new("RGB", size, color)
+
+class TestGeminiUploadManager(unittest.TestCase):
+    def test_same_pixels_are_uploaded_once(self):
+        uploader = FakeUploader()
+        manager = GeminiUploadManager(uploader)
+        first = manager.upload(image())
+        self.assertIs(manager.upload(image()), first)
+        self.assertIsNot(manager.upload(image("blue")), first)
+        self.assertEqual(len(uploader.calls), 2)
+        metrics = manager.metrics()
+        self.assertEqual((metrics["uploads"], metrics["reused"], metrics["files"]), (2, 1, 2))
+
+    def test_uploads_jpeg_from_memory(self):
+        uploader = FakeUploader()
+        GeminiUploadManager(uploader).upload(Image.new("RGBA", (8, 8)))
+        data, mime_type, _ = uploader.calls[0]
+        self.assertEqual(mime_type, "image/jpeg")
+        self.assertTrue(data.startswith(b"\xff\xd8"))
+
+    def test_expired_files_are_uploaded_again(self):
+        uploader = FakeUploader()
+        manager = GeminiUploadManager(uploader, ttl=0.05, margin=0.0)
+        manager.upload(image())
+        time.sleep(0.1)
+        manager.upload(image())
+        self.assertEqual(len(uploader.calls), 2)
+
+    def test_expiration_time_of_service_is_respected(self):
+        soon = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=30)
+        uploader = FakeUploader(expiration_time=soon)
+        manager = GeminiUploadManager(uploader, ttl=3600, margin=60)
+        manager.upload(image())
+        manager.upload(image())
+        self.assertEqual(len(uploader.calls), 2)
+
+    def test_concurrent_uploads_are_coalesced(self):
+        uploader = FakeUploader(delay=0.1)
+        manager = GeminiUploadManager(uploader)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(manager.upload(image()))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(uploader.calls), 1)
+        self.assertEqual(len({id(result) for result in results}), 1)
+        metrics = manager.metrics()
+        self.assertEqual(metrics["coalesced"] + metrics["reused"], 7)
+
+    def test_failed_upload_is_retried(self):
+        uploader = FakeUploader(fail=True)
+        manager = GeminiUploadManager(uploader)
+        with self.assertRaises(ConnectionError):
+            manager.upload(image())
+        uploader.fail = False
+        manager.upload(image())
+        self.assertEqual(len(uploader.calls), 2)
+
+if __name__ == "__main__":
+    unittest.main()
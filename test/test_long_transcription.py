@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+import wave
+import numpy as np
+from cancellation import CancellationToken, GenerationCancelled
+from long_transcription import find_split_points, iter_transcription, format_transcript, transcribe_file
+from transcription import TranscriptionBackend, TranscriptSegment
+
+RATE = 16000
+
+def speech_with_pauses(seconds, pauses):
+    """Rauschen als Sprache, Stille in den Intervallen aus `pauses` (Sekunden)."""
+    samples = np.random.default_rng(0).uniform(-0.5, 0.5, seconds * RATE).astype(np.float32)
+    for start, end in pauses:
+        samples[int(start * RATE):int(end * RATE)] = 0.0
+    return samples
+
+def write_wav(path, samples):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(RATE)
+        f.writeframes((samples * 32767).astype("<i2").tobytes())
+
+class FakeBackend(TranscriptionBackend):
+    """Gibt für jeden Abschnitt ein Segment mit seiner Länge zurück; spätere Abschnitte sind schneller fertig."""
+
+    max_workers = 4
+
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def transcribe(self, audio_file_path):
+        return "kurz"
+
+    def transcribe_segments(self, samples):
+        with self.lock:
+            self.calls += 1
+            order = self.calls
+        time.sleep(max(0.0, 0.2 - 0.05 * order))
+        duration = len(samples) / RATE
+        return [TranscriptSegment(0.5, duration - 0.5, f"{duration:.1f}")]
+
+class TestLongTranscription(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp()
+        cls.pauses = [(8.0, 8.6), (17.0, 17.8), (26.0, 26.6), (36.0, 36.5)]
+        cls.samples = speech_with_pauses(45, cls.pauses)
+        cls.path = os.path.join(cls.tmp, "lang.wav")
+        write_wav(cls.path, cls.samples)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp)
+
+    def test_splits_in_pauses(self):
+        ranges = find_split_points(self.samples, chunk_s=10, search_s=4)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], len(self.samples))
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+            self.assertTrue(any(a * RATE <= end <= b * RATE for a, b in self.pauses), end / RATE)
+        self.assertTrue(all(end - start <= 10 * RATE for start, end in ranges))
+
+    def test_short_signal_is_one_chunk(self):
+        self.assertEqual(find_split_points(self.samples[:RATE], chunk_s=10), [(0, RATE)])
+        self.assertEqual(find_split_points(self.samples[:0], chunk_s=10), [])
+
+    def test_stitches_in_order_with_offsets(self):
+        updates = list(iter_transcription(self.path, FakeBackend(), chunk_s=10, cache=None))
+        final = updates[-1]
+        self.assertEqual(len(final), 5)
+        starts = [segment.start for segment in final]
+        self.assertEqual(starts, sorted(starts))
+        self.assertAlmostEqual(final[0].start, 0.5, places=2)
+        self.assertGreater(final[1].start, 8.0)
+        for previous, current in zip(updates, updates[1:]):
+            self.assertEqual(current[:len(previous)], previous)
+        self.assertIn("\n", format_transcript(final, timestamps=True))
+        self.assertTrue(format_transcript(final, timestamps=True).startswith("[00:00:00]"))
+
+    def test_cancel_stops_remaining_chunks(self):
+        token = CancellationToken("test")
+        backend = FakeBackend()
+        with self.assertRaises(GenerationCancelled):
+            for _ in iter_transcription(self.path, backend, workers=1, cancel_token=token, chunk_s=5, cache=None):
+                token.cancel()
+        self.assertLess(backend.calls, len(find_split_points(self.samples, chunk_s=5)))
+
+    def test_short_file_goes_to_backend_unchanged(self):
+        path = os.path.join(self.tmp, "kurz.wav")
+        write_wav(path, self.samples[:5 * RATE])
+        self.assertEqual(transcribe_file(path, FakeBackend(), cache=None), "kurz")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,9 @@
 
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
+import requests
+from PIL import Image
+from cancellation import CancellationToken
 from mistral_functions import MistralFunctions, encode_image, format_chat_message
 from api_client import api_client
 
@@ -17,6 +20,16 @@ class TestMistralFunctions(unittest.TestCase):
         result = list(self.mistral_functions.chat_with_mistral(user_input, chat_history))
         self.assertEqual(result[0][0][1], "Hi")
 
+    def test_chat_releases_response_on_http_error(self):
+        response = MagicMock()
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError("500")
+        token = CancellationToken("mistral")
+        with patch("mistral_functions.requests.post", return_value=response):
+            history, _ = self.mistral_functions.chat_with_mistral("Hallo", [], cancel_token=token)
+        self.assertIn("Fehler bei der Verarbeitung der Anfrage", history[-1][1])
+        response.close.assert_called_once()
+        self.assertEqual(token._callbacks, [])
+
     def test_analyze_image_mistral(self):
         image = MagicMock()
         user_input = "Describe this image"
@@ -26,6 +39,14 @@ class TestMistralFunctions(unittest.TestCase):
         result = self.mistral_functions.analyze_image_mistral(image, chat_history, user_input, "Describe this image")
         self.assertIn("Image description", result[-1][1])
 
+    def test_image_description_is_reused(self):
+        image = Image.new("RGB", (4, 4), "red")
+        api_client.mistral_client.chat.complete = MagicMock(return_value=MagicMock(choices=[MagicMock(message=MagicMock(content="Ein rotes Bild"))]))
+        for _ in range(2):
+            result = self.mistral_functions.analyze_image_mistral(image, [], "Beschreibe", "Beschreibe")
+        self.assertIn("Ein rotes Bild", result[-1][1])
+        api_client.mistral_client.chat.complete.assert_called_once()
+
     def test_compare_images_mistral(self):
         image1 = MagicMock()
         image2 = MagicMock()
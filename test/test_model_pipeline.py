@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+import torch
+from model_pipeline import ModelPipeline, quantize_linear_layers, save_quantized_weights, quantized_weights_path
+
+class CountingPipeline(ModelPipeline):
+    """ModelPipeline, deren Laden nur gezählt wird, statt Gewichte zu laden."""
+
+    def __init__(self, idle_timeout=0, load_seconds=0.0):
+        super().__init__("test/whisper", "cpu", None, idle_timeout=idle_timeout)
+        self.load_calls = 0
+        self.load_seconds = load_seconds
+
+    def _load(self):
+        self.load_calls += 1
+        time.sleep(self.load_seconds)
+        with self._lock:
+            self._pipe = lambda inputs, **kwargs: {"text": "ok"}
+            self._loads += 1
+
+class TestModelPipeline(unittest.TestCase):
+    def test_not_loaded_until_first_use(self):
+        pipeline = CountingPipeline()
+        self.assertFalse(pipeline.loaded)
+        self.assertEqual(pipeline.load_calls, 0)
+        with pipeline.use() as pipe:
+            self.assertEqual(pipe({})["text"], "ok")
+        self.assertTrue(pipeline.loaded)
+
+    def test_concurrent_first_calls_load_once(self):
+        pipeline = CountingPipeline(load_seconds=0.2)
+        barrier = threading.Barrier(8)
+
+        def worker():
+            barrier.wait()
+            with pipeline.use():
+                pass
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(pipeline.load_calls, 1)
+        self.assertEqual(pipeline.metrics()["loads"], 1)
+
+    def test_unloads_after_idle_timeout(self):
+        pipeline = CountingPipeline(idle_timeout=0.1)
+        with pipeline.use():
+            pass
+        deadline = time.monotonic() + 2
+        while pipeline.loaded and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertFalse(pipeline.loaded)
+        self.assertEqual(pipeline.metrics()["unloads"], 1)
+        with pipeline.use():
+            pass
+        self.assertEqual(pipeline.load_calls, 2)
+
+    def test_not_unloaded_while_in_use(self):
+        pipeline = CountingPipeline()
+        with pipeline.use():
+            self.assertFalse(pipeline.unload())
+            self.assertTrue(pipeline.loaded)
+        self.assertTrue(pipeline.unload())
+        self.assertFalse(pipeline.loaded)
+
+class TestQuantization(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def make_model(self):
+        torch.manual_seed(0)
+        return torch.nn.Sequential(torch.nn.Linear(64, 128), torch.nn.ReLU(), torch.nn.Linear(128, 16))
+
+    def test_linear_layers_are_replaced(self):
+        model = quantize_linear_layers(self.make_model())
+        self.assertFalse(any(type(module) is torch.nn.Linear for module in model.modules()))
+        inputs = torch.randn(4, 64)
+        reference = self.make_model()(inputs)
+        self.assertLess((model(inputs) - reference).abs().max().item(), 0.05)
+
+    def test_saved_weights_restore_identical_model(self):
+        model = quantize_linear_layers(self.make_model())
+        path = os.path.join(self.tmp, "int8", "modell.pt")
+        save_quantized_weights(model, path)
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["modell.pt"])
+        restored = quantize_linear_layers(torch.nn.Sequential(torch.nn.Linear(64, 128), torch.nn.ReLU(), torch.nn.Linear(128, 16)))
+        restored.load_state_dict(torch.load(path, weights_only=True))
+        inputs = torch.randn(4, 64)
+        self.assertTrue(torch.equal(model(inputs), restored(inputs)))
+
+    def test_cache_path_separates_models(self):
+        self.assertNotEqual(quantized_weights_path("openai/whisper-tiny"), quantized_weights_path("openai/whisper-small"))
+        self.assertNotIn("/whisper-tiny", quantized_weights_path("openai/whisper-tiny"))
+
+    def test_quantize_only_on_cpu(self):
+        self.assertTrue(ModelPipeline("test/whisper", "cpu", None, quantize=True).quantize)
+        self.assertFalse(ModelPipeline("test/whisper", "cuda:0", None, quantize=True).quantize)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from cancellation import CancellationToken, GenerationCancelled
+from ollama_client import OllamaClient, OllamaError
+
+TOKENS = ["Hallo", ", ", "Welt", "!"]
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """Emuliert die NDJSON-Streams von `/api/chat` und `/api/generate` sowie `/api/embed`."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        self.server.connections.add(self.client_address)
+        body = json.dumps({"version": "0.0.0-test"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.server.connections.add(self.client_address)
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.payloads.append(payload)
+        if payload["model"] == "missing":
+            body = json.dumps({"error": "model 'missing' not found"}).encode()
+            self.send_response(404)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path == "/api/embed":
+            body = json.dumps({"model": payload["model"], "embeddings": [[float(len(text)), 1.0] for text in payload["input"]]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        if payload["model"] == "slow":
+            try:
+                for _ in range(100):
+                    event = {"model": "slow", "message": {"role": "assistant", "content": "."}, "done": False}
+                    self._send_chunk(json.dumps(event).encode() + b"\n")
+                    time.sleep(0.05)
+            except OSError:
+                self.server.aborted.set()
+            return
+        for token in TOKENS:
+            if self.path == "/api/chat":
+                event = {"model": payload["model"], "message": {"role": "assistant", "content": token}, "done": False}
+            else:
+                event = {"model": payload["model"], "response": token, "done": False}
+            self._send_chunk(json.dumps(event).encode() + b"\n")
+        done = {"model": payload["model"], "done": True, "eval_count": len(TOKENS), "eval_duration": 1000}
+        self._send_chunk(json.dumps(done).encode() + b"\n")
+        self._send_chunk(b"")
+
+class TestOllamaClient(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllamaHandler)
+        cls.server.connections = set()
+        cls.server.payloads = []
+        cls.server.aborted = threading.Event()
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.connections.clear()
+        self.server.payloads.clear()
+        host, port = self.server.server_address
+        self.client = OllamaClient(host=f"http://{host}:{port}")
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_is_available(self):
+        self.assertTrue(self.client.is_available())
+        self.assertFalse(OllamaClient(host="http://127.0.0.1:9").is_available())
+
+    def test_chat_stream_yields_tokens(self):
+        result = list(self.client.chat_stream("gemma2:2b", [{"role": "user", "content": "Hallo"}]))
+        self.assertEqual(result, TOKENS)
+        self.assertTrue(self.server.payloads[0]["stream"])
+
+    def test_generate_with_options(self):
+        result = self.client.generate("gemma2:2b", "Hallo", options={"temperature": 0})
+        self.assertEqual(result, "".join(TOKENS))
+        self.assertEqual(self.server.payloads[0]["options"], {"temperature": 0})
+
+    def test_embed_returns_one_vector_per_text(self):
+        self.assertEqual(self.client.embed("nomic-embed-text", ["ab", "abcd"]), [[2.0, 1.0], [4.0, 1.0]])
+        self.assertFalse(self.server.payloads[0]["stream"])
+
+    def test_iter_chat_returns_done_event(self):
+        events = list(self.client.iter_chat("gemma2:2b", [{"role": "user", "content": "Hallo"}]))
+        self.assertTrue(events[-1]["done"])
+        self.assertEqual(events[-1]["eval_count"], len(TOKENS))
+
+    def test_connection_is_reused(self):
+        for _ in range(3):
+            list(self.client.generate_stream("gemma2:2b", "Hallo"))
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_error_is_raised(self):
+        with self.assertRaises(OllamaError):
+            list(self.client.generate_stream("missing", "Hallo"))
+
+    def test_cancel_closes_stream(self):
+        token = CancellationToken("ollama")
+        events = []
+        errors = []
+
+        def consume():
+            try:
+                for event in self.client.iter_chat("slow", [{"role": "user", "content": "Hallo"}], cancel_token=token):
+                    events.append(event)
+            except GenerationCancelled as e:
+                errors.append(e)
+
+        consumer = threading.Thread(target=consume)
+        consumer.start()
+        while not events:
+            time.sleep(0.01)
+        start = time.perf_counter()
+        token.cancel()
+        consumer.join(timeout=5)
+        self.assertFalse(consumer.is_alive())
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(len(errors), 1)
+        self.assertLess(len(events), 100)
+        self.assertTrue(self.server.aborted.wait(timeout=2))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,8 @@
 
 import unittest
 from unittest.mock import MagicMock
+from cancellation import CancellationToken
+from config import OLLAMA_CONTEXT_TOKENS
 from ollama_functions import OllamaFunctions
 
 class TestOllamaFunctions(unittest.TestCase):
@@ -60,5 +62,64 @@ class TestOllamaFunctions(unittest.TestCase):
         self.assertIn("Response part 1", result[0][1])
         self.assertIn("Response part 2", result[1][1])
 
+    def test_fan_out(self):
+        def fake_stream(prompt, model, stats=None, cancel_token=None):
+            for token in [model, " sagt", " Hallo"]:
+                yield token
+            stats.update(eval_count=3, eval_duration=1e9)
+
+        self.ollama_functions.stream_ollama = fake_stream
+        result = list(self.ollama_functions.fan_out("Hallo", ["gemma2:2b", "phi4-model:latest"], parallelism=2))
+        *panes, stats = result[-1]
+        self.assertIn("gemma2:2b sagt Hallo", panes[0])
+        self.assertIn("phi4-model:latest sagt Hallo", panes[1])
+        self.assertEqual(panes[2], "")
+        self.assertIn("| gemma2:2b | fertig |", stats)
+        self.assertIn("| 3.0 |", stats)
+
+    def test_fan_out_releases_cancel_callback(self):
+        def fake_stream(prompt, model, stats=None, cancel_token=None):
+            yield "Hallo"
+
+        self.ollama_functions.stream_ollama = fake_stream
+        token = CancellationToken("ollama")
+        list(self.ollama_functions.fan_out("Hallo", ["gemma2:2b"], cancel_token=token))
+        self.assertEqual(token._callbacks, [])
+
+    def test_map_reduce_documents(self):
+        prompts = []
+        options_seen = []
+
+        def fake_stream(prompt, model, stats=None, cancel_token=None, options=None):
+            prompts.append(prompt)
+            options_seen.append(options)
+            if "Teilantworten" in prompt:
+                yield "Gesamtantwort"
+            else:
+                yield f"Teilantwort {len(prompts)}"
+
+        self.ollama_functions.stream_ollama = fake_stream
+        document = "\n\n".join(f"Absatz {i} " + "Text " * 200 for i in range(40))
+        result = list(self.ollama_functions.map_reduce_documents("Worum geht es?", [("Dokument", document)], "gemma2:2b"))
+        map_prompts = [prompt for prompt in prompts if "Teilantworten" not in prompt]
+        self.assertGreater(len(map_prompts), 1)
+        self.assertTrue(all("Absatz" in prompt for prompt in map_prompts))
+        self.assertIn(f"verarbeitet: {len(map_prompts)} von {len(map_prompts)}", "".join(output for output, _ in result))
+        self.assertIn("Gesamtantwort", result[-1][0])
+        self.assertEqual(result[-1][1], "Antwort generiert.")
+        self.assertEqual(options_seen, [{"num_ctx": OLLAMA_CONTEXT_TOKENS}] * len(prompts))
+
+    def test_chatbot_interface_cancelled(self):
+        token = CancellationToken("ollama")
+
+        def fake_stream(prompt, model, stats=None, cancel_token=None, options=None):
+            yield "Teil"
+            cancel_token.cancel()
+            cancel_token.raise_if_cancelled()
+
+        self.ollama_functions.stream_ollama = fake_stream
+        result = list(self.ollama_functions.chatbot_interface("Hallo", "gemma2:2b", cancel_token=token))
+        self.assertEqual(result[-1][1], "Generierung abgebrochen.")
+
 if __name__ == "__main__":
     unittest.main()
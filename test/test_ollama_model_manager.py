@@ -0,0 +1,85 @@
+import threading
+import time
+import unittest
+from ollama_model_manager import OllamaModelManager, STATE_COLD, STATE_LOADING, STATE_WARM
+
+GB = 1024 ** 3
+
+class FakeClient:
+    """Ersetzt den OllamaClient und simuliert Laden und Entladen im Daemon."""
+
+    def __init__(self, sizes, load_delay=0.0):
+        self.sizes = sizes
+        self.loaded = {}
+        self.load_delay = load_delay
+        self.unloaded = []
+        self.loads = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def get_json(self, path):
+        if path == "/api/ps":
+            return {"models": [{"name": name, "size": size} for name, size in self.loaded.items()]}
+        return {"models": [{"name": name, "size": size} for name, size in self.sizes.items()]}
+
+    def post_json(self, path, payload):
+        if payload["keep_alive"] == 0:
+            self.loaded.pop(payload["model"], None)
+            self.unloaded.append(payload["model"])
+        else:
+            self.loads += 1
+            self.release.wait()
+            time.sleep(self.load_delay)
+            self.loaded[payload["model"]] = self.sizes[payload["model"]]
+        return {"done": True}
+
+class TestOllamaModelManager(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeClient({"gemma2:2b": 2 * GB, "phi4-model:latest": 9 * GB, "wizardlm2:7b-fp16": 14 * GB})
+        self.manager = OllamaModelManager(self.client, ram_budget_gb=16)
+
+    def test_ensure_loaded_marks_model_warm(self):
+        self.assertEqual(self.manager.state("gemma2:2b"), STATE_COLD)
+        self.manager.ensure_loaded("gemma2:2b")
+        self.assertEqual(self.manager.state("gemma2:2b"), STATE_WARM)
+        self.assertIn("gemma2:2b", self.manager.status_markdown())
+
+    def test_least_recently_used_model_is_evicted(self):
+        self.manager.ensure_loaded("gemma2:2b")
+        self.manager.ensure_loaded("phi4-model:latest")
+        self.manager.ensure_loaded("gemma2:2b")
+        self.manager.ensure_loaded("wizardlm2:7b-fp16")
+        self.assertEqual(self.client.unloaded, ["phi4-model:latest"])
+        self.assertEqual(self.manager.state("gemma2:2b"), STATE_WARM)
+        self.assertEqual(self.manager.state("wizardlm2:7b-fp16"), STATE_WARM)
+
+    def test_model_in_use_is_not_evicted(self):
+        with self.manager.use("phi4-model:latest"):
+            self.manager.ensure_loaded("wizardlm2:7b-fp16")
+        self.assertEqual(self.client.unloaded, [])
+
+    def test_warm_model_does_not_wait_for_cold_load(self):
+        self.manager.ensure_loaded("gemma2:2b")
+        self.client.release.clear()
+        loading = self.manager.preload_async("phi4-model:latest")
+        while self.manager.state("phi4-model:latest") != STATE_LOADING:
+            time.sleep(0.001)
+        start = time.perf_counter()
+        with self.manager.use("gemma2:2b"):
+            pass
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.client.release.set()
+        self.assertTrue(loading.wait(1))
+
+    def test_concurrent_loads_are_coalesced(self):
+        self.client.load_delay = 0.05
+        threads = [threading.Thread(target=self.manager.ensure_loaded, args=("gemma2:2b",)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.manager.state("gemma2:2b"), STATE_WARM)
+        self.assertEqual(self.client.loads, 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import shutil
+import tempfile
+import unittest
+from fpdf import FPDF
+from PyPDF2 import PdfReader
+from pdf_extraction import iter_pdf_pages, extract_pdf_text
+
+class TestPdfExtraction(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.tmp, "lang.pdf")
+        pdf = FPDF()
+        for number in range(120):
+            pdf.add_page()
+            pdf.set_font("Arial", size=12)
+            pdf.cell(0, 10, f"Seite {number}")
+        pdf.output(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp)
+
+    def test_parallel_matches_serial(self):
+        serial = list(iter_pdf_pages(self.path, workers=1))
+        parallel = list(iter_pdf_pages(self.path, workers=2, batch_pages=7))
+        self.assertEqual(len(serial), 120)
+        self.assertEqual(parallel, serial)
+        self.assertEqual(extract_pdf_text(self.path, workers=2), "".join(serial))
+
+    def test_pages_are_in_document_order(self):
+        pages = list(iter_pdf_pages(self.path, workers=2, batch_pages=10))
+        for number, page in enumerate(pages):
+            self.assertIn(f"Seite {number}", page)
+
+    def test_matches_pypdf2(self):
+        reader = PdfReader(self.path)
+        self.assertEqual(extract_pdf_text(self.path), "".join(page.extract_text() for page in reader.pages))
+
+if __name__ == "__main__":
+    unittest.main()
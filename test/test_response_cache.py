@@ -0,0 +1,153 @@
+import shutil
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+from PIL import Image
+from api_client import api_client
+from cancellation import CancellationToken
+from disk_cache import DiskCache
+from gemini_functions import GeminiFunctions
+from response_cache import ResponseCache, is_deterministic, normalize_prompt
+
+GREEDY = {"temperature": 0}
+
+class Counter:
+    def __init__(self, response="Antwort"):
+        self.response = response
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.response
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = ResponseCache(DiskCache(self.directory, 1024 * 1024), ttl=3600)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_same_request_is_answered_from_cache(self):
+        compute = Counter()
+        self.assertEqual(self.cache.cached("gemini", "flash", "Erkläre x", compute, params=GREEDY), "Antwort")
+        self.assertEqual(self.cache.cached("gemini", "flash", "Erkläre x  \r\n", compute, params=GREEDY), "Antwort")
+        self.assertEqual(compute.calls, 1)
+        metrics = self.cache.metrics()
+        self.assertEqual((metrics["hits"], metrics["misses"], metrics["hit_rate"]), (1, 1, 0.5))
+
+    def test_key_contains_model_params_and_attachments(self):
+        compute = Counter()
+        self.cache.cached("gemini", "flash", "Prompt", compute, params=GREEDY)
+        self.cache.cached("gemini", "pro", "Prompt", compute, params=GREEDY)
+        self.cache.cached("mistral", "flash", "Prompt", compute, params=GREEDY)
+        self.cache.cached("gemini", "flash", "Prompt", compute, params={"temperature": 0, "max_tokens": 10})
+        self.cache.cached("gemini", "flash", "Prompt", compute, params=GREEDY, attachments=[Image.new("RGB", (4, 4), "red")])
+        self.cache.cached("gemini", "flash", "Prompt", compute, params=GREEDY, attachments=[Image.new("RGB", (4, 4), "blue")])
+        self.assertEqual(compute.calls, 6)
+
+    def test_sampled_requests_are_not_cached(self):
+        compute = Counter()
+        for _ in range(2):
+            self.cache.cached("ollama", "gemma2:2b", "Prompt", compute, params={"options": {"temperature": 0.8}})
+        self.assertEqual(compute.calls, 2)
+        self.assertEqual(self.cache.metrics()["skipped"], 2)
+        self.assertTrue(is_deterministic({"temperature": 0.8, "seed": 1}))
+        self.assertTrue(is_deterministic({"options": {"temperature": 0}}))
+        self.assertFalse(is_deterministic(None))
+
+    def test_sampled_requests_are_cached_on_request(self):
+        compute = Counter()
+        for _ in range(2):
+            self.cache.cached("gemini", "flash", "Prompt", compute, cache_sampled=True)
+        self.assertEqual(compute.calls, 1)
+        self.assertEqual(self.cache.metrics()["skipped"], 0)
+
+    def test_entries_survive_restart(self):
+        self.cache.cached("gemini", "flash", "Prompt", Counter(), params=GREEDY)
+        compute = Counter()
+        restarted = ResponseCache(DiskCache(self.directory, 1024 * 1024))
+        restarted.cached("gemini", "flash", "Prompt", compute, params=GREEDY)
+        self.assertEqual(compute.calls, 0)
+
+    def test_expired_entries_are_recomputed(self):
+        self.cache.ttl = 0.05
+        compute = Counter()
+        self.cache.cached("gemini", "flash", "Prompt", compute, params=GREEDY)
+        time.sleep(0.1)
+        self.cache.cached("gemini", "flash", "Prompt", compute, params=GREEDY)
+        self.assertEqual(compute.calls, 2)
+        self.assertEqual(self.cache.metrics()["expired"], 1)
+
+    def test_errors_and_empty_responses_are_not_cached(self):
+        def fail():
+            raise ConnectionError("Netzwerkfehler")
+        with self.assertRaises(ConnectionError):
+            self.cache.cached("gemini", "flash", "Prompt", fail, params=GREEDY)
+        self.assertIsNone(self.cache.cached("gemini", "flash", "Prompt", Counter(None), params=GREEDY))
+        compute = Counter()
+        self.cache.cached("gemini", "flash", "Prompt", compute, params=GREEDY)
+        self.assertEqual(compute.calls, 1)
+
+    def test_status_markdown_shows_hit_rate(self):
+        for _ in range(2):
+            self.cache.cached("gemini", "flash", "Prompt", Counter(), params=GREEDY)
+        self.assertIn("| 1 | 0 | 1 | 0 | 50% |", self.cache.status_markdown())
+        self.assertIn("Abgeschaltet", ResponseCache(None).status_markdown())
+
+    def test_streamed_response_is_stored_when_complete(self):
+        calls = []
+        def stream():
+            calls.append(1)
+            yield "Ant"
+            yield "wort"
+        token = CancellationToken()
+        token.cancel()
+        self.assertEqual(list(self.cache.cached_stream("ollama", "gemma2:2b", "Prompt", stream, cache_sampled=True, cancel_token=token)), ["Ant", "wort"])
+        partial = self.cache.cached_stream("ollama", "gemma2:2b", "Prompt", stream, cache_sampled=True)
+        next(partial)
+        partial.close()
+        self.assertEqual(list(self.cache.cached_stream("ollama", "gemma2:2b", "Prompt", stream, cache_sampled=True)), ["Ant", "wort"])
+        self.assertEqual(list(self.cache.cached_stream("ollama", "gemma2:2b", "Prompt", stream, cache_sampled=True)), ["Antwort"])
+        self.assertEqual(len(calls), 3)
+
+    def test_disabled_cache_always_computes(self):
+        cache = ResponseCache(None)
+        compute = Counter()
+        for _ in range(2):
+            cache.cached("gemini", "flash", "Prompt", compute, params=GREEDY)
+        self.assertEqual(compute.calls, 2)
+        self.assertEqual(cache.metrics()["bytes"], 0)
+
+    def test_normalize_prompt_keeps_indentation(self):
+        self.assertEqual(normalize_prompt("\ndef f():  \r\n    return 1\n\n"), "def f():\n    return 1")
+
+class TestGeminiCodeAnalysisCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.original_model = api_client.gemini_model
+        self.requests = []
+        api_client.gemini_model = SimpleNamespace(model_name="models/gemini-test", generate_content=self.generate_content)
+
+    def tearDown(self):
+        api_client.gemini_model = self.original_model
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def generate_content(self, prompt, generation_config=None):
+        self.requests.append(generation_config)
+        return SimpleNamespace(text=f"Analyse {len(self.requests)}")
+
+    def test_analysis_is_cached_across_instances(self):
+        cache = ResponseCache(DiskCache(self.directory, 1024 * 1024))
+        with patch("gemini_functions.response_cache", cache):
+            first = GeminiFunctions().analyze_code("print(1)")
+            second = GeminiFunctions().analyze_code("print(1)")
+            GeminiFunctions().suggest_code_improvements("print(1)")
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.requests), 2)
+        self.assertIsNone(self.requests[0])
+
+if __name__ == "__main__":
+    unittest.main()
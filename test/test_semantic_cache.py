@@ -0,0 +1,113 @@
+import shutil
+import tempfile
+import unittest
+import zlib
+import numpy as np
+from disk_cache import DiskCache
+from unittest.mock import patch
+import ollama_functions
+from ollama_functions import OllamaFunctions
+from response_cache import ResponseCache, response_cache
+from semantic_cache import SemanticCache, VectorIndex
+
+GREEDY = {"temperature": 0}
+
+def bag_of_words(text):
+    """Einfaches Embedding: Wortanzahl pro Hash-Fach, unabhängig von Groß- und Kleinschreibung."""
+    vector = np.zeros(64)
+    for word in text.lower().split():
+        vector[zlib.crc32(word.strip("?.,!").encode()) % 64] += 1
+    return vector
+
+def unit(values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+class TestVectorIndex(unittest.TestCase):
+    def test_finds_most_similar_vector(self):
+        index = VectorIndex(dim=2, max_entries=10)
+        index.add(unit([1, 0]), "x")
+        index.add(unit([0, 1]), "y")
+        score, value = index.search(unit([0.1, 1]))
+        self.assertEqual(value, "y")
+        self.assertAlmostEqual(score, 0.995, places=3)
+        self.assertEqual(VectorIndex(2, 10).search(unit([1, 0])), (-1.0, None))
+
+    def test_grows_and_overwrites_oldest_when_full(self):
+        index = VectorIndex(dim=2, max_entries=1500)
+        for number in range(1600):
+            index.add(unit([1, number]), number)
+        self.assertEqual(len(index), 1500)
+        self.assertEqual(index.search(unit([1, 0]))[1], 100)
+
+class TestSemanticCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = SemanticCache(bag_of_words, threshold=0.9, max_entries=100)
+
+    def test_paraphrase_hits_and_other_question_misses(self):
+        _, vector = self.cache.lookup("gemini", "Wie spät ist es?")
+        self.cache.add("gemini", vector, "Antwort")
+        self.assertEqual(self.cache.lookup("gemini", "wie  SPÄT ist es")[0], "Antwort")
+        self.assertIsNone(self.cache.lookup("gemini", "Was kostet ein Brot?")[0])
+        self.assertIsNone(self.cache.lookup("mistral", "Wie spät ist es?")[0])
+        metrics = self.cache.metrics()
+        self.assertEqual((metrics["hits"], metrics["misses"], metrics["entries"]), (1, 3, 1))
+
+    def test_embedding_errors_are_misses(self):
+        def fail(text):
+            raise ConnectionError("Ollama nicht erreichbar")
+        cache = SemanticCache(fail)
+        self.assertEqual(cache.lookup("gemini", "Hallo"), (None, None))
+        self.assertEqual(cache.metrics()["errors"], 1)
+
+class TestResponseCacheWithSemanticCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.semantic = SemanticCache(bag_of_words, threshold=0.9)
+        self.cache = ResponseCache(DiskCache(self.directory, 1024 * 1024), semantic=self.semantic)
+        self.calls = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def compute(self):
+        self.calls += 1
+        return f"Antwort {self.calls}"
+
+    def test_paraphrase_is_answered_from_cache(self):
+        self.cache.cached("gemini", "flash", "Was ist eine Closure in Python?", self.compute, params=GREEDY, semantic=True)
+        self.assertEqual(self.cache.cached("gemini", "flash", "was ist eine closure in python", self.compute, params=GREEDY, semantic=True), "Antwort 1")
+        self.cache.cached("gemini", "pro", "was ist eine closure in python", self.compute, params=GREEDY, semantic=True)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.cache.metrics()["semantic_hits"], 1)
+
+    def test_semantic_matching_is_opt_in(self):
+        self.cache.cached("gemini", "flash", "Was ist eine Closure in Python?", self.compute, params=GREEDY, semantic=True)
+        self.cache.cached("gemini", "flash", "was ist eine closure in python", self.compute, params=GREEDY)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.semantic.metrics()["hits"] + self.semantic.metrics()["misses"], 1)
+
+    def test_attachments_need_exact_match(self):
+        self.cache.cached("mistral", "pixtral", "Beschreibe das Bild", self.compute, params=GREEDY, attachments=["bild-1"], semantic=True)
+        self.cache.cached("mistral", "pixtral", "beschreibe das bild", self.compute, params=GREEDY, attachments=["bild-1"], semantic=True)
+        self.assertEqual(self.calls, 2)
+
+if __name__ == "__main__":
+    unittest.main()
+
+class TestOllamaChatSemanticCache(unittest.TestCase):
+    def test_plain_question_paraphrase_is_answered_from_cache(self):
+        functions = OllamaFunctions()
+        calls = []
+        def stream_ollama(prompt, model, cancel_token=None, options=None):
+            calls.append(prompt)
+            yield f"Antwort {len(calls)}"
+        functions.stream_ollama = stream_ollama
+        hits = response_cache.metrics()["semantic_hits"]
+        with patch.object(ollama_functions, "SEMANTIC_CACHE_ENABLED", True), \
+                patch.object(response_cache, "semantic", SemanticCache(bag_of_words, threshold=0.9)):
+            first = list(functions.chatbot_interface("Was ist eine Closure in Python?", "gemma2:2b"))
+            second = list(functions.chatbot_interface("was ist eine closure in python", "gemma2:2b"))
+        self.assertEqual(first[-1][0], second[-1][0])
+        self.assertEqual(calls, ["Was ist eine Closure in Python?"])
+        self.assertEqual(response_cache.metrics()["semantic_hits"], hits + 1)
@@ -0,0 +1,43 @@
+import random
+import unittest
+from stream_formatter import StreamingFormatter
+
+SAMPLE = ("Hier   ist eine\n\nlange Antwort mit viel Text, die umbrochen werden muss. " * 4
+          + "Beispiel:\n```python\ndef f(x):\n    return x  # Einrückung bleibt\n```\nUnd  danach  Text.")
+
+class TestStreamingFormatter(unittest.TestCase):
+    def render(self, chunks):
+        formatter = StreamingFormatter()
+        deltas = [formatter.feed(chunk) for chunk in chunks]
+        deltas.append(formatter.finish())
+        self.assertEqual("".join(deltas), formatter.getvalue())
+        return formatter.getvalue()
+
+    def test_collapses_whitespace_and_wraps(self):
+        result = self.render([SAMPLE])
+        prose = result.split("```")[0]
+        self.assertNotIn("  ", prose)
+        for line in prose.splitlines()[:-1]:
+            self.assertGreaterEqual(len(line), 80)
+
+    def test_code_block_is_kept_verbatim(self):
+        result = self.render([SAMPLE])
+        self.assertIn("```python\ndef f(x):\n    return x  # Einrückung bleibt\n```\n", result)
+
+    def test_chunking_does_not_change_result(self):
+        expected = self.render([SAMPLE])
+        rng = random.Random(0)
+        for _ in range(50):
+            chunks, i = [], 0
+            while i < len(SAMPLE):
+                j = i + rng.randint(1, 6)
+                chunks.append(SAMPLE[i:j])
+                i = j
+            self.assertEqual(self.render(chunks), expected)
+
+    def test_finish_closes_open_code_block(self):
+        result = self.render(["```\nprint(1)"])
+        self.assertTrue(result.endswith("print(1)\n```\n"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import math
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+import wave
+from contextlib import nullcontext
+from types import SimpleNamespace
+import openai
+from asr_batcher import ASRBatcher
+from transcription import LocalWhisperBackend, OpenAITranscriptionBackend, AutoTranscriptionBackend, TranscriptionBackend, get_backend
+
+class FakePipe:
+    def __init__(self, text=" Hallo Welt "):
+        self.text = text
+        self.calls = []
+
+    def __call__(self, inputs, **kwargs):
+        self.calls.append((inputs, kwargs))
+        return [{"text": self.text} for _ in inputs]
+
+class FailingBackend(TranscriptionBackend):
+    def __init__(self, error):
+        self.error = error
+
+    def transcribe(self, audio_file_path):
+        raise self.error
+
+    def transcribe_segments(self, samples):
+        raise self.error
+
+class TestTranscription(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.tmp, "stereo.wav")
+        rate = 44100
+        with wave.open(cls.path, "wb") as f:
+            f.setnchannels(2)
+            f.setsampwidth(2)
+            f.setframerate(rate)
+            frames = b"".join(
+                struct.pack("<hh", value, value)
+                for value in (int(16000 * math.sin(2 * math.pi * 440 * i / rate)) for i in range(rate * 2))
+            )
+            f.writeframes(frames)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp)
+
+    def test_backend_requires_transcribe_segments(self):
+        with self.assertRaises(TypeError):
+            TranscriptionBackend()
+
+    def test_local_backend_passes_array_to_pipe(self):
+        pipe = FakePipe()
+        backend = LocalWhisperBackend(ASRBatcher(lambda: nullcontext(pipe)))
+        self.assertEqual(backend.transcribe(self.path), "Hallo Welt")
+        inputs, kwargs = pipe.calls[0]
+        self.assertEqual(inputs[0]["sampling_rate"], 16000)
+        self.assertEqual(kwargs["chunk_length_s"], 30)
+        self.assertTrue(kwargs["return_timestamps"])
+
+    def test_local_backend_loads_pipe_lazily(self):
+        requested = []
+        LocalWhisperBackend(ASRBatcher(lambda: requested.append(True) or nullcontext()))
+        self.assertEqual(requested, [])
+
+    def test_openai_backend_requests_plain_json_for_text(self):
+        requests = []
+
+        def create(**kwargs):
+            requests.append(kwargs)
+            return SimpleNamespace(text="Hallo Welt")
+
+        backend = OpenAITranscriptionBackend()
+        backend._client = SimpleNamespace(audio=SimpleNamespace(transcriptions=SimpleNamespace(create=create)))
+        self.assertEqual(backend.transcribe(self.path), "Hallo Welt")
+        self.assertEqual(requests[0]["response_format"], "json")
+        self.assertNotIn("timestamp_granularities", requests[0])
+
+    def test_auto_falls_back_without_api_key(self):
+        pipe = FakePipe("lokal")
+        backend = AutoTranscriptionBackend(
+            remote=FailingBackend(openai.OpenAIError("api_key fehlt")),
+            local=LocalWhisperBackend(ASRBatcher(lambda: nullcontext(pipe))),
+        )
+        self.assertEqual(backend.transcribe(self.path), "lokal")
+
+    def test_auto_does_not_hide_other_errors(self):
+        backend = AutoTranscriptionBackend(
+            remote=FailingBackend(RuntimeError("kaputt")),
+            local=LocalWhisperBackend(ASRBatcher(lambda: nullcontext(FakePipe()))),
+        )
+        with self.assertRaises(RuntimeError):
+            backend.transcribe(self.path)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            get_backend("unbekannt")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import unittest
+import wave
+import numpy as np
+from disk_cache import DiskCache
+from long_transcription import transcribe_file, iter_transcription
+from transcription import TranscriptionBackend, TranscriptSegment
+from transcription_cache import TranscriptionCache
+
+RATE = 16000
+
+def write_wav(path, samples, rate=RATE):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes((samples * 32767).astype("<i2").tobytes())
+
+class CountingBackend(TranscriptionBackend):
+    name = "zaehler"
+
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio_file_path):
+        self.calls += 1
+        return "hallo welt"
+
+    def transcribe_segments(self, samples):
+        self.calls += 1
+        return [TranscriptSegment(0.0, len(samples) / RATE, "teil")]
+
+class TestTranscriptionCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache = TranscriptionCache(DiskCache(os.path.join(self.tmp, "cache"), 1024 * 1024))
+        self.samples = np.random.default_rng(0).uniform(-0.5, 0.5, 3 * RATE).astype(np.float32)
+        self.first = os.path.join(self.tmp, "memo.wav")
+        self.second = os.path.join(self.tmp, "erneut gesendet.wav")
+        write_wav(self.first, self.samples)
+        write_wav(self.second, self.samples)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_same_audio_under_other_name_hits(self):
+        backend = CountingBackend()
+        self.assertEqual(transcribe_file(self.first, backend, cache=self.cache), "hallo welt")
+        self.assertEqual(transcribe_file(self.second, backend, cache=self.cache), "hallo welt")
+        self.assertEqual(backend.calls, 1)
+        metrics = self.cache.metrics()
+        self.assertEqual((metrics["hits"], metrics["misses"]), (1, 1))
+        self.assertAlmostEqual(metrics["hit_rate"], 0.5)
+        self.assertAlmostEqual(metrics["saved_audio_seconds"], 3.0, places=2)
+
+    def test_other_audio_or_backend_misses(self):
+        backend = CountingBackend()
+        transcribe_file(self.first, backend, cache=self.cache)
+        other = os.path.join(self.tmp, "anders.wav")
+        write_wav(other, self.samples[::-1].copy())
+        transcribe_file(other, backend, cache=self.cache)
+        self.assertEqual(backend.calls, 2)
+
+        class OtherBackend(CountingBackend):
+            name = "anderes"
+
+        other_backend = OtherBackend()
+        transcribe_file(self.first, other_backend, cache=self.cache)
+        self.assertEqual(other_backend.calls, 1)
+
+    def test_streamed_transcription_is_cached(self):
+        backend = CountingBackend()
+        first = list(iter_transcription(self.first, backend, chunk_s=1, cache=self.cache))
+        calls = backend.calls
+        second = list(iter_transcription(self.second, backend, chunk_s=1, cache=self.cache))
+        self.assertEqual(backend.calls, calls)
+        self.assertEqual(second, [first[-1]])
+
+if __name__ == "__main__":
+    unittest.main()
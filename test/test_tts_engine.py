@@ -0,0 +1,137 @@
+import threading
+import time
+import unittest
+from cancellation import CancellationToken
+from tts_engine import TTSEngine, SpeechClip, SpeechPipeline, PhraseCache, ClipPlayer, split_sentences
+
+class FakeEngine(TTSEngine):
+    """Engine, die pro Satz eine feste Zeit braucht und den Text als Audiodaten zurückgibt."""
+
+    name = "fake"
+
+    def __init__(self, seconds=0.05, fail_on=None):
+        self.seconds = seconds
+        self.fail_on = fail_on
+        self.synthesized = []
+
+    def synthesize(self, text, language, voice, speed):
+        time.sleep(self.seconds)
+        if text == self.fail_on:
+            raise RuntimeError("kein Netz")
+        self.synthesized.append(text)
+        return SpeechClip(f"{text}|{voice}|{speed}".encode("utf-8"), ".wav")
+
+class FakePlayer:
+    """Player, der die Startzeit jeder Wiedergabe protokolliert."""
+
+    def __init__(self, seconds=0.05):
+        self.seconds = seconds
+        self.played = []
+        self.started = []
+
+    def __call__(self, clip, cancel_token):
+        self.started.append(time.perf_counter())
+        self.played.append(clip.audio.decode("utf-8").split("|")[0])
+        time.sleep(self.seconds)
+
+def sleep_play(path):
+    """Spielt eine "Datei" ab, indem so viele Sekunden gewartet wird, wie in ihr stehen."""
+    with open(path) as f:
+        time.sleep(float(f.read()))
+
+TEXT = "Das ist der erste Satz der Antwort. Hier folgt ein zweiter Satz. Und zum Schluss ein dritter Satz."
+
+class TestSplitSentences(unittest.TestCase):
+    def test_splits_at_sentence_ends(self):
+        self.assertEqual(split_sentences(TEXT), [
+            "Das ist der erste Satz der Antwort.",
+            "Hier folgt ein zweiter Satz.",
+            "Und zum Schluss ein dritter Satz.",
+        ])
+
+    def test_keeps_abbreviations_and_merges_short_parts(self):
+        sentences = split_sentences("Ja! Das geht z.B. mit **Python**.\n- erster Punkt der Liste\n- zweiter Punkt der Liste")
+        self.assertEqual(sentences, ["Ja! Das geht z.B. mit Python.", "erster Punkt der Liste zweiter Punkt der Liste"])
+
+    def test_empty_text(self):
+        self.assertEqual(split_sentences("  \n**  "), [])
+
+class TestTTSEngine(unittest.TestCase):
+    def test_engine_requires_synthesize(self):
+        with self.assertRaises(TypeError):
+            TTSEngine()
+
+class TestSpeechPipeline(unittest.TestCase):
+    def test_first_audio_after_one_sentence(self):
+        engine, player = FakeEngine(seconds=0.2), FakePlayer(seconds=0.2)
+        pipeline = SpeechPipeline(engine, player=player)
+        start = time.perf_counter()
+        pipeline.speak(TEXT, {}, CancellationToken())
+        self.assertEqual(player.played, split_sentences(TEXT))
+        self.assertLess(player.started[0] - start, 0.35)
+        # Synthese und Wiedergabe überlappen: deutlich schneller als 3 x (0,2 + 0,2) s.
+        self.assertLess(time.perf_counter() - start, 1.05)
+        self.assertEqual(pipeline.metrics()["spoken"], 1)
+
+    def test_repeated_sentences_come_from_cache(self):
+        engine = FakeEngine(seconds=0)
+        pipeline = SpeechPipeline(engine, cache=PhraseCache(1024 * 1024), player=FakePlayer(seconds=0))
+        pipeline.speak(TEXT, {"tts_speed": 150}, CancellationToken())
+        pipeline.speak(TEXT, {"tts_speed": 150}, CancellationToken())
+        self.assertEqual(len(engine.synthesized), 3)
+        pipeline.speak(TEXT, {"tts_speed": 200}, CancellationToken())
+        self.assertEqual(len(engine.synthesized), 6)
+        metrics = pipeline.metrics()
+        self.assertEqual((metrics["cache_hits"], metrics["cache_misses"]), (3, 6))
+
+    def test_cancel_stops_synthesis_and_playback(self):
+        engine, player = FakeEngine(seconds=0.1), FakePlayer(seconds=0.1)
+        pipeline = SpeechPipeline(engine, player=player)
+        token = CancellationToken()
+        threading.Timer(0.15, token.cancel).start()
+        pipeline.speak(" ".join([TEXT] * 5), {}, token)
+        time.sleep(0.3)
+        self.assertLess(len(player.played), 3)
+        self.assertLess(len(engine.synthesized), 6)
+
+    def test_engine_errors_reach_the_caller(self):
+        player = FakePlayer(seconds=0)
+        pipeline = SpeechPipeline(FakeEngine(seconds=0, fail_on="Hier folgt ein zweiter Satz."), player=player)
+        with self.assertRaises(RuntimeError):
+            pipeline.speak(TEXT, {}, CancellationToken())
+        self.assertEqual(player.played, ["Das ist der erste Satz der Antwort."])
+
+class TestClipPlayer(unittest.TestCase):
+    def setUp(self):
+        self.player = ClipPlayer(sleep_play)
+
+    def tearDown(self):
+        self.player.close()
+
+    def test_reuses_one_process(self):
+        for _ in range(3):
+            self.player(SpeechClip(b"0.05", ".txt"), CancellationToken())
+        self.assertEqual(self.player.metrics()["process_starts"], 1)
+
+    def test_cancel_interrupts_playback(self):
+        token = CancellationToken()
+        threading.Timer(0.2, token.cancel).start()
+        start = time.perf_counter()
+        self.player(SpeechClip(b"10", ".txt"), token)
+        self.assertLess(time.perf_counter() - start, 3)
+        self.player(SpeechClip(b"0", ".txt"), CancellationToken())
+        self.assertEqual(self.player.metrics()["process_starts"], 2)
+
+class TestPhraseCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = PhraseCache(max_bytes=10)
+        cache.put(("e", "a", "de", "", 150), SpeechClip(b"12345", ".wav"))
+        cache.put(("e", "b", "de", "", 150), SpeechClip(b"12345", ".wav"))
+        cache.get(("e", "a", "de", "", 150))
+        cache.put(("e", "c", "de", "", 150), SpeechClip(b"12345", ".wav"))
+        self.assertIsNotNone(cache.get(("e", "a", "de", "", 150)))
+        self.assertIsNone(cache.get(("e", "b", "de", "", 150)))
+        self.assertEqual(cache.metrics()["bytes"], 10)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import threading
+import time
+import unittest
+from tts_queue import TTSQueue
+
+class FakeSpeaker:
+    """Sprechfunktion, die jede Wiedergabe protokolliert und bis zum Abbruch oder Timeout blockiert."""
+
+    def __init__(self, seconds=0.05):
+        self.seconds = seconds
+        self.spoken = []
+        self.interrupted = []
+        self.started = threading.Event()
+
+    def __call__(self, text, config, token):
+        self.started.set()
+        stopped = threading.Event()
+        token.on_cancel(stopped.set)
+        if stopped.wait(self.seconds):
+            self.interrupted.append(text)
+        else:
+            self.spoken.append(text)
+
+class TestTTSQueue(unittest.TestCase):
+    def test_submit_returns_immediately(self):
+        speaker = FakeSpeaker(seconds=1.0)
+        queue = TTSQueue(speaker)
+        start = time.perf_counter()
+        queue.submit("eine lange Antwort", {})
+        self.assertLess(time.perf_counter() - start, 0.1)
+        queue.cancel()
+        self.assertTrue(queue.wait_idle(timeout=5))
+
+    def test_jobs_are_played_in_order(self):
+        speaker = FakeSpeaker(seconds=0.01)
+        queue = TTSQueue(speaker, max_pending=10)
+        for index in range(5):
+            queue.submit(f"antwort {index}", {})
+        self.assertTrue(queue.wait_idle(timeout=5))
+        self.assertEqual(speaker.spoken, [f"antwort {index}" for index in range(5)])
+        self.assertEqual(queue.metrics()["played"], 5)
+
+    def test_full_queue_drops_oldest_pending(self):
+        speaker = FakeSpeaker(seconds=0.2)
+        queue = TTSQueue(speaker, max_pending=2)
+        queue.submit("läuft", {})
+        speaker.started.wait(timeout=5)
+        for text in ("alt", "mittel", "neu"):
+            queue.submit(text, {})
+        self.assertTrue(queue.wait_idle(timeout=5))
+        self.assertEqual(speaker.spoken, ["läuft", "mittel", "neu"])
+        self.assertEqual(queue.metrics()["dropped"], 1)
+
+    def test_cancel_stops_current_and_pending_of_session(self):
+        speaker = FakeSpeaker(seconds=5.0)
+        queue = TTSQueue(speaker, max_pending=5)
+        queue.submit("erste", {}, session_id="a")
+        speaker.started.wait(timeout=5)
+        queue.submit("zweite", {}, session_id="a")
+        queue.submit("andere sitzung", {}, session_id="b")
+        speaker.seconds = 0.01
+        self.assertEqual(queue.cancel("a"), 2)
+        self.assertTrue(queue.wait_idle(timeout=5))
+        self.assertEqual(speaker.interrupted, ["erste"])
+        self.assertEqual(speaker.spoken, ["andere sitzung"])
+
+    def test_errors_do_not_stop_the_worker(self):
+        calls = []
+
+        def speak(text, config, token):
+            calls.append(text)
+            if text == "kaputt":
+                raise RuntimeError("kein Netz")
+
+        queue = TTSQueue(speak)
+        queue.submit("kaputt", {})
+        queue.submit("ok", {})
+        self.assertTrue(queue.wait_idle(timeout=5))
+        self.assertEqual(calls, ["kaputt", "ok"])
+
+if __name__ == "__main__":
+    unittest.main()